@@ -42,7 +42,8 @@ from netCDF4 import Dataset
 # User Packages
 import io_utils.ConfigParserLocal as ConfigParserLocal
 import io_utils.EcoFOCI_netCDF_write as EcF_write
-from calc.EPIC2Datetime import Datetime2EPIC, get_UDUNITS
+from calc.EPIC2Datetime import Datetime642EPIC, get_UDUNITS
+from io_utils.EcoFOCI_btl_report import add_cast_keys, read_report_btl
 
 __author__ = "Shaun Bell"
 __email__ = "shaun.bell@noaa.gov"
@@ -76,31 +77,38 @@ parser.add_argument(
     default="",
     help="full path to config file - bottle_epickeys.yaml",
 )
+parser.add_argument(
+    "--report_cache",
+    type=str,
+    default="pickle",
+    choices=["pickle", "parquet", "feather", "none"],
+    help="sidecar format the parsed .report_btl is cached in (none to always parse)",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="number of processes used to write the cast files",
+)
 
 args = parser.parse_args()
 
 ### Read BTL Report file...
 # Bottle Report file obtained by concatenating bottle files without headers
-reportdf = pd.read_csv(args.btlpath, delimiter="\s+", parse_dates=[["date", "time"]])
+reportdf = read_report_btl(
+    args.btlpath,
+    cache_format=None if args.report_cache == "none" else args.report_cache,
+)
 
 print("Btl Report Header Summary:")
 print(reportdf.info())
 
-# strip ctd from cast name and make integer
+# strip ctd from cast name and make integer, sorted by cast/niskin
 try:
-    reportdf["CastNum"] = [
-        int(x.lower().split("ctd")[-1]) for y, x in reportdf.cast.iteritems()
-    ]
+    add_cast_keys(reportdf)
 except ValueError:
     sys.exit("Exiting: Report file doesn't have casts named as expected... ctdxxx")
 
-# make a cast_niskin column to index on
-reportdf["Cast_Niskin"] = [
-    str(x["CastNum"]).zfill(3) + "_" + str(x["nb"]).zfill(2)
-    for y, x in reportdf.iterrows()
-]
-reportdf.sort_values(["Cast_Niskin"], inplace=True)
-
 # Groupby Cast and write to file
 # print out to screen data not saved due to lack of cast info (CTD)
 # missing data is automatically excluded (NA groups)
@@ -114,7 +122,9 @@ elif args.config_file_name.split(".")[-1] in ["yaml"]:
 else:
     sys.exit("Exiting: config files must have .pyini, .json, or .yaml endings")
 
-
+# variable definitions are compiled once and shared by every cast file
+ncbatch = EcF_write.NetCDF_Create_Profile_Batch(EPIC_VARS_dict)
+profiles = []
 for i, cast in enumerate(gb.groups):
     tdata = gb.get_group(cast).sort_values("CastNum")
 
@@ -155,23 +165,24 @@ for i, cast in enumerate(gb.groups):
     ### Time should be consistent in all files as a datetime object
     # convert timestamp to datetime to epic time
     data_dic["time"] = pd.to_datetime(data_dic["time"], format="%Y%m%d %H:%M:%S")
-    time_datetime = [x.to_pydatetime() for x in data_dic["time"]]
-    time1, time2 = np.array(Datetime2EPIC(time_datetime), dtype="f8")
-
-    ncinstance = EcF_write.NetCDF_Create_Profile(savefile=profile_name)
-    ncinstance.file_create()
-    ncinstance.sbeglobal_atts(
-        raw_data_file=args.btlpath.split("/")[-1], CruiseID=cruise, Cast=cast
+    time1, time2 = np.array(Datetime642EPIC(data_dic["time"].values), dtype="f8")
+
+    profiles.append(
+        {
+            "savefile": profile_name,
+            "data_dic": data_dic,
+            "depth": data_dic["dep"],
+            "latitude": 1e35,
+            "longitude": 1e35,
+            "time1": time1[0],
+            "time2": time2[0],
+            "global_atts": {
+                "raw_data_file": args.btlpath.split("/")[-1],
+                "CruiseID": cruise,
+                "Cast": cast,
+            },
+            "history": history,
+        }
     )
-    ncinstance.dimension_init(depth_len=len(tdata))
-    ncinstance.variable_init(EPIC_VARS_dict)
-    ncinstance.add_coord_data(
-        depth=data_dic["dep"],
-        latitude=1e35,
-        longitude=1e35,
-        time1=time1[0],
-        time2=time2[0],
-    )
-    ncinstance.add_data(EPIC_VARS_dict, data_dic=data_dic)
-    ncinstance.add_history(history)
-    ncinstance.close()
+
+ncbatch.write_profiles(profiles, max_workers=args.workers)
@@ -43,7 +43,13 @@ from netCDF4 import Dataset
 
 import io_utils.ConfigParserLocal as ConfigParserLocal
 import io_utils.EcoFOCI_netCDF_write as EcF_write
-from calc.EPIC2Datetime import Datetime2EPIC, get_UDUNITS
+from calc.EPIC2Datetime import Datetime642EPIC, get_UDUNITS
+from io_utils.EcoFOCI_btl_report import (
+    add_cast_keys,
+    merge_on_cast_niskin,
+    read_lab_csv,
+    read_report_btl,
+)
 
 __author__ = "Shaun Bell"
 __email__ = "shaun.bell@noaa.gov"
@@ -81,52 +87,49 @@ parser.add_argument(
 )
 parser.add_argument("--cf", action="store_true",
                     help="make cf compliant netcdf files")
+parser.add_argument(
+    "--report_cache",
+    type=str,
+    default="pickle",
+    choices=["pickle", "parquet", "feather", "none"],
+    help="sidecar format the parsed .report_btl is cached in (none to always parse)",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="number of processes used to write the cast files",
+)
 
 args = parser.parse_args()
 
 # Read oxygen file - processed by E. Weisgarver and
 # Bottle Report file obtained by concatenating bottle files without headers
-ndf = pd.read_csv(args.oxypath, sep="\t|,", engine="python")
-ndf.rename(
-    index=str,
-    columns={"Cast": "cast", "Niskin": "niskin", "Niskin": "niskin"},
-    inplace=True,
-)
+ndf = read_lab_csv(args.oxypath)
 
 print("Oxygen Header Summary:")
 print(ndf.info())
 
-reportdf = pd.read_csv(args.btlpath, delimiter="\s+",
-                       parse_dates=[["date", "time"]])
+reportdf = read_report_btl(
+    args.btlpath,
+    cache_format=None if args.report_cache == "none" else args.report_cache,
+)
 
 print("Btl Report Header Summary:")
 print(reportdf.info())
 
 # strip ctd from cast name and make integer
 try:
-    reportdf["CastNum"] = [
-        int(x.lower().split("ctd")[-1]) for y, x in reportdf.cast.iteritems()
-    ]
+    add_cast_keys(reportdf)
 except ValueError:
     sys.exit("Exiting: Report file doesn't have casts named as expected... ctdxxx")
 
-# make a cast_niskin column to index on
-print("Matching on Cast/Niskin pair.")
-ndf["Cast_Niskin"] = [
-    str(int(x["cast"])).zfill(3) + "_" + str(int(x["niskin"])).zfill(2)
-    for y, x in ndf.iterrows()
-]
-reportdf["Cast_Niskin"] = [
-    str(x["CastNum"]).zfill(3) + "_" + str(x["nb"]).zfill(2)
-    for y, x in reportdf.iterrows()
-]
-
 # three potential merged results
 # Matching Btl and Nut file
 # No Btl - yes nut (no ctd information for this nut value...)
 # Yes Btl - no nut
-temp = pd.merge(ndf, reportdf, on="Cast_Niskin", how="outer")
-temp.sort_values(["Cast_Niskin"], inplace=True)
+print("Matching on Cast/Niskin pair.")
+temp = merge_on_cast_niskin(ndf, reportdf)
 
 # Groupby Cast and write to file
 # print out to screen data not saved due to lack of cast info (CTD)
@@ -155,11 +158,9 @@ if args.cf:
         data_dic.update({"time": tdata["date_time"].values})
         data_dic.update({"dep": tdata["PrDM"].values})
         try:
-            data_dic.update({"BTL_OXY": tdata['"O2 uM/l"'].values})
+            data_dic.update({"BTL_OXY": tdata["O2 uM/l"].values})
         except:
-            print(
-                'O2 field skipped as no column match to "O2 uM/l" - remove comma if in string'
-            )
+            print('O2 field skipped as no column match to "O2 uM/l"')
         data_dic.update({"BTLID": tdata["nb"].values})
 
         cruise = args.CruiseID.lower()
@@ -182,6 +183,9 @@ if args.cf:
 
 else:
     # 4 dimensional (t,z,y,x)
+    # variable definitions are compiled once and shared by every cast file
+    ncbatch = EcF_write.NetCDF_Create_Profile_Batch(EPIC_VARS_dict)
+    profiles = []
     for i, cast in enumerate(gb.groups):
         tdata = gb.get_group(cast).sort_values("CastNum")
 
@@ -190,11 +194,9 @@ else:
         data_dic.update({"time": tdata["date_time"].values})
         data_dic.update({"dep": tdata["PrDM"].values})
         try:
-            data_dic.update({"BO_61": tdata['"O2 uM/l"'].values})
+            data_dic.update({"BO_61": tdata["O2 uM/l"].values})
         except:
-            print(
-                'O2 field skipped as no column match to "O2 uM/l" - remove comma if in string'
-            )
+            print('O2 field skipped as no column match to "O2 uM/l"')
         data_dic.update({"BTL_103": tdata["nb"].values})
 
         cruise = args.CruiseID.lower()
@@ -217,24 +219,24 @@ else:
         # convert timestamp to datetime to epic time
         data_dic["time"] = pd.to_datetime(
             data_dic["time"], format="%Y%m%d %H:%M:%S")
-        time_datetime = [x.to_pydatetime() for x in data_dic["time"]]
-        time1, time2 = np.array(Datetime2EPIC(time_datetime), dtype="f8")
-
-        ncinstance = EcF_write.NetCDF_Create_Profile(savefile=profile_name)
-        ncinstance.file_create()
-        ncinstance.sbeglobal_atts(
-            raw_data_file=args.oxypath.split(
-                "/")[-1], CruiseID=cruise, Cast=cast
+        time1, time2 = np.array(Datetime642EPIC(data_dic["time"].values), dtype="f8")
+
+        profiles.append(
+            {
+                "savefile": profile_name,
+                "data_dic": data_dic,
+                "depth": data_dic["dep"],
+                "latitude": 1e35,
+                "longitude": 1e35,
+                "time1": time1[0],
+                "time2": time2[0],
+                "global_atts": {
+                    "raw_data_file": args.oxypath.split("/")[-1],
+                    "CruiseID": cruise,
+                    "Cast": cast,
+                },
+                "history": history,
+            }
         )
-        ncinstance.dimension_init(depth_len=len(tdata))
-        ncinstance.variable_init(EPIC_VARS_dict)
-        ncinstance.add_coord_data(
-            depth=data_dic["dep"],
-            latitude=1e35,
-            longitude=1e35,
-            time1=time1[0],
-            time2=time2[0],
-        )
-        ncinstance.add_data(EPIC_VARS_dict, data_dic=data_dic)
-        ncinstance.add_history(history)
-        ncinstance.close()
+
+    ncbatch.write_profiles(profiles, max_workers=args.workers)
@@ -24,6 +24,7 @@
 
  History:
  ========
+ 2026-10-17: nutrient depths are matched to ctd depths with calc.depth_merge
 
  Compatibility:
  ==============
@@ -46,6 +47,7 @@ from netCDF4 import Dataset
 
 import io_utils.ConfigParserLocal as ConfigParserLocal
 import io_utils.EcoFOCI_netCDF_write as EcF_write
+from calc.depth_merge import snap_depths
 from calc.EPIC2Datetime import Datetime2EPIC, get_UDUNITS
 from io_utils.EcoFOCI_netCDF_read import EcoFOCI_netCDF
 
@@ -88,6 +90,18 @@ parser.add_argument("-v", "--verbose", action="store_true", help="output message
 parser.add_argument(
     "-csv", "--csv", action="store_true", help="output merged data as csv"
 )
+parser.add_argument(
+    "-tol",
+    "--tolerance",
+    type=float,
+    default=0.5,
+    help="nutrient to ctd depth match tolerance (m)",
+)
+parser.add_argument(
+    "--nearest",
+    action="store_true",
+    help="match nutrients outside the tolerance to the nearest ctd depth",
+)
 
 args = parser.parse_args()
 
@@ -107,6 +121,9 @@ elif args.config_file_name.split(".")[-1] in ["yaml"]:
 else:
     sys.exit("Exiting: config files must have .pyini, .json, or .yaml endings")
 
+# variable definitions compiled once and shared by every merged cast file
+EPIC_schema = None
+
 
 # loop through all ctd files - skip files without downcast for now
 for ind, cast in enumerate(ctd_ncfiles):
@@ -148,10 +165,22 @@ for ind, cast in enumerate(ctd_ncfiles):
     data_dic = {}
     # prep dictionary to send to netcdf gen
 
+    # nutrient depths take the matching ctd depth so the merge is on equal values
     try:
-        data_dic.update({"dep": ncdata_nut["depth"][:].round()})
+        nut_depth = ncdata_nut["depth"][:]
     except KeyError:
-        data_dic.update({"dep": ncdata_nut["dep"][:].round()})
+        nut_depth = ncdata_nut["dep"][:]
+    data_dic.update(
+        {
+            "dep": snap_depths(
+                ncdata["dep"],
+                nut_depth,
+                tolerance=args.tolerance,
+                nearest=args.nearest,
+                fill=np.round,
+            )
+        }
+    )
 
     # check for all variables in ctdfile
     for key in EPIC_VARS_dict.keys():
@@ -214,7 +243,9 @@ for ind, cast in enumerate(ctd_ncfiles):
             Cast=cast,
         )
         ncinstance.dimension_init(depth_len=len(nut_df))
-        ncinstance.variable_init(EPIC_VARS_dict)
+        if EPIC_schema is None:
+            EPIC_schema = EcF_write.compile_schema(EPIC_VARS_dict)
+        ncinstance.variable_init(EPIC_schema)
         ncinstance.add_coord_data(
             depth=nut_df["dep"].values,
             latitude=ncdata_coords[2],
@@ -222,6 +253,6 @@ for ind, cast in enumerate(ctd_ncfiles):
             time1=ncdata_coords[0],
             time2=ncdata_coords[1],
         )
-        ncinstance.add_data(EPIC_VARS_dict, data_dic=nut_df.to_dict("list"))
+        ncinstance.add_data(EPIC_schema, data_dic=nut_df.to_dict("list"))
         ncinstance.add_history(history)
         ncinstance.close()
@@ -43,7 +43,13 @@ from netCDF4 import Dataset
 
 import io_utils.ConfigParserLocal as ConfigParserLocal
 import io_utils.EcoFOCI_netCDF_write as EcF_write
-from calc.EPIC2Datetime import Datetime2EPIC, get_UDUNITS
+from calc.EPIC2Datetime import Datetime642EPIC, get_UDUNITS
+from io_utils.EcoFOCI_btl_report import (
+    add_cast_keys,
+    merge_on_cast_niskin,
+    read_lab_csv,
+    read_report_btl,
+)
 
 __author__ = "Shaun Bell"
 __email__ = "shaun.bell@noaa.gov"
@@ -79,52 +85,49 @@ parser.add_argument(
     type=str,
     help="full path to config file - nut_config.yaml",
 )
+parser.add_argument(
+    "--report_cache",
+    type=str,
+    default="pickle",
+    choices=["pickle", "parquet", "feather", "none"],
+    help="sidecar format the parsed .report_btl is cached in (none to always parse)",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="number of processes used to write the cast files",
+)
 
 args = parser.parse_args()
 
 # Read Nutrient file - processed by E. Weisgarver and
 # Bottle Report file obtained by concatenating bottle files without headers
-ndf = pd.read_csv(args.nutpath, sep="\t|,", engine="python")
-ndf.rename(
-    index=str,
-    columns={"Cast": "cast", "Niskin": "niskin", "Niskin": "niskin"},
-    inplace=True,
-)
+ndf = read_lab_csv(args.nutpath)
 
 print("Nutrient Header Summary:")
 print(ndf.info())
 
-reportdf = pd.read_csv(args.btlpath, delimiter="\s+",
-                       parse_dates=[["date", "time"]])
+reportdf = read_report_btl(
+    args.btlpath,
+    cache_format=None if args.report_cache == "none" else args.report_cache,
+)
 
 print("Btl Report Header Summary:")
 print(reportdf.info())
 
 # strip ctd from cast name and make integer
 try:
-    reportdf["CastNum"] = [
-        int(x.lower().split("ctd")[-1]) for y, x in reportdf.cast.iteritems()
-    ]
+    add_cast_keys(reportdf)
 except ValueError:
     sys.exit("Exiting: Report file doesn't have casts named as expected... ctdxxx")
 
-# make a cast_niskin column to index on
-print("Matching on Cast/Niskin pair.")
-ndf["Cast_Niskin"] = [
-    str(int(x["cast"])).zfill(3) + "_" + str(int(x["niskin"])).zfill(2)
-    for y, x in ndf.iterrows()
-]
-reportdf["Cast_Niskin"] = [
-    str(x["CastNum"]).zfill(3) + "_" + str(x["nb"]).zfill(2)
-    for y, x in reportdf.iterrows()
-]
-
 # three potential merged results
 # Matching Btl and Nut file
 # No Btl - yes nut (no ctd information for this nut value...)
 # Yes Btl - no nut
-temp = pd.merge(ndf, reportdf, on="Cast_Niskin", how="outer")
-temp.sort_values(["Cast_Niskin"], inplace=True)
+print("Matching on Cast/Niskin pair.")
+temp = merge_on_cast_niskin(ndf, reportdf)
 
 # Groupby Cast and write to file
 # print out to screen data not saved due to lack of cast info (CTD)
@@ -143,7 +146,9 @@ elif args.config_file_name.split(".")[-1] in ["yaml"]:
 else:
     sys.exit("Exiting: config files must have .pyini, .json, or .yaml endings")
 
-
+# variable definitions are compiled once and shared by every cast file
+ncbatch = EcF_write.NetCDF_Create_Profile_Batch(EPIC_VARS_dict)
+profiles = []
 for i, cast in enumerate(gb.groups):
     tdata = gb.get_group(cast).sort_values("CastNum")
 
@@ -169,23 +174,24 @@ for i, cast in enumerate(gb.groups):
     # convert timestamp to datetime to epic time
     data_dic["time"] = pd.to_datetime(
         data_dic["time"], format="%Y%m%d %H:%M:%S")
-    time_datetime = [x.to_pydatetime() for x in data_dic["time"]]
-    time1, time2 = np.array(Datetime2EPIC(time_datetime), dtype="f8")
-
-    ncinstance = EcF_write.NetCDF_Create_Profile(savefile=profile_name)
-    ncinstance.file_create()
-    ncinstance.sbeglobal_atts(
-        raw_data_file=args.nutpath.split("/")[-1], CruiseID=cruise, Cast=cast
-    )
-    ncinstance.dimension_init(depth_len=len(tdata))
-    ncinstance.variable_init(EPIC_VARS_dict)
-    ncinstance.add_coord_data(
-        depth=data_dic["dep"],
-        latitude=1e35,
-        longitude=1e35,
-        time1=time1[0],
-        time2=time2[0],
+    time1, time2 = np.array(Datetime642EPIC(data_dic["time"].values), dtype="f8")
+
+    profiles.append(
+        {
+            "savefile": profile_name,
+            "data_dic": data_dic,
+            "depth": data_dic["dep"],
+            "latitude": 1e35,
+            "longitude": 1e35,
+            "time1": time1[0],
+            "time2": time2[0],
+            "global_atts": {
+                "raw_data_file": args.nutpath.split("/")[-1],
+                "CruiseID": cruise,
+                "Cast": cast,
+            },
+            "history": history,
+        }
     )
-    ncinstance.add_data(EPIC_VARS_dict, data_dic=data_dic)
-    ncinstance.add_history(history)
-    ncinstance.close()
+
+ncbatch.write_profiles(profiles, max_workers=args.workers)
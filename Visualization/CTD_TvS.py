@@ -12,6 +12,10 @@ Options - individual profiles or entire cruises
 
  History:
  ========
+ 2026-10-17: full cruise mode reads each cast once into preallocated buffers (or from a
+    cruise cube, --cube) and can render a density binned diagram (--binned hexbin/hist2d)
+ 2026-10-17: vectorized sigma-t background grid, cached per (srange, trange, resolution)
+    in memory and optionally on disk (--grid_cache) so casts share the isopycnal field
  2018-07-13: Make python3 compliant
  2018-03-27: Modify so that an entire cruise can be plotted on one plot with
     options for colorcoding data.
@@ -30,6 +34,7 @@ from __future__ import absolute_import, division, print_function
 
 import argparse
 import datetime
+import functools
 import os
 
 import matplotlib as mpl
@@ -37,7 +42,9 @@ import matplotlib.pyplot as plt
 import numpy as np
 import seawater as sw
 from calc.EPIC2Datetime import EPIC2Datetime, get_UDUNITS
+from io_utils.EcoFOCI_cruise_cube import read_cruise_cube
 from io_utils.EcoFOCI_netCDF_read import EcoFOCI_netCDF
+from matplotlib.colors import LogNorm
 from matplotlib.ticker import AutoMinorLocator
 from netCDF4 import Dataset
 
@@ -60,39 +67,82 @@ __keywords__ = 'CTD', 'Plots', 'Cruise', 'QC'
 """--------------------------------Plot Routines---------------------------------------"""
 
 
-def plot_salvtemp(salt, temp, press, srange=[0, 1], trange=[0, 10], ptitle=""):
-    plt.style.use('ggplot')
-
-    # Figure out boudaries (mins and maxs)
-    smin = srange[0]
-    smax = srange[1]
-    tmin = trange[0]
-    tmax = trange[1]
+@functools.lru_cache(maxsize=32)
+def _sigmat_grid(srange, trange, resolution, cache_dir=None):
+    """sigma-t on a salinity/temperature grid, see sigmat_grid"""
+    smin, smax = srange
+    tmin, tmax = trange
+    sres, tres = resolution
 
     # Calculate how many gridcells we need in the x and y dimensions
-    xdim = int(round((smax-smin)/0.1+1, 0))
-    ydim = int(round((tmax-tmin)+1, 0))
+    xdim = int(round((smax-smin)/sres+1, 0))
+    ydim = int(round((tmax-tmin)/tres+1, 0))
 
-    # print 'ydim: ' + str(ydim) + ' xdim: ' + str(xdim) + ' \n'
     if (xdim > 10000) or (ydim > 10000):
-        print('To many dimensions for grid in {0} {1} file. Likely  missing data \n'.format(
-            cruise, cast))
-        return
+        return None
 
-    # Create empty grid of zeros
-    dens = np.zeros((ydim, xdim))
+    cache_file = None
+    if cache_dir:
+        cache_file = os.path.join(cache_dir, 'sigmat_{0:g}_{1:g}_{2:g}_{3:g}_{4:g}_{5:g}.npz'.format(
+            smin, smax, tmin, tmax, sres, tres))
+        if os.path.exists(cache_file):
+            with np.load(cache_file) as grid:
+                return _readonly(grid['si'], grid['ti'], grid['dens'])
 
     # Create temp and salt vectors of appropiate dimensions
-    ti = np.linspace(0, ydim-1, ydim)+tmin
-    si = np.linspace(0, xdim-1, xdim)*0.1+smin
+    ti = np.arange(ydim)*tres+tmin
+    si = np.arange(xdim)*sres+smin
+
+    # Densities of the whole grid at once, substract 1000 to convert to sigma-t
+    S, T = np.meshgrid(si, ti)
+    dens = sw.dens0(S, T) - 1000
+
+    if cache_file:
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            np.savez(cache_file, si=si, ti=ti, dens=dens)
+        except (IOError, OSError):
+            pass
+
+    return _readonly(si, ti, dens)
+
 
-    # Loop to fill in grid with densities
-    for j in range(0, int(ydim)):
-        for i in range(0, int(xdim)):
-            dens[j, i] = sw.dens0(si[i], ti[j])
+def _readonly(*arrays):
+    """cached grids are shared by every plot, protect them from edits"""
+    for a in arrays:
+        a.flags.writeable = False
+    return arrays
 
-    # Substract 1000 to convert to sigma-t
-    dens = dens - 1000
+
+def sigmat_grid(srange, trange, resolution=(0.1, 1.0), cache_dir=None):
+    """salinity vector, temperature vector and sigma-t grid (ydim, xdim)
+
+    The grid bounds are snapped outward to whole PSU / degrees so casts with
+    similar ranges share one cached grid, None if the range is too large
+    (likely missing data).
+    """
+    srange = (float(np.floor(srange[0])), float(np.ceil(srange[1])))
+    trange = (float(np.floor(trange[0])), float(np.ceil(trange[1])))
+    return _sigmat_grid(srange, trange, tuple(float(x) for x in resolution), cache_dir)
+
+
+def plot_salvtemp(salt, temp, press, srange=[0, 1], trange=[0, 10], ptitle="",
+                  cache_dir=None):
+    plt.style.use('ggplot')
+
+    # Figure out boudaries (mins and maxs)
+    smin = srange[0]
+    smax = srange[1]
+    tmin = trange[0]
+    tmax = trange[1]
+
+    grid = sigmat_grid(srange, trange, cache_dir=cache_dir)
+    if grid is None:
+        print('To many dimensions for grid in {0} file. Likely  missing data \n'.format(
+            ptitle))
+        return
+    si, ti, dens = grid
 
     # Plot data ***********************************************
     fig = plt.figure()
@@ -114,6 +164,120 @@ def plot_salvtemp(salt, temp, press, srange=[0, 1], trange=[0, 10], ptitle=""):
     return fig
 
 
+def plot_salvtemp_binned(salt, temp, srange=[0, 1], trange=[0, 10], ptitle="",
+                         kind='hexbin', gridsize=200, cache_dir=None):
+    """T-S diagram of point counts (log scaled) for very many samples
+
+    kind is 'hexbin' or 'hist2d', gridsize the number of bins along salinity
+    """
+    plt.style.use('ggplot')
+
+    smin, smax = srange
+    tmin, tmax = trange
+
+    grid = sigmat_grid(srange, trange, cache_dir=cache_dir)
+    if grid is None:
+        print('To many dimensions for grid in {0} file. Likely  missing data \n'.format(
+            ptitle))
+        return
+    si, ti, dens = grid
+
+    fig = plt.figure()
+    ax1 = fig.add_subplot(111)
+
+    if kind == 'hexbin':
+        ts = ax1.hexbin(salt, temp, gridsize=gridsize, extent=(smin, smax, tmin, tmax),
+                        bins='log', mincnt=1, cmap='viridis')
+    else:
+        counts, sedges, tedges = np.histogram2d(
+            salt, temp, bins=gridsize, range=[[smin, smax], [tmin, tmax]])
+        ts = ax1.pcolormesh(sedges, tedges, np.ma.masked_equal(counts.T, 0),
+                            norm=LogNorm(), cmap='viridis')
+    plt.colorbar(ts, label='count')
+
+    CS = ax1.contour(si, ti, dens, linestyles='dashed', colors='k')
+    plt.clabel(CS, fontsize=12, inline=1, fmt='%1.1f')
+    plt.ylim(tmin, tmax)
+    plt.xlim(smin, smax)
+
+    ax1.set_xlabel('Salinity (PSU)')
+    ax1.set_ylabel('Temperature (C)')
+
+    t = fig.suptitle(ptitle, fontsize=12, fontweight='bold')
+    t.set_y(1.08)
+    return fig
+
+
+def save_cruise_plot(fig, cruise):
+    if not os.path.exists('images/' + cruise + '/TS_plot/'):
+        os.makedirs('images/' + cruise + '/TS_plot/')
+
+    DefaultSize = fig.get_size_inches()
+    fig.set_size_inches((DefaultSize[0], DefaultSize[1]))
+    plt.savefig('images/' + cruise + '/TS_plot/' +
+                cruise + '_TSplot.png', bbox_inches='tight', dpi=(300))
+    plt.close()
+
+
+"""------------------------------------- Cruise Data -----------------------------------------"""
+
+
+def gather_cruise(ncfiles, params=('S_41', 'T_28')):
+    """read salinity, temperature and depth of every cast once into flat buffers
+
+    Buffers are preallocated and doubled when full (no per cast list copies),
+    missing data (>=1e30) is dropped.  Returns the buffers and the metadata of
+    the last cast read (global attributes, lat, lon, time).
+    """
+    size, filled = 4096, 0
+    buffers = {name: np.empty(size) for name in ('salinity', 'temperature', 'depth')}
+    last = None
+
+    for ncfile in sorted(ncfiles):
+        print("Working on file {} ".format(ncfile))
+
+        nc = EcoFOCI_netCDF(ncfile, mode='r')
+        ncdata = nc.ncreadfile_lazy(
+            params=['time', 'time2', 'dep', 'lat', 'lon'] + list(params),
+            index=(0, slice(None), 0, 0))
+        if not all(p in ncdata for p in params):
+            nc.close()
+            continue
+        salt = np.ma.filled(ncdata[params[0]], np.nan).astype('f8')
+        temp = np.ma.filled(ncdata[params[1]], np.nan).astype('f8')
+        depth = np.ma.filled(ncdata['dep'], np.nan).astype('f8')
+        last = {'g_atts': nc.get_global_atts(),
+                'lat': ncdata['lat'][0],
+                'lon': ncdata['lon'][0],
+                'time': EPIC2Datetime(ncdata['time'], ncdata['time2'])[0]}
+        nc.close()
+
+        good = np.isfinite(salt) & np.isfinite(temp) & (salt < 1e30) & (temp < 1e30)
+        n = int(good.sum())
+        if filled + n > size:
+            size = max(2 * size, filled + n)
+            for name in buffers:
+                buffers[name] = np.resize(buffers[name], size)
+        buffers['salinity'][filled:filled + n] = salt[good]
+        buffers['temperature'][filled:filled + n] = temp[good]
+        buffers['depth'][filled:filled + n] = depth[good]
+        filled += n
+
+    data = {name: buffer[:filled] for name, buffer in buffers.items()}
+    return data, last
+
+
+def gather_cube(cubefile, params=('S_41', 'T_28')):
+    """salinity, temperature and depth of every grid point of a cruise cube"""
+    cube = read_cruise_cube(cubefile, variables=list(params))
+    salt = cube['data'][params[0]].ravel()
+    temp = cube['data'][params[1]].ravel()
+    depth = np.broadcast_to(cube['depth'], cube['data'][params[0]].shape).ravel()
+
+    good = np.isfinite(salt) & np.isfinite(temp)
+    return {'salinity': salt[good], 'temperature': temp[good], 'depth': depth[good]}
+
+
 """------------------------------------- Main -----------------------------------------"""
 
 parser = argparse.ArgumentParser(description='CTD T/S Property/Property plot')
@@ -133,6 +297,20 @@ parser.add_argument('-ts', '--temp_scale',
                     nargs='+',
                     type=float,
                     help='fixed temperature scale (min max)')
+parser.add_argument('--cube',
+                    action="store_true",
+                    help='DataPath is a cruise cube (EcoFOCI_cruise_cube.py), plots all casts')
+parser.add_argument('--binned',
+                    type=str,
+                    choices=['hexbin', 'hist2d'],
+                    help='full cruise: plot point density instead of every point')
+parser.add_argument('--gridsize',
+                    type=int,
+                    default=200,
+                    help='number of salinity bins for --binned')
+parser.add_argument('--grid_cache',
+                    type=str,
+                    help='directory to keep the sigma-t background grids in between runs')
 
 args = parser.parse_args()
 
@@ -145,64 +323,51 @@ else:
     nc_path = [nc_path, ]
 
 
-# Break the routines into two identical structures in which one ingests all the data
-#  and the other plots cast by cast.
-#  Its poor coding so fix later
-if args.full_cruise:
-
-    for ncfile in sorted(nc_path):
-
-        print("Working on file {} ".format(ncfile))
-
-        nc = EcoFOCI_netCDF(ncfile)
-        ncdata = nc.ncreadfile_dic()
-        g_atts = nc.get_global_atts()
-        nc.close()
+if args.full_cruise or args.cube:
 
-        try:
-            ncdata['S_41']
-        except:
-            continue
-
-        if not os.path.exists('images/' + g_atts['CRUISE']):
-            os.makedirs('images/' + g_atts['CRUISE'])
-        if not os.path.exists('images/' + g_atts['CRUISE'] + '/TS_plot/'):
-            os.makedirs('images/' + g_atts['CRUISE'] + '/TS_plot/')
+    if args.cube:
+        data = gather_cube(args.DataPath)
+        cruise = os.path.basename(args.DataPath).split('.')[0].replace('_cube', '')
+        ptitle = ("Plotted on: {0} from {1} \n\n"
+                  "Cruise: {2} Cast: {3} \n").format(datetime.datetime.now().strftime('%Y/%m/%d %H:%M'),
+                                                     args.DataPath.split('/')[-1], cruise, 'All')
+    else:
+        data, last = gather_cruise(nc_path)
+        if last is None:
+            raise SystemExit('No casts with S_41 and T_28 in {}'.format(args.DataPath))
+        g_atts = last['g_atts']
+        cruise = g_atts['CRUISE']
+        ptitle = ("Plotted on: {0} from {1} \n\n"
+                  "Cruise: {2} Cast: {3}  Stn: {4} \n"
+                  "Lat: {5:3.3f}  Lon: {6:3.3f} at {7}\n").format(datetime.datetime.now().strftime('%Y/%m/%d %H:%M'),
+                                                                  'All', g_atts['CRUISE'], 'All', g_atts['STATION_NAME'],
+                                                                  last['lat'], last['lon'], datetime.datetime.strftime(last['time'], "%Y-%m-%d %H:%M GMT"))
 
-        cast_time = EPIC2Datetime(ncdata['time'], ncdata['time2'])[0]
-        all_temperature = all_salinity = all_depth = all_times = []
-        all_times = all_times + [cast_time]
-        all_temperature = all_temperature + [ncdata['T_28'][0, :, 0, 0]]
-        all_salinity = all_salinity + [ncdata['S_41'][0, :, 0, 0]]
-        all_depth = all_depth + [ncdata['dep']]
-
-    ptitle = ("Plotted on: {0} from {1} \n\n"
-              "Cruise: {2} Cast: {3}  Stn: {4} \n"
-              "Lat: {5:3.3f}  Lon: {6:3.3f} at {7}\n").format(datetime.datetime.now().strftime('%Y/%m/%d %H:%M'),
-                                                              'All', g_atts['CRUISE'], 'All', g_atts['STATION_NAME'],
-                                                              ncdata['lat'][0], ncdata['lon'][0], datetime.datetime.strftime(cast_time, "%Y-%m-%d %H:%M GMT"))
-
-    all_salinity = np.array(all_salinity)
-    all_temperature = np.array(all_temperature)
-    all_depth = np.array(all_depth)
+    all_salinity = data['salinity']
+    all_temperature = data['temperature']
+    all_depth = data['depth']
+    print("{} T-S points".format(all_salinity.size))
 
     if args.sal_scale and args.temp_scale:
-        fig = plot_salvtemp(all_salinity, all_temperature, all_depth,
-                            args.sal_scale, args.temp_scale, ptitle)
+        srange, trange = args.sal_scale, args.temp_scale
     else:
         # Figure out boudaries (mins and maxs)
         smin = all_salinity.min() - (0.01 * all_salinity.min())
         smax = all_salinity.max() + (0.01 * all_salinity.max())
         tmin = all_temperature.min() - (0.1 * all_temperature.max())
         tmax = all_temperature.max() + (0.1 * all_temperature.max())
+        srange, trange = [smin, smax], [tmin, tmax]
+
+    if args.binned:
+        fig = plot_salvtemp_binned(all_salinity, all_temperature, srange, trange, ptitle,
+                                   kind=args.binned, gridsize=args.gridsize,
+                                   cache_dir=args.grid_cache)
+    else:
         fig = plot_salvtemp(all_salinity, all_temperature, all_depth,
-                            [smin, smax], [tmin, tmax], ptitle)
+                            srange, trange, ptitle,
+                            cache_dir=args.grid_cache)
 
-    DefaultSize = fig.get_size_inches()
-    fig.set_size_inches((DefaultSize[0], DefaultSize[1]))
-    plt.savefig('images/' + g_atts['CRUISE'] + '/TS_plot/' +
-                g_atts['CRUISE'] + '_TSplot.png', bbox_inches='tight', dpi=(300))
-    plt.close()
+    save_cruise_plot(fig, cruise)
 
 else:
     # Individual plots per file/cast
@@ -210,8 +375,9 @@ else:
 
         print("Working on file {} ".format(ncfile))
 
-        nc = EcoFOCI_netCDF(ncfile)
-        ncdata = nc.ncreadfile_dic()
+        nc = EcoFOCI_netCDF(ncfile, mode='r')
+        ncdata = nc.ncreadfile_lazy(
+            params=['time', 'time2', 'dep', 'lat', 'lon', 'S_41', 'T_28']).load()
         g_atts = nc.get_global_atts()
         nc.close()
 
@@ -236,7 +402,8 @@ else:
 
         if args.sal_scale and args.temp_scale:
             fig = plot_salvtemp(ncdata['S_41'][0, :, 0, 0], ncdata['T_28'][0, :, 0, 0], ncdata['dep'],
-                                args.sal_scale, args.temp_scale, ptitle)
+                                args.sal_scale, args.temp_scale, ptitle,
+                                cache_dir=args.grid_cache)
         else:
             # Figure out boudaries (mins and maxs)
             smin = ncdata['S_41'][0, :, 0, 0].min(
@@ -248,7 +415,8 @@ else:
             tmax = ncdata['T_28'][0, :, 0, 0].max(
             ) + (0.1 * ncdata['T_28'][0, :, 0, 0].max())
             fig = plot_salvtemp(ncdata['S_41'][0, :, 0, 0], ncdata['T_28'][0, :, 0, 0], ncdata['dep'],
-                                [smin, smax], [tmin, tmax], ptitle)
+                                [smin, smax], [tmin, tmax], ptitle,
+                                cache_dir=args.grid_cache)
 
         DefaultSize = fig.get_size_inches()
         fig.set_size_inches((DefaultSize[0], DefaultSize[1]))
@@ -125,10 +125,10 @@ for castnum, cast in enumerate((ctd_files_path)):
 
 	#open/read netcdf files
 	print("Reading {cast}".format(cast=cast))
-	df = EcoFOCI_netCDF(cast)
+	df = EcoFOCI_netCDF(cast, mode='r')
 	global_atts = df.get_global_atts()
 	vars_dic = df.get_vars()
-	ncdata = df.ncreadfile_dic()
+	ncdata = df.ncreadfile_lazy(params=['time','time2','lat','lon','dep',pointer_file['EPIC_Key']]).load()
 	df.close()
 	nctime = get_UDUNITS(EPIC2Datetime(ncdata['time'],ncdata['time2']),'days since 0001-01-01') + 1.
 
@@ -8,6 +8,7 @@ Generates png map of isosurface for all casts in a designated cruise
  History
  =======
 
+ 2026-10-17: read the etopo5 window around the casts instead of the shifted globe
  2018-07-13: Make python3 compliant
 
  Compatibility:
@@ -31,7 +32,7 @@ from netCDF4 import Dataset
 mpl.use('Agg')
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap, shiftgrid
+from mpl_toolkits.basemap import Basemap
 
 """--------------------------------netcdf Routines---------------------------------------"""
 
@@ -93,21 +94,43 @@ def date2pydate(file_time, file_time2=None, file_flag='EPIC'):
     
 """------------------------------------- MAPS -----------------------------------------"""
 
-def etopo5_data():
-    """ read in etopo5 topography/bathymetry. """
-    file = '../data/etopo5.nc'
+def etopo5_window(lat_min, lat_max, lon_min, lon_max, file='../data/etopo5.nc'):
+    """ read only the etopo5 hyperslab covering the bounds.
+
+    Longitudes are degrees east (eg. -180 to -130 for the Gulf of Alaska) and are
+    returned continuous from lon_min, matching shiftgrid(0., ...) output for
+    windows west of Greenwich.  Windows that cross the 0/360 seam of the file
+    are read as two slabs instead of shifting the global grid.
+    """
     etopodata = Dataset(file)
-    
-    topoin = etopodata.variables['bath'][:]
     lons = etopodata.variables['X'][:]
     lats = etopodata.variables['Y'][:]
+
+    lat_ind = sorted([find_nearest(lats, lat_min), find_nearest(lats, lat_max)])
+    lat_slice = slice(lat_ind[0], lat_ind[1] + 1)
+
+    # index window on the 0-360 file grid, wrapping past the last column
+    nlon = lons.size
+    dlon = float(lons[1] - lons[0])
+    lon_start = int(np.floor(((lon_min - lons[0]) % 360.) / dlon)) % nlon
+    lon_count = min(int(np.ceil((lon_max - lon_min) / dlon)) + 1, nlon)
+    lon_end = lon_start + lon_count
+
+    if lon_end <= nlon:
+        topoin = etopodata.variables['bath'][lat_slice, lon_start:lon_end]
+        elons = lons[lon_start:lon_end]
+    else:
+        topoin = np.ma.concatenate(
+            [etopodata.variables['bath'][lat_slice, lon_start:],
+             etopodata.variables['bath'][lat_slice, :lon_end - nlon]], axis=1)
+        elons = np.concatenate([lons[lon_start:], lons[:lon_end - nlon]])
+    elats = lats[lat_slice]
     etopodata.close()
-    
-    topoin,lons = shiftgrid(0.,topoin,lons,start=False) # -360 -> 0
-    
-    #lons, lats = np.meshgrid(lons, lats)
-    
-    return(topoin, lats, lons)
+
+    lon_base = lon_min - dlon
+    elons = ((elons - lon_base) % 360.) + lon_base
+
+    return(topoin, elats, elons)
 
 
 def find_nearest(a, a0):
@@ -159,12 +182,9 @@ pydate = np.array(pydate)
 
                                 
 ## plot boundaries for topography
-(topoin, elats, elons) = etopo5_data()
-
-#build regional subset of data
-topoin = topoin[find_nearest(elats,lat.min()-5):find_nearest(elats,lat.max()+5),find_nearest(elons,-1*(lon.max()+5)):find_nearest(elons,-1*(lon.min()-5))]
-elons = elons[find_nearest(elons,-1*(lon.max()+5)):find_nearest(elons,-1*(lon.min()-5))]
-elats = elats[find_nearest(elats,lat.min()-5):find_nearest(elats,lat.max()+5)]
+#read only the regional subset of data
+(topoin, elats, elons) = etopo5_window(lat.min()-5, lat.max()+5,
+                                       -1*(lon.max()+5), -1*(lon.min()-5))
 
 print("Generating image")
 
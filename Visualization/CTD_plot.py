@@ -14,6 +14,10 @@ Input - CruiseID
 History
 =======
 
+2026-10-17: rendering driver - each cast read once, (cast x plot type) jobs rendered
+    with the Agg backend across a process pool (--workers), style built once per worker,
+    per job timing log (--timing_log), figures updated from one template per plot type
+    unless --fresh_figures
 2018-07-13: Make python3 compliant
 
 """
@@ -22,9 +26,13 @@ from __future__ import absolute_import, division, print_function
 
 import argparse
 import datetime
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib as mpl
+mpl.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 
@@ -49,473 +57,250 @@ __status__ = "Development"
 __keywords__ = 'CTD', 'Plots', 'Cruise', 'QC'
 
 
-"""------------------------------------- Main -----------------------------------------"""
-
-parser = argparse.ArgumentParser(description='CTD plots')
-parser.add_argument('DataPath', metavar='DataPath', type=str,
-                    help='full path to directory of processed nc files')
-parser.add_argument('-TSvD', '--TSvD', action="store_true",
-                    help='Temperature, Salinity, SigmaT vs depth')
-parser.add_argument('-OxyFluor', '--OxyFluor', action="store_true",
-                    help='Temperature, Oxygen, Fluorometer vs depth')
-parser.add_argument('-ParTurbFluor', '--ParTurbFluor', action="store_true",
-                    help='PAR, Turbidity, Fluorometer vs depth')
-parser.add_argument('-ParFluor', '--ParFluor', action="store_true",
-                    help='PAR, Fluorometer vs depth')
-parser.add_argument('-TurbFluor', '--TurbFluor', action="store_true",
-                    help='Turbidity, Fluorometer vs depth (common for only Eco')
-parser.add_argument('-ParTransFluor', '--ParTransFluor', action="store_true",
-                    help='Transmissometer, Turbidity, Fluorometer vs depth (common package for EMA)')
-parser.add_argument('-TransTurbFluor', '--TransTurbFluor', action="store_true",
-                    help='Transmissometer, Turbidity, Fluorometer vs depth (common package for EMA)')
-parser.add_argument('-TransFluor', '--TransFluor', action="store_true",
-                    help='Transmissometer, Fluorometer vs depth (common package for EMA)')
-parser.add_argument('-has_secondary', '--has_secondary', action="store_true",
-                    help='Flag to indicate plotting secondary values too')
-
-args = parser.parse_args()
-
-nc_path = args.DataPath
-
-if not '.nc' in nc_path:
-    nc_path = [nc_path + fi for fi in os.listdir(
-        nc_path) if fi.endswith('.nc') and not fi.endswith('_cf_ctd.nc')]
-else:
-    nc_path = [nc_path, ]
-
-for ncfile in sorted(nc_path):
-
-    print("Working on file {}".format(ncfile))
-    nc = EcoFOCI_netCDF(ncfile)
-    ncdata = nc.ncreadfile_dic()
+"""------------------------------------- Plot Types -----------------------------------------"""
+
+# fluorometer of the cast, the last one of these found in the file
+fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
+FLUOR = 'fluor'
+
+# plot type: CTDProfilePlot method, epic keys (primary / with secondary), axis labels,
+#   image subfolder and file suffix.  '' keys are not plotted.
+plot_types = {
+    'TSvD': {'method': 'plot3var',
+             'epic_key': ['T_28', '', 'S_41', '', 'ST_70', ''],
+             'epic_key_secondary': ['T_28', 'T2_35', 'S_41', 'S_42', 'ST_70', ''],
+             'xlabel': ['Temperature (C)', 'Salinity (PSU)', 'SigmaT (kg/m^3)'],
+             'folder': 'TSSigma', 'suffix': '_plot_2TSSigma.png'},
+    'OxyFluor': {'method': 'plot3var',
+                 'epic_key': ['T_28', '', 'OST_62', '', FLUOR, ''],
+                 'epic_key_secondary': ['T_28', 'T2_35', 'OST_62', 'CTDOST_4220', FLUOR, ''],
+                 'xlabel': ['Temperature (C)', 'Oxygen % Sat.', 'Chlor-A mg/m^3'],
+                 'folder': 'TO2F', 'suffix': '_plot_TO2F.png'},
+    'ParFluor': {'method': 'plot2var',
+                 'epic_key': ['PAR_905', '', FLUOR, ''],
+                 'xlabel': ['PAR', 'Chlor-A mg/m^3'],
+                 'folder': 'PARFluor', 'suffix': '_plot_PARFluor.png'},
+    'TurbFluor': {'method': 'plot2var',
+                  'epic_key': ['Trb_980', '', FLUOR, ''],
+                  'xlabel': ['Turbidity', 'Chlor-A mg/m^3'],
+                  'folder': 'TurbFluor', 'suffix': '_plot_TurbFluor.png'},
+    'ParTurbFluor': {'method': 'plot3var',
+                     'epic_key': ['PAR_905', '', 'Trb_980', '', FLUOR, ''],
+                     'xlabel': ['PAR', 'Turbidity', 'Chlor-A mg/m^3'],
+                     'folder': 'PARTurbFluor', 'suffix': '_plot_PARTurbFluor.png'},
+    'ParTransFluor': {'method': 'plot3var',
+                      'epic_key': ['PAR_905', '', 'Tr_904', '', FLUOR, ''],
+                      'xlabel': ['PAR', 'Trans. %', 'Chlor-A mg/m^3'],
+                      'folder': 'ParTransFluor', 'suffix': '_plot_PARTransFluor.png'},
+    'TransTurbFluor': {'method': 'plot3var',
+                       'epic_key': ['Tr_904', '', 'Trb_980', '', FLUOR, ''],
+                       'xlabel': ['Trans. %', 'Turbidity', 'Chlor-A mg/m^3'],
+                       'folder': 'TransTurbFluor', 'suffix': '_plot_TransTurbFluor.png'},
+    'TransFluor': {'method': 'plot2var',
+                   'epic_key': ['Tr_904', '', FLUOR, ''],
+                   'xlabel': ['Trans. %', 'Chlor-A mg/m^3'],
+                   'folder': 'TransFluor', 'suffix': '_plot_TransFluor.png'},
+}
+
+coord_keys = ['lat', 'latitude', 'lon', 'longitude',
+              'depth', 'dep', 'pressure', 'time', 'time2']
+
+
+def read_cast(ncfile):
+    """depth profiles (missing data as nan) and title metadata of a cast file"""
+    nc = EcoFOCI_netCDF(ncfile, mode='r')
+    ncdata = nc.ncreadfile_lazy(index=(0, slice(None), 0, 0)).load()
     g_atts = nc.get_global_atts()
     nc.close()
-    cast_time = EPIC2Datetime(ncdata['time'], ncdata['time2'])[0]
 
-    # dep v depth
     for dkey in ncdata.keys():
-        if dkey in ['dep']:
-            if np.ndim(ncdata['dep']) == 1:
-                ydata = ncdata['dep'][:]
-            else:
-                ydata = ncdata['dep'][0, :, 0, 0]
-        elif dkey in ['depth']:
-            if np.ndim(ncdata['depth']) == 1:
-                ydata = ncdata['depth'][:]
-            else:
-                ydata = ncdata['depth'][0, :, 0, 0]
-        elif dkey in ['pressure']:
-            if np.ndim(ncdata['pressure']) == 1:
-                ydata = ncdata['pressure'][:]
-            else:
-                ydata = ncdata['pressure'][0, :, 0, 0]
+        if not dkey in coord_keys:
+            ncdata[dkey] = np.ma.filled(ncdata[dkey].astype('f8'), np.nan)
+            ncdata[dkey][ncdata[dkey] >= 1e30] = np.nan
 
-    for dkey in ncdata.keys():
-        if not dkey in ['lat', 'latitude', 'lon', 'longitude', 'depth', 'dep', 'pressure', 'time', 'time2']:
-            ncdata[dkey][0, ncdata[dkey][0, :, 0, 0] >= 1e30, 0, 0] = np.nan
+    # dep v depth
+    for dkey in ['dep', 'depth', 'pressure']:
+        if dkey in ncdata.keys():
+            ydata = np.ravel(ncdata[dkey])
+            break
 
     # multiple lat/lon keys
     try:
         lat_data = ncdata['lat'][0]
-    except:
+    except KeyError:
         lat_data = ncdata['latitude'][0]
 
     try:
         lon_data = ncdata['lon'][0]
-    except:
+    except KeyError:
         lon_data = ncdata['longitude'][0]
 
-    if not os.path.exists('images/' + g_atts['CRUISE']):
-        os.makedirs('images/' + g_atts['CRUISE'])
-    if not os.path.exists('images/' + g_atts['CRUISE'] + '/TSSigma/'):
-        os.makedirs('images/' + g_atts['CRUISE'] + '/TSSigma/')
-    if not os.path.exists('images/' + g_atts['CRUISE'] + '/TO2F/'):
-        os.makedirs('images/' + g_atts['CRUISE'] + '/TO2F/')
-    if not os.path.exists('images/' + g_atts['CRUISE'] + '/PARTurbFluor/'):
-        os.makedirs('images/' + g_atts['CRUISE'] + '/PARTurbFluor/')
-    if not os.path.exists('images/' + g_atts['CRUISE'] + '/TurbFluor/'):
-        os.makedirs('images/' + g_atts['CRUISE'] + '/TurbFluor/')
-    if not os.path.exists('images/' + g_atts['CRUISE'] + '/ParTransFluor/'):
-        os.makedirs('images/' + g_atts['CRUISE'] + '/ParTransFluor/')
-    if not os.path.exists('images/' + g_atts['CRUISE'] + '/TransTurbFluor/'):
-        os.makedirs('images/' + g_atts['CRUISE'] + '/TransTurbFluor/')
-    if not os.path.exists('images/' + g_atts['CRUISE'] + '/TransFluor/'):
-        os.makedirs('images/' + g_atts['CRUISE'] + '/TransFluor/')
-    if not os.path.exists('images/' + g_atts['CRUISE'] + '/ParFluor/'):
-        os.makedirs('images/' + g_atts['CRUISE'] + '/ParFluor/')
-
-    try:
-        g_atts['STATION_NAME'] = g_atts['STATION_NAME']
-    except:
-        g_atts['STATION_NAME'] = 'NA'
-
-    if args.TSvD and args.has_secondary:
-        CTDplot = CTDProfilePlot()
-
-        (plt, fig) = CTDplot.plot3var(epic_key=['T_28', 'T2_35', 'S_41', 'S_42', 'ST_70', 'ST_2070'],
-                                      xdata=[ncdata['T_28'][0, :, 0, 0], ncdata['T2_35'][0, :, 0, 0],
-                                             ncdata['S_41'][0, :, 0,
-                                                            0], ncdata['S_42'][0, :, 0, 0],
-                                             ncdata['ST_70'][0, :, 0, 0],
-                                             np.array([])],
-                                      ydata=ydata,
-                                      xlabel=[
-                                          'Temperature (C)', 'Salinity (PSU)', 'SigmaT (kg/m^3)'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
-
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
-
-        plt.savefig('images/' + g_atts['CRUISE'] + '/TSSigma/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_2TSSigma.png', bbox_inches='tight', dpi=(300))
-        plt.close()
-    elif args.TSvD and not args.has_secondary:
-        CTDplot = CTDProfilePlot()
-
-        (plt, fig) = CTDplot.plot3var(epic_key=['T_28', '', 'S_41', '', 'ST_70', ''],
-                                      xdata=[ncdata['T_28'][0, :, 0, 0], np.array([]),
-                                             ncdata['S_41'][0, :, 0,
-                                                            0], np.array([]),
-                                             ncdata['ST_70'][0, :, 0, 0],
-                                             np.array([])],
-                                      ydata=ydata,
-                                      xlabel=[
-                                          'Temperature (C)', 'Salinity (PSU)', 'SigmaT (kg/m^3)'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
-
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
-
-        plt.savefig('images/' + g_atts['CRUISE'] + '/TSSigma/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_2TSSigma.png', bbox_inches='tight', dpi=(300))
-        plt.close()
-
-    if args.OxyFluor and args.has_secondary:
-        CTDplot = CTDProfilePlot()
-
-        fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
-        for fkey in fluor_key_list:
-            if fkey in ncdata.keys():
-                fluor_key = fkey
-
-        (plt, fig) = CTDplot.plot3var(epic_key=['T_28', 'T2_35', 'OST_62', 'CTDOST_4220', fluor_key, ''],
-                                      xdata=[ncdata['T_28'][0, :, 0, 0], ncdata['T2_35'][0, :, 0, 0],
-                                             ncdata['OST_62'][0, :, 0,
-                                                              0], ncdata['CTDOST_4220'][0, :, 0, 0],
-                                             ncdata[fluor_key][0, :, 0, 0],
-                                             np.array([])],
-                                      ydata=ydata,
-                                      xlabel=[
-                                          'Temperature (C)', 'Oxygen % Sat.', 'Chlor-A mg/m^3'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
-
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
-
-        plt.savefig('images/' + g_atts['CRUISE'] + '/TO2F/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_TO2F.png', bbox_inches='tight', dpi=(300))
-        plt.close()
-
-    elif args.OxyFluor and not args.has_secondary:
-        CTDplot = CTDProfilePlot()
-
-        fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
-        for fkey in fluor_key_list:
-            if fkey in ncdata.keys():
-                fluor_key = fkey
-
-        (plt, fig) = CTDplot.plot3var(epic_key=['T_28', '', 'OST_62', '', fluor_key, ''],
-                                      xdata=[ncdata['T_28'][0, :, 0, 0], np.array([]),
-                                             ncdata['OST_62'][0, :,
-                                                              0, 0], np.array([]),
-                                             ncdata[fluor_key][0, :, 0, 0],
-                                             np.array([])],
-                                      ydata=ydata,
-                                      xlabel=[
-                                          'Temperature (C)', 'Oxygen % Sat.', 'Chlor-A mg/m^3'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
+    fluor_keys = [fkey for fkey in fluor_key_list if fkey in ncdata.keys()]
 
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
+    return {'file': ncfile,
+            'data': ncdata,
+            'ydata': ydata,
+            'fluor_key': fluor_keys[-1] if fluor_keys else None,
+            'cruise': g_atts['CRUISE'],
+            'cast': g_atts['CAST'],
+            'station': g_atts.get('STATION_NAME', 'NA'),
+            'cast_time': EPIC2Datetime(ncdata['time'], ncdata['time2'])[0],
+            'lat': lat_data,
+            'lon': lon_data}
 
-        plt.savefig('images/' + g_atts['CRUISE'] + '/TO2F/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_TO2F.png', bbox_inches='tight', dpi=(300))
-        plt.close()
 
-    if args.ParFluor:
-        CTDplot = CTDProfilePlot()
+"""------------------------------------- Rendering -----------------------------------------"""
 
-        fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
-        for fkey in fluor_key_list:
-            if fkey in ncdata.keys():
-                fluor_key = fkey
+# one plot object (style sheet and rcParams applied) per process, in templated mode it
+#   also keeps one figure per plot type that every cast only updates
+CTDplot = None
 
-        (plt, fig) = CTDplot.plot2var(epic_key=['PAR_905', '', fluor_key, ''],
-                                      xdata=[ncdata['PAR_905'][0, :, 0, 0], np.array([]),
-                                             ncdata[fluor_key][0, :, 0, 0], np.array([])],
-                                      ydata=ydata,
-                                      xlabel=['PAR', 'Chlor-A mg/m^3'],
-                                      secondary=args.has_secondary)
 
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
+def init_renderer(templated=True):
+    global CTDplot
+    CTDplot = CTDProfilePlot(templated=templated)
 
-        #plt = CTDplot.change_range(plt=plt,ylim=[0,100])
 
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
+def render(job):
+    """draw and save one (cast, plot type) figure
 
-        plt.savefig('images/' + g_atts['CRUISE'] + '/PARFluor/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_PARFluor.png', bbox_inches='tight', dpi=(300))
-        plt.close()
-
-    if args.TurbFluor:
-        CTDplot = CTDProfilePlot()
-
-        fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
-        for fkey in fluor_key_list:
-            if fkey in ncdata.keys():
-                fluor_key = fkey
-
-        (plt, fig) = CTDplot.plot2var(epic_key=['Trb_980', '', fluor_key, ''],
-                                      xdata=[ncdata['Trb_980'][0, :, 0, 0], np.array([]),
-                                             ncdata[fluor_key][0, :, 0, 0], np.array([])],
-                                      ydata=ydata,
-                                      xlabel=['Turbidity', 'Chlor-A mg/m^3'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
+    Returns (output file, plot type, seconds, error message or None)
+    """
+    cast, plot_type, secondary, dpi = job
+    start = time.time()
+    ptype = plot_types[plot_type]
+    outfile = ('images/' + cast['cruise'] + '/' + ptype['folder'] + '/' +
+               cast['file'].split('/')[-1].split('.')[0] + ptype['suffix'])
 
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
+    epic_key = ptype['epic_key']
+    if secondary and 'epic_key_secondary' in ptype:
+        epic_key = ptype['epic_key_secondary']
+    epic_key = [cast['fluor_key'] if key == FLUOR else key for key in epic_key]
 
-        plt.savefig('images/' + g_atts['CRUISE'] + '/TurbFluor/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_TurbFluor.png', bbox_inches='tight', dpi=(300))
-        plt.close()
-
-    if args.ParTurbFluor:
-        CTDplot = CTDProfilePlot()
-
-        fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
-        for fkey in fluor_key_list:
-            if fkey in ncdata.keys():
-                fluor_key = fkey
-
-        (plt, fig) = CTDplot.plot3var(epic_key=['PAR_905', '', 'Trb_980', '', fluor_key, ''],
-                                      xdata=[ncdata['PAR_905'][0, :, 0, 0], np.array([]),
-                                             ncdata['Trb_980'][0, :,
-                                                               0, 0], np.array([]),
-                                             ncdata[fluor_key][0, :, 0, 0], np.array([])],
-                                      ydata=ydata,
-                                      xlabel=['PAR', 'Turbidity',
-                                              'Chlor-A mg/m^3'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
+    try:
+        if None in epic_key:
+            raise KeyError('no fluorometer')
+        xdata = [cast['data'][key] if key else np.array([]) for key in epic_key]
+
+        fig = getattr(CTDplot, ptype['method'])(epic_key=epic_key,
+                                                xdata=xdata,
+                                                ydata=cast['ydata'],
+                                                xlabel=ptype['xlabel'],
+                                                secondary=secondary)[1]
+
+        ptitle = CTDplot.add_title(cruiseid=cast['cruise'],
+                                   fileid=cast['file'].split('/')[-1],
+                                   castid=cast['cast'],
+                                   stationid=cast['station'],
+                                   castdate=cast['cast_time'],
+                                   lat=cast['lat'],
+                                   lon=cast['lon'])
 
         t = fig.suptitle(ptitle)
         t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
+        DefaultSize = mpl.rcParams['figure.figsize']
         fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
 
-        plt.savefig('images/' + g_atts['CRUISE'] + '/PARTurbFluor/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_PARTurbFluor.png', bbox_inches='tight', dpi=(300))
-        plt.close()
-
-    if args.ParTransFluor:
-        CTDplot = CTDProfilePlot()
-
-        fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
-        for fkey in fluor_key_list:
-            if fkey in ncdata.keys():
-                fluor_key = fkey
-
-        (plt, fig) = CTDplot.plot3var(epic_key=['PAR_905', '', 'Tr_904', '', fluor_key, ''],
-                                      xdata=[ncdata['PAR_905'][0, :, 0, 0], np.array([]),
-                                             ncdata['Tr_904'][0, :,
-                                                              0, 0], np.array([]),
-                                             ncdata[fluor_key][0, :, 0, 0], np.array([])],
-                                      ydata=ydata,
-                                      xlabel=['PAR', 'Trans. %',
-                                              'Chlor-A mg/m^3'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
+        if not os.path.exists(os.path.dirname(outfile)):
+            os.makedirs(os.path.dirname(outfile), exist_ok=True)
+        fig.savefig(outfile, bbox_inches='tight', dpi=(dpi))
+        if not CTDplot.templated:
+            plt.close()
+    except Exception as e:
+        # a half drawn template can not be reused
+        CTDplot.close_templates()
+        plt.close('all')
+        return (outfile, plot_type, time.time() - start, '{0}: {1}'.format(type(e).__name__, e))
+
+    return (outfile, plot_type, time.time() - start, None)
+
+
+def render_all(jobs, max_workers=1, templated=True):
+    """render every job, in a process pool of max_workers, yielding results as they finish"""
+    if max_workers is None or max_workers > 1:
+        if 'fork' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('fork')
+        else:
+            mp_context = None
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                                 initializer=init_renderer,
+                                 initargs=(templated,)) as executor:
+            # consecutive jobs of a worker are mostly different casts of one plot type
+            for result in executor.map(render, jobs, chunksize=4):
+                yield result
+    else:
+        init_renderer(templated)
+        for job in jobs:
+            yield render(job)
 
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
 
-        plt.savefig('images/' + g_atts['CRUISE'] + '/ParTransFluor/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_PARTransFluor.png', bbox_inches='tight', dpi=(300))
-        plt.close()
-
-    if args.ParTurbFluor:
-        CTDplot = CTDProfilePlot()
-
-        fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
-        for fkey in fluor_key_list:
-            if fkey in ncdata.keys():
-                fluor_key = fkey
-
-        (plt, fig) = CTDplot.plot3var(epic_key=['PAR_905', '', 'Trb_980', '', fluor_key, ''],
-                                      xdata=[ncdata['PAR_905'][0, :, 0, 0], np.array([]),
-                                             ncdata['Trb_980'][0, :,
-                                                               0, 0], np.array([]),
-                                             ncdata[fluor_key][0, :, 0, 0], np.array([])],
-                                      ydata=ydata,
-                                      xlabel=['PAR', 'Turbidity',
-                                              'Chlor-A mg/m^3'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
+"""------------------------------------- Main -----------------------------------------"""
 
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
+parser = argparse.ArgumentParser(description='CTD plots')
+parser.add_argument('DataPath', metavar='DataPath', type=str,
+                    help='full path to directory of processed nc files')
+parser.add_argument('-TSvD', '--TSvD', action="store_true",
+                    help='Temperature, Salinity, SigmaT vs depth')
+parser.add_argument('-OxyFluor', '--OxyFluor', action="store_true",
+                    help='Temperature, Oxygen, Fluorometer vs depth')
+parser.add_argument('-ParTurbFluor', '--ParTurbFluor', action="store_true",
+                    help='PAR, Turbidity, Fluorometer vs depth')
+parser.add_argument('-ParFluor', '--ParFluor', action="store_true",
+                    help='PAR, Fluorometer vs depth')
+parser.add_argument('-TurbFluor', '--TurbFluor', action="store_true",
+                    help='Turbidity, Fluorometer vs depth (common for only Eco')
+parser.add_argument('-ParTransFluor', '--ParTransFluor', action="store_true",
+                    help='Transmissometer, Turbidity, Fluorometer vs depth (common package for EMA)')
+parser.add_argument('-TransTurbFluor', '--TransTurbFluor', action="store_true",
+                    help='Transmissometer, Turbidity, Fluorometer vs depth (common package for EMA)')
+parser.add_argument('-TransFluor', '--TransFluor', action="store_true",
+                    help='Transmissometer, Fluorometer vs depth (common package for EMA)')
+parser.add_argument('-has_secondary', '--has_secondary', action="store_true",
+                    help='Flag to indicate plotting secondary values too')
+parser.add_argument('--workers', type=int, default=1,
+                    help='number of processes rendering figures')
+parser.add_argument('--dpi', type=int, default=300,
+                    help='resolution of the saved figures')
+parser.add_argument('--timing_log', type=str,
+                    help='csv file to write the render time of every figure to')
+parser.add_argument('--fresh_figures', action="store_true",
+                    help='build every figure from scratch instead of updating one figure per plot type')
 
-        plt.savefig('images/' + g_atts['CRUISE'] + '/PARTurbFluor/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_PARTurbFluor.png', bbox_inches='tight', dpi=(300))
-        plt.close()
-
-    if args.TransTurbFluor:
-        CTDplot = CTDProfilePlot()
-
-        fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
-        for fkey in fluor_key_list:
-            if fkey in ncdata.keys():
-                fluor_key = fkey
-
-        (plt, fig) = CTDplot.plot3var(epic_key=['Tr_904', '', 'Trb_980', '', fluor_key, ''],
-                                      xdata=[ncdata['Tr_904'][0, :, 0, 0], np.array([]),
-                                             ncdata['Trb_980'][0, :,
-                                                               0, 0], np.array([]),
-                                             ncdata[fluor_key][0, :, 0, 0], np.array([])],
-                                      ydata=ydata,
-                                      xlabel=['Trans. %', 'Turbidity',
-                                              'Chlor-A mg/m^3'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
+args = parser.parse_args()
 
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
+nc_path = args.DataPath
 
-        plt.savefig('images/' + g_atts['CRUISE'] + '/TransTurbFluor/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_TransTurbFluor.png', bbox_inches='tight', dpi=(300))
-        plt.close()
-
-    if args.TransFluor:
-        CTDplot = CTDProfilePlot()
-
-        fluor_key_list = ['F_903', 'Fch_906', 'fWS_973', 'Chl_933']
-        for fkey in fluor_key_list:
-            if fkey in ncdata.keys():
-                fluor_key = fkey
-
-        (plt, fig) = CTDplot.plot2var(epic_key=['Tr_904', '', fluor_key, ''],
-                                      xdata=[ncdata['Tr_904'][0, :, 0, 0], np.array([]),
-                                             ncdata[fluor_key][0, :, 0, 0], np.array([])],
-                                      ydata=ydata,
-                                      xlabel=['Trans. %', 'Chlor-A mg/m^3'],
-                                      secondary=args.has_secondary)
-
-        ptitle = CTDplot.add_title(cruiseid=g_atts['CRUISE'],
-                                   fileid=ncfile.split('/')[-1],
-                                   castid=g_atts['CAST'],
-                                   stationid=g_atts['STATION_NAME'],
-                                   castdate=cast_time,
-                                   lat=lat_data,
-                                   lon=lon_data)
+if not '.nc' in nc_path:
+    nc_path = [nc_path + fi for fi in os.listdir(
+        nc_path) if fi.endswith('.nc') and not fi.endswith('_cf_ctd.nc')]
+else:
+    nc_path = [nc_path, ]
 
-        t = fig.suptitle(ptitle)
-        t.set_y(1.06)
-        DefaultSize = fig.get_size_inches()
-        fig.set_size_inches((DefaultSize[0], DefaultSize[1]*2))
+requested = [plot_type for plot_type in plot_types if getattr(args, plot_type)]
 
-        plt.savefig('images/' + g_atts['CRUISE'] + '/TransFluor/' + ncfile.split(
-            '/')[-1].split('.')[0] + '_plot_TransFluor.png', bbox_inches='tight', dpi=(300))
-        plt.close()
+# each cast is read once, every requested figure of it is a job
+casts = []
+for ncfile in sorted(nc_path):
+    print("Working on file {}".format(ncfile))
+    casts.append(read_cast(ncfile))
+# plot type major order so a worker's jobs reuse the same figure template
+jobs = [(cast, plot_type, args.has_secondary, args.dpi)
+        for plot_type in requested for cast in casts]
+
+start = time.time()
+log = []
+for (outfile, plot_type, seconds, error) in render_all(jobs, max_workers=args.workers,
+                                                      templated=not args.fresh_figures):
+    if error:
+        print("{0:6.2f}s {1} FAILED - {2}".format(seconds, outfile, error))
+    else:
+        print("{0:6.2f}s {1}".format(seconds, outfile))
+    log.append((outfile, plot_type, seconds, error or ''))
+
+print("{0} figures in {1:.1f}s".format(len(log), time.time() - start))
+
+if args.timing_log:
+    with open(args.timing_log, 'w') as fid:
+        fid.write('file,plot_type,seconds,error\n')
+        for (outfile, plot_type, seconds, error) in log:
+            fid.write('{0},{1},{2:.3f},"{3}"\n'.format(outfile, plot_type, seconds, error))
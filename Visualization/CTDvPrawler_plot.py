@@ -101,7 +101,7 @@ args = parser.parse_args()
 
 ncfile=args.DataPath
 print("Working on file {file} ").format(file=ncfile)
-nc = EcoFOCI_netCDF(ncfile)
+nc = EcoFOCI_netCDF(ncfile, mode='r')
 ncdata = nc.ncreadfile_dic()
 g_atts = nc.get_global_atts()
 nc.close()
@@ -109,7 +109,7 @@ cast_time = EPIC2Datetime(ncdata['time'],ncdata['time2'])[0]
 
 ncfilep=args.PrawlerDataPath
 print("Working on file {file} ").format(file=ncfilep)
-nc = EcoFOCI_netCDF(ncfilep)
+nc = EcoFOCI_netCDF(ncfilep, mode='r')
 ncdatap = nc.ncreadfile_dic()
 g_attsp = nc.get_global_atts()
 nc.close()
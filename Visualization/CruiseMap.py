@@ -12,6 +12,7 @@
  History
  =======
  
+ 2026-10-17: bathymetry through a cached provider (utilities/bathymetry.py), -offline
  2019-06-07: Switch basemap for cartopy - deprecate basemap entirely
  2018-07-13: Make python3 compliant: WIP (COMPLETE)
  2016-09-09: Begin migration to classes for reused routines (db_io)
@@ -52,7 +53,6 @@ import cartopy.feature as cfeature
 import cmocean
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
-import xarray as xa
 from cartopy.mpl.ticker import LatitudeFormatter, LongitudeFormatter
 
 # user stack
@@ -60,6 +60,7 @@ from cartopy.mpl.ticker import LatitudeFormatter, LongitudeFormatter
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 os.sys.path.insert(1, parent_dir)
 from io_utils import ConfigParserLocal
+from utilities.bathymetry import BathymetryProvider
 
 __author__ = "Shaun Bell"
 __email__ = "shaun.bell@noaa.gov"
@@ -230,46 +231,14 @@ def cartopy_plot(
     """
     To take the place of the basemap routine below
     """
-    # using xarray for data read
-
-    if args.topo_res in ["etopo1"]:
-        server_url = "https://coastwatch.pfeg.noaa.gov/erddap/griddap/etopo360"
-        z_var_name = "altitude"
-    elif args.topo_res in ["etopo5"]:
-        server_url = "https://upwell.pfeg.noaa.gov/erddap/griddap/etopo5"
-        z_var_name = "ROSE"
-    elif args.topo_res in ["smith_sandwell"]:
-        server_url = "https://coastwatch.pfeg.noaa.gov/erddap/griddap/usgsCeSS111"
-        z_var_name = "topo"
-    else:
-        sys.exit("Bad Bathymetry ID given")
-
-    bathy = xa.open_dataset(server_url)
-
-    if args.topo_res in ["smith_sandwell"]:
-        if args.region in ["BS"]:
-            bathy_sub = bathy.sel(latitude=slice(66, 51), longitude=slice(-180, -152))
-        elif args.region in ["GOA"]:
-            bathy_sub = bathy.sel(latitude=slice(60, 51), longitude=slice(-160, -135))
-        elif args.region in ["CK"]:
-            bathy_sub = bathy.sel(latitude=slice(74, 64), longitude=slice(-178, -150))
-        elif args.region in ["AK"]:
-            bathy_sub = bathy.sel(latitude=slice(76, 50), longitude=slice(-180, -140))
-        else:
-            sys.exit("Region abrieviation not recognized.  See help (-h)")
-    elif args.topo_res in ["etopo1", "etopo5"]:
-        if args.region in ["BS"]:
-            bathy_sub = bathy.sel(latitude=slice(51, 66), longitude=slice(180, 208))
-        elif args.region in ["GOA"]:
-            bathy_sub = bathy.sel(latitude=slice(51, 66), longitude=slice(200, 235))
-        elif args.region in ["CK"]:
-            bathy_sub = bathy.sel(latitude=slice(64, 74), longitude=slice(182, 210))
-        elif args.region in ["AK"]:
-            bathy_sub = bathy.sel(latitude=slice(50, 76), longitude=slice(180, 220))
-        else:
-            sys.exit("Region abrieviation not recognized.  See help (-h)")
-    else:
-        bathy_sub = bathy
+    # regional bathymetry from the local cache (ERDDAP on a miss unless offline)
+    provider = BathymetryProvider(cache_dir=args.bathy_cache, offline=args.offline)
+    try:
+        bathy_sub, z_var_name = provider.get(args.topo_res, args.region)
+    except KeyError as e:
+        sys.exit(e.args[0])
+    except RuntimeError as e:
+        sys.exit(str(e))
 
     if args.labels:
         projection = ccrs.Mercator()
@@ -579,6 +548,24 @@ parser.add_argument(
 parser.add_argument(
     "-labels", "--labels", action="store_true", help="turn on lat/lon labels"
 )
+parser.add_argument(
+    "-bathy_cache",
+    "--bathy_cache",
+    type=str,
+    help="bathymetry cache directory (default ~/.ecofoci_bathy)",
+)
+parser.add_argument(
+    "-bathy_seed",
+    "--bathy_seed",
+    type=str,
+    help="local bathymetry netcdf to seed the cache for topo_res/region",
+)
+parser.add_argument(
+    "-offline",
+    "--offline",
+    action="store_true",
+    help="only use cached bathymetry (no ERDDAP access)",
+)
 ####
 # Data of interest resides in multiple databases on Pavlof
 # Deployed Moorings and Recovered Moorings have independant tables in the ecofoci database
@@ -589,6 +576,11 @@ parser.add_argument(
 
 args = parser.parse_args()
 
+if args.bathy_seed:
+    BathymetryProvider(cache_dir=args.bathy_cache).seed(
+        args.topo_res, args.region, args.bathy_seed
+    )
+
 cruiseID_input = args.CruiseID
 
 if (
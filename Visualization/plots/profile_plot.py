@@ -5,6 +5,8 @@ class definitions for ctd profile plots
 
 limit to four variables
 
+ 2026-10-17: templated mode, figures are built once per plot layout and reused
+
 """
 
 import datetime
@@ -21,7 +23,7 @@ from matplotlib.dates import (DateFormatter, DayLocator, HourLocator,
 class CTDProfilePlot(object):
 
 
-    def __init__(self, fontsize=10, labelsize=10, plotstyle='k-.', stylesheet='seaborn-ticks'):
+    def __init__(self, fontsize=10, labelsize=10, plotstyle='k-.', stylesheet='seaborn-ticks', templated=False):
         """Initialize the timeseries with items that do not change.
 
         This sets up the axes and station locations. The `fontsize` and `spacing`
@@ -43,12 +45,20 @@ class CTDProfilePlot(object):
           u'seaborn-poster', u'seaborn-muted', u'seaborn-paper', 
           u'seaborn-white', u'seaborn-pastel', u'seaborn-dark', 
           u'seaborn-dark-palette']
+        templated : bool
+          Keep the figure of each plot layout and only update its line data,
+          limits and ticks for the next cast (the caller saves the figure but
+          does not close it, see close_templates).  Speeds up batch rendering.
         """
 
         self.fontsize = fontsize
         self.labelsize = labelsize
         self.plotstyle = plotstyle
         self.max_xticks = 10
+        self.templated = templated
+        self._templates = {}
+        self._lines = []
+        self._limits = []
         plt.style.use(stylesheet)
         mpl.rcParams['svg.fonttype'] = 'none'
         mpl.rcParams['ps.fonttype'] = 42 #truetype/type2 fonts instead of type3
@@ -108,17 +118,15 @@ class CTDProfilePlot(object):
       return ptitle
 
     def plot1var(self, epic_key=None, xdata=None, ydata=None, xlabel=None, secondary=False, **kwargs):
-      fig = plt.figure(1)
+      fig = self._reuse('plot1var', epic_key, xdata, ydata, None, xlabel, secondary)
+      if fig is not None:
+        return plt, fig
+
+      fig = self._new_figure()
       ax1 = fig.add_subplot(111)
-      p1 = ax1.plot(xdata[0], ydata)
-      plt.setp(p1, color=self.var2format(epic_key[0])['color'],
-                   linestyle=self.var2format(epic_key[0])['linestyle'],
-                   linewidth=self.var2format(epic_key[0])['linewidth'])
+      self._plot(ax1, xdata, ydata, epic_key, 0)
       if secondary:
-        p1 = ax1.plot(xdata[1],ydata)
-        plt.setp(p1, color=self.var2format(epic_key[1])['color'],
-                     linestyle=self.var2format(epic_key[1])['linestyle'],
-                     linewidth=self.var2format(epic_key[1])['linewidth'])
+        self._plot(ax1, xdata, ydata, epic_key, 1)
 
       ax1.invert_yaxis()
       plt.ylabel('Depth (dB)', fontsize=self.labelsize, fontweight='bold')
@@ -128,24 +136,20 @@ class CTDProfilePlot(object):
       ax1.xaxis.set_major_formatter(fmt)
       ax1.tick_params(axis='both', which='major', labelsize=self.labelsize)
 
+      self._store('plot1var', epic_key, xdata, xlabel, secondary, fig, [ax1], xticks=False)
       return plt, fig
 
     def plot2var(self, epic_key=None, xdata=None, ydata=None, xlabel=None, secondary=False, **kwargs):
-      fig = plt.figure(1)
+      fig = self._reuse('plot2var', epic_key, xdata, ydata, None, xlabel, secondary)
+      if fig is not None:
+        return plt, fig
+
+      fig = self._new_figure()
       ax1 = fig.add_subplot(111)
-      p1 = ax1.plot(xdata[0], ydata)
-      plt.setp(p1, color=self.var2format(epic_key[0])['color'],
-                   linestyle=self.var2format(epic_key[0])['linestyle'],
-                   linewidth=self.var2format(epic_key[0])['linewidth'])
+      self._plot(ax1, xdata, ydata, epic_key, 0)
       if secondary and not (xdata[1].size == 0):
-        p1 = ax1.plot(xdata[1],ydata)
-        plt.setp(p1, color=self.var2format(epic_key[1])['color'],
-                     linestyle=self.var2format(epic_key[1])['linestyle'],
-                     linewidth=self.var2format(epic_key[1])['linewidth'])
-        #set plot limits for two vars by finding the absolute range and adding 10%
-        abmin=np.nanmin([np.nanmin(xdata[0]),np.nanmin(xdata[1])])
-        abmax=np.nanmax([np.nanmax(xdata[0]),np.nanmax(xdata[1])])
-        ax1.set_xlim([abmin - 0.1*(abmax-abmin),abmax + 0.1*(abmax-abmin)])
+        self._plot(ax1, xdata, ydata, epic_key, 1)
+        self._pad_xlim(ax1, xdata, 0, 1)
 
       ax1.invert_yaxis()
       plt.ylabel('Depth (dB)', fontsize=self.labelsize, fontweight='bold')
@@ -157,53 +161,35 @@ class CTDProfilePlot(object):
 
       #plot second param
       ax2 = ax1.twiny()
-      p1 = ax2.plot(xdata[2], ydata)
-      plt.setp(p1, color=self.var2format(epic_key[2])['color'],
-                   linestyle=self.var2format(epic_key[2])['linestyle'],
-                   linewidth=self.var2format(epic_key[2])['linewidth'])
+      self._plot(ax2, xdata, ydata, epic_key, 2)
       if secondary and not (xdata[3].size == 0):
-        p1 = ax2.plot(xdata[3],ydata)
-        plt.setp(p1, color=self.var2format(epic_key[3])['color'],
-                     linestyle=self.var2format(epic_key[3])['linestyle'],
-                     linewidth=self.var2format(epic_key[3])['linewidth'])
-        #set plot limits for two vars by finding the absolute range and adding 10%
-        abmin=np.nanmin([np.nanmin(xdata[2]),np.nanmin(xdata[3])])
-        abmax=np.nanmax([np.nanmax(xdata[2]),np.nanmax(xdata[3])])
-        try:
-          ax2.set_xlim([abmin - 0.1*(abmax-abmin),abmax + 0.1*(abmax-abmin)])
-        except:
-          ax2.set_xlim([0,1])
+        self._plot(ax2, xdata, ydata, epic_key, 3)
+        self._pad_xlim(ax2, xdata, 2, 3)
 
       plt.ylabel('Depth (dB)', fontsize=self.labelsize, fontweight='bold')
       plt.xlabel(xlabel[1], fontsize=self.labelsize, fontweight='bold')
 
       #set xticks and labels to be at the same spot for all three vars
-      ax1.set_xticks(np.linspace(ax1.get_xbound()[0], ax1.get_xbound()[1], self.max_xticks))
-      ax2.set_xticks(np.linspace(ax2.get_xbound()[0], ax2.get_xbound()[1], self.max_xticks))
+      self._align_xticks([ax1, ax2])
 
       fmt=mpl.ticker.StrMethodFormatter(self.var2format(epic_key[2])['format'])
       ax2.xaxis.set_major_formatter(fmt)
       ax2.tick_params(axis='x', which='major', labelsize=self.labelsize)
 
-
+      self._store('plot2var', epic_key, xdata, xlabel, secondary, fig, [ax1, ax2])
       return plt, fig
 
     def plot3var(self, epic_key=None, xdata=None, ydata=None, xlabel=None, secondary=False, **kwargs):
-      fig = plt.figure(1)
+      fig = self._reuse('plot3var', epic_key, xdata, ydata, None, xlabel, secondary)
+      if fig is not None:
+        return plt, fig
+
+      fig = self._new_figure()
       ax1 = fig.add_subplot(111)
-      p1 = ax1.plot(xdata[0], ydata)
-      plt.setp(p1, color=self.var2format(epic_key[0])['color'],
-                   linestyle=self.var2format(epic_key[0])['linestyle'],
-                   linewidth=self.var2format(epic_key[0])['linewidth'])
+      self._plot(ax1, xdata, ydata, epic_key, 0)
       if secondary and not (xdata[1].size == 0):
-        p1 = ax1.plot(xdata[1],ydata)
-        plt.setp(p1, color=self.var2format(epic_key[1])['color'],
-                     linestyle=self.var2format(epic_key[1])['linestyle'],
-                     linewidth=self.var2format(epic_key[1])['linewidth'])
-        #set plot limits for two vars by finding the absolute range and adding 10%
-        abmin=np.nanmin([np.nanmin(xdata[0]),np.nanmin(xdata[1])])
-        abmax=np.nanmax([np.nanmax(xdata[0]),np.nanmax(xdata[1])])
-        ax1.set_xlim([abmin - 0.1*(abmax-abmin),abmax + 0.1*(abmax-abmin)])
+        self._plot(ax1, xdata, ydata, epic_key, 1)
+        self._pad_xlim(ax1, xdata, 0, 1)
 
       ax1.invert_yaxis()
       plt.ylabel('Depth (dB)', fontsize=self.labelsize, fontweight='bold')
@@ -215,22 +201,10 @@ class CTDProfilePlot(object):
 
       #plot second param
       ax2 = ax1.twiny()
-      p1 = ax2.plot(xdata[2], ydata)
-      plt.setp(p1, color=self.var2format(epic_key[2])['color'],
-                   linestyle=self.var2format(epic_key[2])['linestyle'],
-                   linewidth=self.var2format(epic_key[2])['linewidth'])
+      self._plot(ax2, xdata, ydata, epic_key, 2)
       if secondary and not (xdata[3].size == 0):
-        p1 = ax2.plot(xdata[3],ydata)
-        plt.setp(p1, color=self.var2format(epic_key[3])['color'],
-                     linestyle=self.var2format(epic_key[3])['linestyle'],
-                     linewidth=self.var2format(epic_key[3])['linewidth'])
-        #set plot limits for two vars by finding the absolute range and adding 10%
-        abmin=np.nanmin([np.nanmin(xdata[2]),np.nanmin(xdata[3])])
-        abmax=np.nanmax([np.nanmax(xdata[2]),np.nanmax(xdata[3])])
-        try:
-          ax2.set_xlim([abmin - 0.1*(abmax-abmin),abmax + 0.1*(abmax-abmin)])
-        except:
-          ax2.set_xlim([0,1])
+        self._plot(ax2, xdata, ydata, epic_key, 3)
+        self._pad_xlim(ax2, xdata, 2, 3)
 
       plt.ylabel('Depth (dB)', fontsize=self.labelsize, fontweight='bold')
       plt.xlabel(xlabel[1], fontsize=self.labelsize, fontweight='bold')
@@ -239,24 +213,11 @@ class CTDProfilePlot(object):
       ax2.xaxis.set_major_formatter(fmt)
       ax2.tick_params(axis='x', which='major', labelsize=self.labelsize)
 
-      ax3 = ax1.twiny()
-      ax3.spines["top"].set_position(("axes", 1.05))
-      self.make_patch_spines_invisible(ax3)
-      # Second, show the right spine.
-      ax3.spines["top"].set_visible(True)
-      p1 = ax3.plot(xdata[4], ydata)
-      plt.setp(p1, color=self.var2format(epic_key[4])['color'],
-                   linestyle=self.var2format(epic_key[4])['linestyle'],
-                   linewidth=self.var2format(epic_key[4])['linewidth'])
+      ax3 = self._third_axis(ax1)
+      self._plot(ax3, xdata, ydata, epic_key, 4)
       if secondary and not (xdata[5].size == 0):
-        p1 = ax2.plot(xdata[5],ydata)
-        plt.setp(p1, color=self.var2format(epic_key[5])['color'],
-                     linestyle=self.var2format(epic_key[5])['linestyle'],
-                     linewidth=self.var2format(epic_key[5])['linewidth'])
-        #set plot limits for two vars by finding the absolute range and adding 10%
-        abmin=np.nanmin([np.nanmin(xdata[4]),np.nanmin(xdata[5])])
-        abmax=np.nanmax([np.nanmax(xdata[4]),np.nanmax(xdata[5])])
-        ax3.set_xlim([abmin - 0.1*(abmax-abmin),abmax + 0.1*(abmax-abmin)])
+        self._plot(ax2, xdata, ydata, epic_key, 5)
+        self._pad_xlim(ax3, xdata, 4, 5)
 
       plt.ylabel('Depth (dB)', fontsize=self.labelsize, fontweight='bold')
       plt.xlabel(xlabel[2], fontsize=self.labelsize, fontweight='bold')
@@ -264,28 +225,25 @@ class CTDProfilePlot(object):
       #set bounds based on max and min values
 
       #set xticks and labels to be at the same spot for all three vars
-      ax1.set_xticks(np.linspace(ax1.get_xbound()[0], ax1.get_xbound()[1], self.max_xticks))
-      ax2.set_xticks(np.linspace(ax2.get_xbound()[0], ax2.get_xbound()[1], self.max_xticks))
-      ax3.set_xticks(np.linspace(ax3.get_xbound()[0], ax3.get_xbound()[1], self.max_xticks))
+      self._align_xticks([ax1, ax2, ax3])
 
       fmt=mpl.ticker.StrMethodFormatter(self.var2format(epic_key[4])['format'])
       ax3.xaxis.set_major_formatter(fmt)
       ax3.tick_params(axis='x', which='major', labelsize=self.labelsize)
 
+      self._store('plot3var', epic_key, xdata, xlabel, secondary, fig, [ax1, ax2, ax3])
       return plt, fig
 
     def plot3var2y(self, epic_key=None, xdata=None, ydata=None, ydata2=None, xlabel=None, secondary=False, **kwargs):
-      fig = plt.figure(1)
+      fig = self._reuse('plot3var2y', epic_key, xdata, ydata, ydata2, xlabel, secondary)
+      if fig is not None:
+        return plt, fig
+
+      fig = self._new_figure()
       ax1 = fig.add_subplot(111)
-      p1 = ax1.plot(xdata[0], ydata)
-      plt.setp(p1, color=self.var2format(epic_key[0])['color'],
-                   linestyle=self.var2format(epic_key[0])['linestyle'],
-                   linewidth=self.var2format(epic_key[0])['linewidth'])
+      self._plot(ax1, xdata, ydata, epic_key, 0)
       if secondary and not (xdata[1].size == 0):
-        p1 = ax1.plot(xdata[1],ydata2)
-        plt.setp(p1, color=self.var2format(epic_key[1])['color'],
-                     linestyle=self.var2format(epic_key[1])['linestyle'],
-                     linewidth=self.var2format(epic_key[1])['linewidth'])
+        self._plot(ax1, xdata, ydata2, epic_key, 1, second_y=True)
 
       ax1.invert_yaxis()
       plt.ylabel('Depth (dB)', fontsize=self.labelsize, fontweight='bold')
@@ -297,15 +255,9 @@ class CTDProfilePlot(object):
 
       #plot second param
       ax2 = ax1.twiny()
-      p1 = ax2.plot(xdata[2], ydata)
-      plt.setp(p1, color=self.var2format(epic_key[2])['color'],
-                   linestyle=self.var2format(epic_key[2])['linestyle'],
-                   linewidth=self.var2format(epic_key[2])['linewidth'])
+      self._plot(ax2, xdata, ydata, epic_key, 2)
       if secondary and not (xdata[3].size == 0):
-        p1 = ax2.plot(xdata[3],ydata2)
-        plt.setp(p1, color=self.var2format(epic_key[3])['color'],
-                     linestyle=self.var2format(epic_key[3])['linestyle'],
-                     linewidth=self.var2format(epic_key[3])['linewidth'])
+        self._plot(ax2, xdata, ydata2, epic_key, 3, second_y=True)
 
       plt.ylabel('Depth (dB)', fontsize=self.labelsize, fontweight='bold')
       plt.xlabel(xlabel[1], fontsize=self.labelsize, fontweight='bold')
@@ -314,34 +266,134 @@ class CTDProfilePlot(object):
       ax2.xaxis.set_major_formatter(fmt)
       ax2.tick_params(axis='x', which='major', labelsize=self.labelsize)
 
-      ax3 = ax1.twiny()
-      ax3.spines["top"].set_position(("axes", 1.05))
-      self.make_patch_spines_invisible(ax3)
-      # Second, show the right spine.
-      ax3.spines["top"].set_visible(True)
-      p1 = ax3.plot(xdata[4], ydata)
-      plt.setp(p1, color=self.var2format(epic_key[4])['color'],
-                   linestyle=self.var2format(epic_key[4])['linestyle'],
-                   linewidth=self.var2format(epic_key[4])['linewidth'])
+      ax3 = self._third_axis(ax1)
+      self._plot(ax3, xdata, ydata, epic_key, 4)
       if secondary and not (xdata[5].size == 0):
-        p1 = ax3.plot(xdata[5],ydata2)
-        plt.setp(p1, color=self.var2format(epic_key[5])['color'],
-                     linestyle=self.var2format(epic_key[5])['linestyle'],
-                     linewidth=self.var2format(epic_key[5])['linewidth'])
+        self._plot(ax3, xdata, ydata2, epic_key, 5, second_y=True)
       plt.ylabel('Depth (dB)', fontsize=self.labelsize, fontweight='bold')
       plt.xlabel(xlabel[2], fontsize=self.labelsize, fontweight='bold')
 
       #set xticks and labels to be at the same spot for all three vars
-      ax1.set_xticks(np.linspace(ax1.get_xbound()[0], ax1.get_xbound()[1], self.max_xticks))
-      ax2.set_xticks(np.linspace(ax2.get_xbound()[0], ax2.get_xbound()[1], self.max_xticks))
-      ax3.set_xticks(np.linspace(ax3.get_xbound()[0], ax3.get_xbound()[1], self.max_xticks))
+      self._align_xticks([ax1, ax2, ax3])
 
       fmt=mpl.ticker.StrMethodFormatter(self.var2format(epic_key[4])['format'])
       ax3.xaxis.set_major_formatter(fmt)
       ax3.tick_params(axis='x', which='major', labelsize=self.labelsize)
 
+      self._store('plot3var2y', epic_key, xdata, xlabel, secondary, fig, [ax1, ax2, ax3])
       return plt, fig
 
+    """-------------------------- figure building / template reuse --------------------------"""
+
+    def _new_figure(self):
+      """fresh figure and an empty record of its lines and limit rules"""
+      self._lines = []
+      self._limits = []
+      if self.templated:
+        # templates stay open side by side, one figure each
+        return plt.figure()
+      return plt.figure(1)
+
+    def _plot(self, ax, xdata, ydata, epic_key, index, second_y=False):
+      p1 = ax.plot(xdata[index], ydata)
+      plt.setp(p1, color=self.var2format(epic_key[index])['color'],
+                   linestyle=self.var2format(epic_key[index])['linestyle'],
+                   linewidth=self.var2format(epic_key[index])['linewidth'])
+      self._lines.append((p1[0], index, second_y))
+      return p1
+
+    def _pad_xlim(self, ax, xdata, first, second):
+      self._limits.append((ax, first, second))
+      self._set_padded_xlim(ax, xdata, first, second)
+
+    @staticmethod
+    def _set_padded_xlim(ax, xdata, first, second):
+      """set plot limits for two vars by finding the absolute range and adding 10%"""
+      abmin=np.nanmin([np.nanmin(xdata[first]),np.nanmin(xdata[second])])
+      abmax=np.nanmax([np.nanmax(xdata[first]),np.nanmax(xdata[second])])
+      try:
+        ax.set_xlim([abmin - 0.1*(abmax-abmin),abmax + 0.1*(abmax-abmin)])
+      except ValueError:
+        ax.set_xlim([0,1])
+
+    def _third_axis(self, ax1):
+      ax3 = ax1.twiny()
+      ax3.spines["top"].set_position(("axes", 1.05))
+      self.make_patch_spines_invisible(ax3)
+      # Second, show the right spine.
+      ax3.spines["top"].set_visible(True)
+      return ax3
+
+    def _align_xticks(self, axes):
+      for ax in axes:
+        ax.set_xticks(np.linspace(ax.get_xbound()[0], ax.get_xbound()[1], self.max_xticks))
+
+    @staticmethod
+    def _template_key(method, epic_key, xdata, xlabel, secondary):
+      """figures are interchangeable when they plot the same variables on the same axes"""
+      return (method, tuple(epic_key), str(xlabel), bool(secondary),
+              tuple(np.size(x) == 0 for x in xdata))
+
+    def _store(self, method, epic_key, xdata, xlabel, secondary, fig, axes, xticks=True):
+      if not self.templated:
+        return
+      key = self._template_key(method, epic_key, xdata, xlabel, secondary)
+      self._templates[key] = {'fig': fig,
+                              'axes': axes,
+                              'lines': self._lines,
+                              'limits': self._limits,
+                              'xticks': xticks}
+
+    def _reuse(self, method, epic_key, xdata, ydata, ydata2, xlabel, secondary):
+      """update the template figure of this plot with new data, None if there is none
+
+      Only line data, axis limits and ticks change, the axes, twin axes, spines,
+      labels and formatters of the template are kept.
+      """
+      if not self.templated:
+        return None
+      key = self._template_key(method, epic_key, xdata, xlabel, secondary)
+      if key not in self._templates:
+        return None
+      template = self._templates[key]
+      fig, axes = template['fig'], template['axes']
+
+      for (line, index, second_y) in template['lines']:
+        line.set_data(xdata[index], ydata2 if second_y else ydata)
+
+      padded = [ax for (ax, first, second) in template['limits']]
+      for ax in axes:
+        ax.relim()
+      if not all(np.isfinite(ax.dataLim.intervalx).all() for ax in axes if ax not in padded):
+        # an axis without data keeps its old view when autoscaled, build a fresh figure
+        plt.close(fig)
+        del self._templates[key]
+        return None
+      for ax in axes:
+        if ax not in padded:
+          ax.set_autoscalex_on(True)
+          ax.autoscale_view(scalex=True, scaley=False)
+      for (ax, first, second) in template['limits']:
+        self._set_padded_xlim(ax, xdata, first, second)
+
+      # twin axes share the depth axis of the first
+      axes[0].set_autoscaley_on(True)
+      axes[0].autoscale_view(scalex=False, scaley=True)
+      if not axes[0].yaxis_inverted():
+        axes[0].invert_yaxis()
+
+      if template['xticks']:
+        self._align_xticks(axes)
+
+      plt.figure(fig.number)
+      return fig
+
+    def close_templates(self):
+      """close and forget every template figure"""
+      for template in self._templates.values():
+        plt.close(template['fig'])
+      self._templates = {}
+
     def change_range(self, plt=None, xlim=[None,None], ylim=[None,None]):
 
       if not len(xlim) == 2:
@@ -0,0 +1,56 @@
+"""
+templated CTDProfilePlot figures match freshly built ones
+"""
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from Visualization.plots.profile_plot import CTDProfilePlot
+
+epic_key = ["T_28", "", "OST_62", "", "F_903", ""]
+xlabel = ["Temperature", "Oxygen", "Chlor-A"]
+depth = np.arange(50.0)
+
+
+def cast(fluor):
+    return [
+        np.linspace(0, 10, 50),
+        np.array([]),
+        np.linspace(80, 100, 50),
+        np.array([]),
+        fluor,
+        np.array([]),
+    ]
+
+
+def view(fig):
+    return [(ax.get_xlim(), list(ax.get_xticks())) for ax in fig.axes]
+
+
+def test_all_nan_series():
+    """a cast without data on an axis gets the fresh figure x range and ticks"""
+    good = cast(np.linspace(0, 12, 50))
+    empty = cast(np.full(50, np.nan))
+
+    fresh = CTDProfilePlot(templated=True)
+    expected = view(fresh.plot3var(epic_key=epic_key, xdata=empty, ydata=depth, xlabel=xlabel)[1])
+    fresh.close_templates()
+
+    templated = CTDProfilePlot(templated=True)
+    templated.plot3var(epic_key=epic_key, xdata=good, ydata=depth, xlabel=xlabel)
+    fig = templated.plot3var(epic_key=epic_key, xdata=empty, ydata=depth, xlabel=xlabel)[1]
+    assert view(fig) == expected
+
+    # and the next cast with data is plotted like a fresh figure again
+    fig = templated.plot3var(epic_key=epic_key, xdata=good, ydata=depth, xlabel=xlabel)[1]
+    fresh = CTDProfilePlot(templated=True)
+    expected = view(fresh.plot3var(epic_key=epic_key, xdata=good, ydata=depth, xlabel=xlabel)[1])
+    assert view(fig) == expected
+
+    fresh.close_templates()
+    templated.close_templates()
+    plt.close("all")
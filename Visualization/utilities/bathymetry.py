@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+"""
+ bathymetry.py
+
+ Bathymetry provider for the map routines.  Regional subsets of ETOPO1/ETOPO5/
+ Smith-Sandwell are kept in an on-disk cache (compressed netcdf, one file per
+ product and region) so maps can be made offline once a region has been fetched
+ or seeded from a local file.
+
+ Usage
+ =====
+ provider = BathymetryProvider()                          # ERDDAP on cache miss
+ provider = BathymetryProvider(offline=True)              # cache only
+ provider = BathymetryProvider(fetcher=LocalFileFetcher('etopo1.nc'))
+ provider.seed('etopo1', 'BS', 'etopo1.nc')               # pre-seed from local file
+ bathy_sub, z_var_name = provider.get('etopo1', 'BS')
+
+ The fetcher is any callable fetcher(source, lat_slice, lon_slice) returning an
+ xarray Dataset with latitude/longitude coordinates and the source z variable.
+
+ History
+ =======
+ 2026-10-17: initial cached provider (replaces inline ERDDAP read in CruiseMap)
+"""
+
+import datetime
+import os
+
+import xarray as xa
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+
+"""---------------------------------------------------------------------------------"""
+
+# product: (ERDDAP griddap url, z variable, region table)
+BATHY_SOURCES = {
+    "etopo1": {
+        "url": "https://coastwatch.pfeg.noaa.gov/erddap/griddap/etopo360",
+        "z_var_name": "altitude",
+        "regions": "0_360",
+    },
+    "etopo5": {
+        "url": "https://upwell.pfeg.noaa.gov/erddap/griddap/etopo5",
+        "z_var_name": "ROSE",
+        "regions": "0_360",
+    },
+    "smith_sandwell": {
+        "url": "https://coastwatch.pfeg.noaa.gov/erddap/griddap/usgsCeSS111",
+        "z_var_name": "topo",
+        "regions": "180_180",
+    },
+}
+
+# region: (latitude slice, longitude slice) in the coordinate order of each product
+REGIONS = {
+    "0_360": {
+        "BS": (slice(51, 66), slice(180, 208)),
+        "GOA": (slice(51, 66), slice(200, 235)),
+        "CK": (slice(64, 74), slice(182, 210)),
+        "AK": (slice(50, 76), slice(180, 220)),
+    },
+    "180_180": {
+        "BS": (slice(66, 51), slice(-180, -152)),
+        "GOA": (slice(60, 51), slice(-160, -135)),
+        "CK": (slice(74, 64), slice(-178, -150)),
+        "AK": (slice(76, 50), slice(-180, -140)),
+    },
+}
+
+default_cache_dir = os.environ.get(
+    "ECOFOCI_BATHY_CACHE", os.path.join(os.path.expanduser("~"), ".ecofoci_bathy")
+)
+
+
+def region_bounds(topo_res, region):
+    """(source, latitude slice, longitude slice) for a product/region pair"""
+    try:
+        source = BATHY_SOURCES[topo_res]
+    except KeyError:
+        raise KeyError("Bad Bathymetry ID given")
+    try:
+        lat_slice, lon_slice = REGIONS[source["regions"]][region]
+    except KeyError:
+        raise KeyError("Region abrieviation not recognized.  See help (-h)")
+    return source, lat_slice, lon_slice
+
+
+def _sel(bathy, lat_slice, lon_slice):
+    """subset honoring the latitude order of the file (some products are north to south)"""
+    lat = bathy.latitude.values
+    if (lat[0] < lat[-1]) != (lat_slice.start < lat_slice.stop):
+        lat_slice = slice(lat_slice.stop, lat_slice.start)
+    return bathy.sel(latitude=lat_slice, longitude=lon_slice)
+
+
+def erddap_fetcher(source, lat_slice, lon_slice):
+    """subset the product on ERDDAP (opendap), only the subset is transferred"""
+    bathy = xa.open_dataset(source["url"])
+    return _sel(bathy, lat_slice, lon_slice)[[source["z_var_name"]]]
+
+
+class LocalFileFetcher(object):
+    """fetcher reading from a local netcdf copy of a product (eg. a downloaded etopo1)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, source, lat_slice, lon_slice):
+        with xa.open_dataset(self.path) as bathy:
+            return _sel(bathy, lat_slice, lon_slice)[[source["z_var_name"]]].load()
+
+
+class BathymetryProvider(object):
+    """regional bathymetry with an on-disk cache in front of a pluggable fetcher"""
+
+    def __init__(self, cache_dir=None, fetcher=erddap_fetcher, offline=False):
+        self.cache_dir = cache_dir or default_cache_dir
+        self.fetcher = fetcher
+        self.offline = offline
+
+    def cache_file(self, topo_res, region):
+        return os.path.join(self.cache_dir, "{0}_{1}.nc".format(topo_res, region))
+
+    def _store(self, topo_res, region, bathy_sub):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        z_var_name = BATHY_SOURCES[topo_res]["z_var_name"]
+        tmpfile = self.cache_file(topo_res, region) + ".tmp"
+        bathy_sub.to_netcdf(
+            tmpfile, encoding={z_var_name: {"zlib": True, "complevel": 4}}
+        )
+        os.replace(tmpfile, self.cache_file(topo_res, region))
+
+    def seed(self, topo_res, region, path):
+        """fill the cache for a product/region from a local netcdf file"""
+        source, lat_slice, lon_slice = region_bounds(topo_res, region)
+        bathy_sub = LocalFileFetcher(path)(source, lat_slice, lon_slice)
+        self._store(topo_res, region, bathy_sub)
+
+    def get(self, topo_res, region):
+        """regional bathymetry (xarray Dataset) and the name of its z variable"""
+        source, lat_slice, lon_slice = region_bounds(topo_res, region)
+        cache_file = self.cache_file(topo_res, region)
+
+        if not os.path.exists(cache_file):
+            if self.offline:
+                raise RuntimeError(
+                    "{0} {1} bathymetry is not cached in {2} (offline)".format(
+                        topo_res, region, self.cache_dir
+                    )
+                )
+            self._store(topo_res, region, self.fetcher(source, lat_slice, lon_slice))
+
+        with xa.open_dataset(cache_file) as bathy_sub:
+            return bathy_sub.load(), source["z_var_name"]
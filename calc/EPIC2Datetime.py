@@ -3,13 +3,18 @@ r"""Module to convert PMEL-EPIC timeword to a python datetime
 
     Modifications
     -------------
+    2026-10-17: vectorized numpy datetime64[ms] codec for EPIC and UDUNITS time,
+        EPIC2Datetime and Datetime2EPIC now wrap it
     2018-07-17: SBELL - force numpy ints to be datetime compliant
     2018-06-19: SBELL - make python3 compliant
     2016-11-14: SBELL - create routine to add datetime offset
 
 """
 import datetime
-from netCDF4 import date2num
+import re
+
+import numpy as np
+from netCDF4 import date2num, num2date
 
 __author__ = "Shaun Bell"
 __email__ = "shaun.bell@noaa.gov"
@@ -19,6 +24,205 @@ __version__ = "0.2.1"
 __status__ = "Development"
 
 
+# EPIC reference: 1968-05-23 => 2440000 (see EPIC2Datetime for discussion)
+EPIC_REF_DATETIME64 = np.datetime64("1968-05-23", "ms")
+EPIC_REF_JULIAN = 2440000
+MSEC_PER_DAY = 86400000
+
+# timewords at or above this are EPIC fill values (1e35)
+EPIC_FILL_THRESHOLD = 1e10
+
+# UDUNITS unit strings and their length in milliseconds
+_UDUNITS_MSEC = {
+    "days": 86400000,
+    "day": 86400000,
+    "d": 86400000,
+    "hours": 3600000,
+    "hour": 3600000,
+    "hr": 3600000,
+    "h": 3600000,
+    "minutes": 60000,
+    "minute": 60000,
+    "min": 60000,
+    "seconds": 1000,
+    "second": 1000,
+    "sec": 1000,
+    "s": 1000,
+    "milliseconds": 1,
+    "millisecond": 1,
+    "msec": 1,
+    "ms": 1,
+}
+
+_UDUNITS_REF = re.compile(
+    r"^\s*(\d{1,4})-(\d{1,2})-(\d{1,2})"
+    r"(?:[ T](\d{1,2}):(\d{1,2})(?::(\d{1,2})(?:\.(\d*))?)?)?\s*Z?\s*$"
+)
+
+
+def _parse_UDUNITS(time_since_str):
+    """Split a '{units} since {reference date}' string into the length of
+    one unit in milliseconds and the reference date as datetime64[ms].
+
+    Returns None if the string isn't one the vectorized codec handles
+    (unknown unit, timezone offsets, or a reference date before the
+    gregorian switch where the 'standard' calendar is julian) so callers
+    can fall back to netCDF4.
+    """
+    try:
+        units, ref = time_since_str.split(" since ")
+    except ValueError:
+        return None
+
+    unit_ms = _UDUNITS_MSEC.get(units.strip().lower())
+    match = _UDUNITS_REF.match(ref)
+    if unit_ms is None or match is None:
+        return None
+
+    year, month, day, hour, minute, second, frac = match.groups()
+    ref_dt = datetime.datetime(
+        int(year),
+        int(month),
+        int(day),
+        int(hour or 0),
+        int(minute or 0),
+        int(second or 0),
+        int(((frac or "") + "000000")[:6]),
+    )
+    if ref_dt < datetime.datetime(1582, 10, 15):
+        return None
+
+    return unit_ms, np.datetime64(ref_dt, "ms")
+
+
+def EPIC2Datetime64(timeword_1, timeword_2):
+    r"""Convert arrays of PMEL-EPIC timewords to numpy datetime64[ms] in one pass.
+
+    Parameters
+    ----------
+    timeword_1 : array_like
+         first EPIC timeword (time) - true julian day
+    timeword_2 : array_like
+         second EPIC timeword (time2) - msec since 0:00 GMT
+
+    Returns
+    -------
+    Outputs : ndarray
+              datetime64[ms] array with the broadcast shape of the inputs,
+              NaT where either timeword is masked, nan or the EPIC fill value
+    """
+    timeword_1 = np.ma.filled(np.ma.asarray(timeword_1, dtype="f8"), np.nan)
+    timeword_2 = np.ma.filled(np.ma.asarray(timeword_2, dtype="f8"), np.nan)
+    missing = ~(
+        np.isfinite(timeword_1)
+        & np.isfinite(timeword_2)
+        & (np.abs(timeword_1) < EPIC_FILL_THRESHOLD)
+        & (np.abs(timeword_2) < EPIC_FILL_THRESHOLD)
+    )
+
+    days = np.where(missing, EPIC_REF_JULIAN, timeword_1).astype("i8") - EPIC_REF_JULIAN
+    msec = np.where(missing, 0, timeword_2).astype("i8")
+    dt64 = EPIC_REF_DATETIME64 + (days * MSEC_PER_DAY + msec).astype("m8[ms]")
+
+    return np.where(missing, np.datetime64("NaT", "ms"), dt64)
+
+
+def Datetime642EPIC(epic_dt64):
+    r"""Convert datetime64 values (any resolution) to PMEL-EPIC timewords.
+
+    Parameters
+    ----------
+    epic_dt64 : array_like
+         datetime64 values, or anything numpy can cast to datetime64
+         (python datetimes, pandas DatetimeIndex/Series.values, iso strings)
+
+    Returns
+    -------
+    Outputs : tuple of ndarray    (time, time2)
+              time: int64 true julian day
+              time2: int64 milliseconds since 00:00 UTC
+
+    Raises
+    ------
+    ValueError
+        for NaT values, EPIC timewords have no missing value
+    """
+    epic_dt64 = np.asarray(epic_dt64, dtype="datetime64[ms]")
+    if np.isnat(epic_dt64).any():
+        raise ValueError("NaT has no PMEL-EPIC timeword representation")
+
+    msec = (epic_dt64 - EPIC_REF_DATETIME64).astype("i8")
+    days, time2 = np.divmod(msec, MSEC_PER_DAY)
+
+    return (days + EPIC_REF_JULIAN, time2)
+
+
+def Datetime642UDUNITS(epic_dt64, time_since_str="days since 1900-1-1"):
+    """Convert datetime64 values to numeric time since a reference date.
+
+    Standard (gregorian) calendar only; strings the codec doesn't parse are
+    passed to netCDF4.date2num.
+
+    Parameters
+    ----------
+    epic_dt64 : array_like
+         datetime64 values
+    time_since_str : str
+         string to represent {units} since {reference date}: eg days since 1981-08-31
+
+    Returns
+    -------
+    Outputs : ndarray
+              float64 value of date since reference time in units specified,
+              nan for NaT
+    """
+    epic_dt64 = np.asarray(epic_dt64, dtype="datetime64[ms]")
+    parsed = _parse_UDUNITS(time_since_str)
+    if parsed is None:
+        return date2num(epic_dt64.astype(datetime.datetime), time_since_str)
+
+    unit_ms, ref_dt64 = parsed
+    return np.where(
+        np.isnat(epic_dt64),
+        np.nan,
+        (epic_dt64 - ref_dt64).astype("i8") / float(unit_ms),
+    )
+
+
+def UDUNITS2Datetime64(udnum, time_since_str="days since 1900-1-1"):
+    """Convert numeric time since a reference date to datetime64[ms].
+
+    Inverse of Datetime642UDUNITS, values are rounded to the nearest millisecond.
+
+    Parameters
+    ----------
+    udnum : array_like
+         numerical value of date since reference time
+    time_since_str : str
+         string to represent {units} since {reference date}: eg days since 1981-08-31
+
+    Returns
+    -------
+    Outputs : ndarray
+              datetime64[ms] array
+    """
+    parsed = _parse_UDUNITS(time_since_str)
+    if parsed is None:
+        return np.asarray(
+            num2date(
+                udnum,
+                time_since_str,
+                only_use_cftime_datetimes=False,
+                only_use_python_datetimes=True,
+            ),
+            dtype="datetime64[ms]",
+        )
+
+    unit_ms, ref_dt64 = parsed
+    msec = np.rint(np.asarray(udnum, dtype="f8") * unit_ms).astype("i8")
+    return ref_dt64 + msec.astype("m8[ms]")
+
+
 def EPIC2Datetime(timeword_1, timeword_2):
     r""" 
 
@@ -85,22 +289,12 @@ def EPIC2Datetime(timeword_1, timeword_2):
     # Using a more modern reference date skips this problem and is sufficient if the dates of all data
     #   are after 1582.
 
-    ref_time_dt = datetime.datetime(1968, 5, 23)
-    ref_time_epic = 2440000
-
-    delta_days = [x - ref_time_epic for x in timeword_1]
-    delta_seconds = [x / 1000 for x in timeword_2]
-
-    epic_dt = [
-        ref_time_dt + datetime.timedelta(int(a), int(c))
-        for a, c in zip(delta_days, delta_seconds)
-    ]
-
-    return epic_dt
+    # EPIC2Datetime64 does the arithmetic, this just hands back python datetimes
+    return EPIC2Datetime64(timeword_1, timeword_2).astype(datetime.datetime).tolist()
 
 
 def get_UDUNITS(epic_dt, time_since_str="days since 1900-1-1"):
-    """Using netCDF4.date2num (also available in matplotlib) to convert a datetime to a time since reference date.
+    """Convert a datetime to a time since reference date.
     {units} since {yyyy-mm-dd}
 
     Parameters
@@ -118,10 +312,12 @@ def get_UDUNITS(epic_dt, time_since_str="days since 1900-1-1"):
     Notes
     -----
 
-    See netCDF4.date2num for full examples.  This program is just a wrapper to provide a fixed
-    string date in case not provided.
+    Wrapper of Datetime642UDUNITS (netCDF4.date2num for reference strings it doesn't
+    parse) to provide a fixed string date in case not provided.
     """
-    udnum = date2num(epic_dt, time_since_str)
+    udnum = Datetime642UDUNITS(epic_dt, time_since_str)
+    if np.ndim(epic_dt) == 0:
+        return float(udnum)
     return udnum
 
 
@@ -135,8 +331,9 @@ def Datetime2EPIC(epic_dt):
 
     Parameters
     ----------
-    epic_dt : array of datetime objects
+    epic_dt : datetime or array of datetime objects
               Python datetime structure representing the EPIC datetime
+              (datetime64 values are accepted as well)
 
     
     Returns
@@ -147,29 +344,12 @@ def Datetime2EPIC(epic_dt):
 
     """
 
-    ref_time_py = datetime.datetime.toordinal(datetime.datetime(1968, 5, 23))
-    ref_time_epic = 2440000
-    offset = ref_time_epic - ref_time_py
+    time, time1 = Datetime642EPIC(epic_dt)
 
-    if not isinstance(epic_dt, list):
-        time = offset + epic_dt.toordinal()
-        time1 = int(
-            (epic_dt.hour * (60.0 * 60.0 * 1000.0))
-            + (epic_dt.minute * (60.0 * 1000.0))
-            + (epic_dt.second * (1000.0))
-        )
-    else:
-        time = [offset + x.toordinal() for x in epic_dt]
-        time1 = [
-            int(
-                (x.hour * (60.0 * 60.0 * 1000.0))
-                + (x.minute * (60.0 * 1000.0))
-                + (x.second * (1000.0))
-            )
-            for x in epic_dt
-        ]
+    if np.ndim(epic_dt) == 0:
+        return (int(time), int(time1))
 
-    return (time, time1)
+    return (time.tolist(), time1.tolist())
 
 
 """------------------------------------------------------------------------------------------------"""
@@ -212,9 +392,23 @@ def test_1d_EPIC():
 
 def test_2d_EPIC():
     testdate = EPIC2Datetime([2440000, 2450000], [43200000, 0])
-    prin(testdate)
+    print(testdate)
     testdate1 = Datetime2EPIC(testdate)
-    prin(testdate1)
+    print(testdate1)
+
+
+def test_datetime64():
+    testdate = EPIC2Datetime64([2440000, 2450000], [43200000, 0])
+    print("\n{0}\n".format(testdate))
+    print(Datetime642EPIC(testdate))
+    for time_format in ["days", "hours", "seconds"]:
+        time_since_str = time_format + " since 1900-1-1"
+        udnum = Datetime642UDUNITS(testdate, time_since_str)
+        print(
+            "{0}:value \n{1}:units\n{2}:roundtrip\n".format(
+                udnum, time_since_str, UDUNITS2Datetime64(udnum, time_since_str)
+            )
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+# filename: depth_merge.py
+r"""Module to join discrete (bottle) samples to a ctd depth grid
+
+    The ctd depths are sorted once per cast (DepthIndex) and each bottle
+    depth is matched against them with searchsorted, so a cast is joined in
+    O((n + m) log n) instead of rebuilding and scanning the bottle depths for
+    every ctd depth.  Every bottle goes to its closest ctd depth bin (the
+    deeper one on ties), a bottle never fills more than one bin.
+
+    Usage
+    -----
+    btl_row = bin_samples(ncdata['dep'], ncdata_btl['depth'], tolerance=0.5)
+    # btl_row[i]: bottle placed in ctd depth bin i, -1 if none
+
+    snapped = snap_depths(ctd_depth, nut_depth, tolerance=0.5, nearest=True)
+
+    Modifications
+    -------------
+    2026-10-17: initial merge engine (CTD_BTL_nc2odv, CTDpNUT_ncgen)
+
+"""
+import datetime
+
+import numpy as np
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+
+
+class DepthIndex(object):
+    """Sorted index of a depth vector for repeated nearest depth lookups
+
+    Missing depths (NaN, masked or >= 1e30) are left out of the index.
+    A target half way between two depths matches the deeper one, equal
+    depths keep their file order and the first one is returned.
+    """
+
+    def __init__(self, depth):
+        depth = np.ma.filled(np.ma.asarray(np.ravel(depth), dtype="f8"), np.nan)
+        valid = np.flatnonzero(np.isfinite(depth) & (depth < 1e30))
+        order = np.argsort(depth[valid], kind="mergesort")
+
+        self.positions = valid[order]
+        self.depth = depth[self.positions]
+
+    def __len__(self):
+        return self.depth.size
+
+    def match(self, target, tolerance=0.5, nearest=False):
+        """Index (into the original depth vector) of the closest depth for
+        each target depth
+
+        Parameters
+        ----------
+        target : array_like
+            depths to look up
+        tolerance : float
+            largest accepted depth difference (inclusive)
+        nearest : bool
+            fall back to the closest depth when none is within tolerance
+
+        Returns
+        -------
+        int ndarray shaped like target, -1 where nothing matched
+        """
+        target = np.ma.filled(np.ma.asarray(target, dtype="f8"), np.nan)
+        result = np.full(target.shape, -1, dtype=int)
+        if self.depth.size == 0:
+            return result
+
+        flat = target.ravel()
+        valid = np.isfinite(flat) & (flat < 1e30)
+
+        # closest of the two sorted neighbours, the deeper one on ties
+        upper = np.clip(np.searchsorted(self.depth, flat, side="left"), 0, self.depth.size - 1)
+        lower = np.clip(upper - 1, 0, self.depth.size - 1)
+        with np.errstate(invalid="ignore"):
+            use_lower = np.abs(flat - self.depth[lower]) < np.abs(
+                self.depth[upper] - flat
+            )
+        closest = np.where(use_lower, lower, upper)
+        # first of a run of equal depths
+        closest = np.searchsorted(self.depth, self.depth[closest], side="left")
+
+        with np.errstate(invalid="ignore"):
+            keep = valid & (nearest | (np.abs(self.depth[closest] - flat) <= tolerance))
+        result.ravel()[keep] = self.positions[closest[keep]]
+
+        return result
+
+
+def match_depths(depth, target, tolerance=0.5, nearest=False):
+    """DepthIndex(depth).match(target, ...) for a single lookup"""
+    return DepthIndex(depth).match(target, tolerance=tolerance, nearest=nearest)
+
+
+def bin_samples(grid_depth, sample_depth, tolerance=0.5, nearest=False):
+    """Index of the sample placed in each grid depth bin, -1 for empty bins
+
+    Each sample goes to its closest grid depth (see DepthIndex.match), so it
+    fills at most one bin.  When several samples fall in the same bin the
+    closest one is kept, the first in file order if they are equally close.
+    """
+    grid_depth = np.ma.filled(np.ma.asarray(np.ravel(grid_depth), dtype="f8"), np.nan)
+    sample_depth = np.ma.filled(np.ma.asarray(np.ravel(sample_depth), dtype="f8"), np.nan)
+
+    sample_bin = match_depths(grid_depth, sample_depth, tolerance=tolerance, nearest=nearest)
+    placed = np.flatnonzero(sample_bin >= 0)
+    bins = sample_bin[placed]
+    distance = np.abs(sample_depth[placed] - grid_depth[bins])
+
+    # sorted by bin, then distance, then file order: the first of each bin wins
+    order = np.lexsort((placed, distance, bins))
+    bins, placed = bins[order], placed[order]
+    first = np.unique(bins, return_index=True)[1]
+
+    result = np.full(grid_depth.shape, -1, dtype=int)
+    result[bins[first]] = placed[first]
+
+    return result
+
+
+def snap_depths(grid_depth, sample_depth, tolerance=0.5, nearest=False, fill=None):
+    """Replace each sample depth by the matching grid depth so the two can be
+    merged on exactly equal depth values
+
+    Samples without a match keep their depth (or fill(depth) if a function,
+    eg. np.round, is given).
+    """
+    sample_depth = np.ma.filled(np.ma.asarray(sample_depth, dtype="f8"), np.nan)
+    grid_depth = np.ma.filled(np.ma.asarray(np.ravel(grid_depth), dtype="f8"), np.nan)
+
+    index = match_depths(grid_depth, sample_depth, tolerance=tolerance, nearest=nearest)
+
+    snapped = sample_depth.copy() if fill is None else fill(sample_depth)
+    snapped[index >= 0] = grid_depth[index[index >= 0]]
+
+    return snapped
+
@@ -2,15 +2,25 @@
 
 # Haversine formula example in Python
 # Author: Wayne Dyck
+#
+# 2026-10-17: vectorized great circle distance and a reusable nearest neighbour
+#   index (scipy cKDTree on unit sphere coordinates when available)
 
 import math
+
 import numpy as np
 
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+radius = 6371  # km
+
 
 def distance(origin, destination):
     lat1, lon1 = origin
     lat2, lon2 = destination
-    radius = 6371  # km
 
     dlat = math.radians(lat2 - lat1)
     dlon = math.radians(lon2 - lon1)
@@ -23,24 +33,83 @@ def distance(origin, destination):
     return d
 
 
-def nearest_point(origin, latpoints, lonpoints, grid="1d"):
+def distance_array(lat1, lon1, lat2, lon2):
+    """great circle distance (km) between broadcastable arrays of points"""
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(x, dtype="f8")) for x in (lat1, lon1, lat2, lon2)
+    )
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(
+        (lon2 - lon1) / 2
+    ) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return radius * c
+
+
+def _unit_xyz(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype="f8"))
+    lon = np.radians(np.asarray(lon, dtype="f8"))
+    return np.stack(
+        [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1
+    )
+
+
+class NearestPointIndex(object):
+    """Nearest neighbour lookup of (lat, lon) points on a fixed grid
+
+    The grid points are stored as unit sphere coordinates, where the closest
+    chord is also the closest great circle distance.  A KD-tree is used when
+    scipy is installed, otherwise queries are vectorized brute force.
+    """
+
+    def __init__(self, latpoints, lonpoints, grid="1d"):
+        latpoints = np.asarray(latpoints, dtype="f8")
+        lonpoints = np.asarray(lonpoints, dtype="f8")
+        if grid == "1d":
+            self.shape = (latpoints.size, lonpoints.size)
+            latpoints, lonpoints = np.meshgrid(latpoints, lonpoints, indexing="ij")
+        elif grid == "2d":
+            self.shape = latpoints.shape
+        else:
+            raise ValueError("grid must be '1d' or '2d'")
 
-    if grid is "1d":
-        dist = np.zeros((np.shape(latpoints)[0], np.shape(lonpoints)[0]))
+        self.lat = latpoints.ravel()
+        self.lon = lonpoints.ravel()
+        self.xyz = _unit_xyz(self.lat, self.lon)
+        self.tree = None if cKDTree is None else cKDTree(self.xyz)
 
-        for i, lat in enumerate(latpoints):
-            for j, lon in enumerate(lonpoints):
-                dist[i, j] = distance(origin, [lat, lon])
+    def query(self, lat, lon):
+        """distance (km) and (lat index, lon index) of the nearest grid point(s)"""
+        xyz = _unit_xyz(lat, lon)
+        if self.tree is not None:
+            _, flat = self.tree.query(xyz)
+        elif xyz.ndim == 1:
+            flat = np.argmin(((self.xyz - xyz) ** 2).sum(axis=-1))
+        else:
+            flat = np.array(
+                [np.argmin(((self.xyz - point) ** 2).sum(axis=-1)) for point in xyz]
+            )
+
+        dist = distance_array(lat, lon, self.lat[flat], self.lon[flat])
+        return dist, np.unravel_index(flat, self.shape)
+
+
+def nearest_point(origin, latpoints, lonpoints, grid="1d"):
+
+    if grid == "1d":
+        dist = distance_array(
+            origin[0],
+            origin[1],
+            np.asarray(latpoints)[:, None],
+            np.asarray(lonpoints)[None, :],
+        )
 
         lati, loni = np.where(dist == dist.min())
         return (dist.min(), latpoints[lati[0]], lonpoints[loni[0]], lati[0], loni[0])
 
-    elif grid is "2d":
-        dist = np.zeros_like(latpoints)
-
-        for i, latrow in enumerate(latpoints):
-            for j, lonrow in enumerate(latrow):
-                dist[i, j] = distance(origin, [latpoints[i, j], lonpoints[i, j]])
+    elif grid == "2d":
+        dist = distance_array(origin[0], origin[1], latpoints, lonpoints)
 
         lati, loni = np.where(dist == dist.min())
 
@@ -51,3 +120,19 @@ def nearest_point(origin, latpoints, lonpoints, grid="1d"):
             lati[0],
             loni[0],
         )
+
+
+def nearest_points(origins, latpoints, lonpoints, grid="1d", index=None):
+    """nearest grid point for many origins [(lat, lon), ...]
+
+    Pass the NearestPointIndex of the grid as index to reuse it across calls,
+    otherwise one is built for this call.
+
+    Returns distance (km), lat index and lon index arrays, one value per origin
+    """
+    if index is None:
+        index = NearestPointIndex(latpoints, lonpoints, grid=grid)
+    origins = np.atleast_2d(np.asarray(origins, dtype="f8"))
+    dist, (lati, loni) = index.query(origins[:, 0], origins[:, 1])
+
+    return dist, lati, loni
@@ -0,0 +1,230 @@
+# filename: seawater_derived.py
+r"""Derived variable engine for EPIC ctd files (density, oxygen)
+
+    Requested products are evaluated as a small dependency graph per sensor
+    (primary / secondary): every intermediate (potential temperature,
+    potential density, oxygen solubility) is computed once and shared by
+    all products that need it, each file is opened once, only the profiles
+    needed are read, and all products are written back in the same pass.
+
+    Graph
+    -----
+    ptmp        <- S, T, P
+    pden        <- S, ptmp              (== sw.pden(S, T, P))
+    sigma_t     <- S, T                 -> ST_70 / ST_2070
+    sigma_theta <- pden                 -> STH_71 / STH_2071
+    oxsol       <- S, T                 (Garcia and Gordon 1992)
+    o2_umkg     <- O_mll, pden          -> O_65 / CTDOXY_4221
+    o2_sat      <- O_umkg, pden, oxsol  -> OST_62 / CTDOST_4220
+
+    When o2_umkg and o2_sat are requested together, o2_sat uses the freshly
+    converted oxygen (as running -oxy_ml then -oxy did).
+
+    Usage
+    -----
+    summary = update_file(ncfile, ['sigma_t', 'sigma_theta', 'o2_sat'])
+    summaries = update_files(ncfiles, products, max_workers=4)
+
+    Modifications
+    -------------
+    2026-10-17: initial engine (SeaWater_update)
+
+"""
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import seawater as sw
+
+from io_utils.EcoFOCI_netCDF_read import EcoFOCI_netCDF, repl_var
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+
+
+# EPIC variables of each sensor
+sensors = {
+    "primary": {
+        "T": "T_28",
+        "S": "S_41",
+        "O_mll": "O_60",
+        "O_umkg": "O_65",
+        "ST": "ST_70",
+        "STH": "STH_71",
+        "OST": "OST_62",
+    },
+    "secondary": {
+        "T": "T2_35",
+        "S": "S_42",
+        "O_mll": "O_2060",
+        "O_umkg": "CTDOXY_4221",
+        "ST": "ST_2070",
+        "STH": "STH_2071",
+        "OST": "CTDOST_4220",
+    },
+}
+
+# Garcia and Gorden 1992 - from Seabird Derived Parameter Formulas
+GG_A = [2.00907, 3.22014, 4.0501, 4.94457, -0.256847, 3.88767]
+GG_B = [-0.00624523, -0.00737614, -0.010341, -0.00817083]
+GG_C0 = -0.000000488682
+
+
+def oxygen_solubility(S, T):
+    """oxygen solubility (ml/l), Garcia and Gordon 1992"""
+    Ts = np.log((298.15 - T) / (273.15 + T))
+    return np.exp(
+        np.polyval(GG_A[::-1], Ts) + S * np.polyval(GG_B[::-1], Ts) + GG_C0 * S ** 2
+    )
+
+
+# node: (inputs, function)
+nodes = {
+    "ptmp": (("S", "T", "P"), lambda S, T, P: sw.ptmp(s=S, t=T, p=P)),
+    "pden": (("S", "ptmp"), lambda S, ptmp: sw.eos80.dens0(s=S, t=ptmp)),
+    "sigma_t": (("S", "T"), lambda S, T: sw.eos80.dens0(s=S, t=T) - 1000),
+    "sigma_theta": (("pden",), lambda pden: pden - 1000),
+    "oxsol": (("S", "T"), oxygen_solubility),
+    "o2_umkg": (
+        ("O_mll", "pden"),
+        # ml/l to micromole/l then compensate for density to get micromole/kg
+        lambda O_mll, pden: (O_mll * 44.661) / (pden / 1000.0),
+    ),
+    "o2_sat": (
+        ("O_umkg", "pden", "oxsol"),
+        lambda O_umkg, pden, oxsol: ((O_umkg * pden / 44660) / oxsol) * 100.0,
+    ),
+}
+
+# product: sensor variable it is written to
+products = {
+    "sigma_t": "ST",
+    "sigma_theta": "STH",
+    "o2_umkg": "O_umkg",
+    "o2_sat": "OST",
+}
+
+
+def _profile(values):
+    """depth profile with missing data (nan, >= 1e10) masked"""
+    values = np.ma.filled(np.ma.asarray(values, dtype="f8"), np.nan)
+    return np.ma.masked_where(~np.isfinite(values) | (values >= 1e10), values)
+
+
+def evaluate(name, data, sensor, requested, cache):
+    """value of a graph node for one sensor, intermediates memoized in cache
+
+    data maps EPIC names to depth profiles (only read when needed), P is
+    the pressure/depth profile.  An input that is also a requested product
+    (O_umkg when converting) resolves to the product.
+    """
+    if name in cache:
+        return cache[name]
+
+    if name in nodes:
+        inputs, function = nodes[name]
+        value = function(
+            *[evaluate(x, data, sensor, requested, cache) for x in inputs]
+        )
+    elif name == "P":
+        value = _profile(data["dep"])
+    else:
+        product = next((p for p in requested if products[p] == name), None)
+        if product is not None:
+            value = evaluate(product, data, sensor, requested, cache)
+        else:
+            value = _profile(data[sensors[sensor][name]])
+
+    cache[name] = value
+    return value
+
+
+def required_vars(product, requested, sensor):
+    """EPIC variables a sensor needs in the file to compute product"""
+    needed, stack = set(), [product]
+    while stack:
+        name = stack.pop()
+        producer = next((p for p in requested if products[p] == name), None)
+        if name in nodes:
+            stack.extend(nodes[name][0])
+        elif producer is not None:
+            stack.append(producer)
+        elif name == "P":
+            needed.add("dep")
+        else:
+            needed.add(sensors[sensor][name])
+    return needed
+
+
+def update_file(ncfile, requested, verbose=True):
+    """Compute and write the requested products of both sensors of ncfile
+
+    Returns a summary dictionary of the variables written and the sensors /
+    products skipped (missing inputs or output variable).
+    """
+    summary = {"file": ncfile, "written": [], "skipped": [], "error": None}
+
+    try:
+        df = EcoFOCI_netCDF(ncfile)
+    except (IOError, OSError) as e:
+        summary["error"] = str(e)
+        return summary
+
+    try:
+        nchandle = df._getnchandle_()
+        variables = nchandle.variables
+        data = df.ncreadfile_lazy(index=(0, slice(None), 0, 0))
+
+        for sensor in sensors:
+            cache = {}
+            for product in requested:
+                out_var = sensors[sensor][products[product]]
+                needed = required_vars(product, requested, sensor)
+                if out_var not in variables or not needed <= set(variables.keys()):
+                    summary["skipped"].append(f"{sensor} {product}")
+                    continue
+
+                value = evaluate(product, data, sensor, requested, cache)
+                value = np.ma.masked_invalid(value)
+                if variables[out_var].ndim == 4:
+                    value = value.reshape(variables[out_var].shape)
+                repl_var(nchandle, out_var, value)
+                summary["written"].append(out_var)
+    except Exception as e:
+        summary["error"] = str(e)
+    finally:
+        df.close()
+
+    if verbose:
+        print(
+            f"{ncfile}: {', '.join(summary['written']) or '-'}"
+            + (f" (FAILED - {summary['error']})" if summary["error"] else "")
+        )
+    return summary
+
+
+def _update_file_job(job):
+    """process pool entry point for update_file"""
+    return update_file(*job)
+
+
+def update_files(ncfiles, requested, max_workers=1, verbose=True):
+    """update_file for every file, casts optionally across processes"""
+    jobs = [(ncfile, requested, verbose) for ncfile in ncfiles]
+
+    if max_workers is None or max_workers > 1:
+        if "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+        else:
+            mp_context = None
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp_context
+        ) as executor:
+            return list(executor.map(_update_file_job, jobs))
+
+    return [_update_file_job(job) for job in jobs]
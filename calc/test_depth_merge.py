@@ -0,0 +1,62 @@
+"""
+bottle to ctd depth bin join of calc.depth_merge
+"""
+
+import numpy as np
+
+from calc.depth_merge import DepthIndex, bin_samples, snap_depths
+
+ctd_depth = np.arange(1, 11.0)
+
+
+def placed_once(btl_row):
+    """no bottle fills more than one bin"""
+    placed = btl_row[btl_row >= 0]
+    return placed.size == np.unique(placed).size
+
+
+def test_half_meter_tie():
+    """a bottle half way between two bins goes to the deeper one only"""
+    assert DepthIndex(ctd_depth).match([5.5, 4.5, 0.5]).tolist() == [5, 4, 0]
+
+    btl_row = bin_samples(ctd_depth, [5.5])
+    assert np.flatnonzero(btl_row >= 0).tolist() == [5]
+    assert btl_row[5] == 0
+
+
+def test_sub_meter_bins():
+    """half meter ctd bins get a bottle once, not in every bin within tolerance"""
+    btl_row = bin_samples(np.arange(1, 11.0, 0.5), [5.2, 7.75])
+    assert np.flatnonzero(btl_row >= 0).tolist() == [8, 14]
+    assert placed_once(btl_row)
+
+
+def test_tolerance():
+    btl_row = bin_samples(ctd_depth, [2.2, 5.4, 9.6, 40.0, 1e35])
+    expected = np.full(10, -1)
+    expected[[1, 4, 9]] = [0, 1, 2]
+    assert btl_row.tolist() == expected.tolist()
+
+
+def test_nearest_fallback():
+    """unmatched bottles go to their closest bin, the other bins stay empty"""
+    btl_row = bin_samples(ctd_depth, [5.5, 8.2], nearest=True)
+    assert np.flatnonzero(btl_row >= 0).tolist() == [5, 7]
+
+    btl_row = bin_samples(ctd_depth, [2.2, 40.0], tolerance=0.5, nearest=True)
+    assert np.flatnonzero(btl_row >= 0).tolist() == [1, 9]
+    assert btl_row[[1, 9]].tolist() == [0, 1]
+
+
+def test_each_bottle_once():
+    """bottles sharing a bin: the closest wins, then file order"""
+    btl_row = bin_samples(ctd_depth, [5.4, 5.1, 4.9, 6.6, 6.6], nearest=True)
+    assert placed_once(btl_row)
+    assert btl_row[4] == 1
+    assert btl_row[6] == 3
+    assert np.count_nonzero(btl_row >= 0) == 2
+
+
+def test_snap_depths():
+    snapped = snap_depths(ctd_depth, [2.2, 5.4, 9.6, 40.0], fill=np.round)
+    assert snapped.tolist() == [2.0, 5.0, 10.0, 40.0]
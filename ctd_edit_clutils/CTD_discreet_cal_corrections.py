@@ -14,9 +14,14 @@
  ========
  python CTD_discreet_cal_corrections.py {data} --secondary_oxygen {linear_correction_slope linear_correction_offset}
  python CTD_discreet_cal_corrections.py {data} --secondary_salinity {offset_correction}
+ python CTD_discreet_cal_corrections.py {data} --primary_salinity {offset} --primary_oxygen {slope offset} --workers 4
+
+ All requested corrections are applied to a file in one open/read/write and files are
+ spread over --workers processes.  A per-file summary is printed when done.
  
  History:
  ========
+ 2026-10-17: apply all corrections per file in one pass, process pool over cruise files
  2019-08-15: Python 3 print statments and f-strings
 
  Compatibility:
@@ -29,6 +34,7 @@ import argparse
 import datetime
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 # must be python 3.8 or greater
 try:
@@ -81,240 +87,226 @@ def repl_var(nchandle, var_name, val):
     return
 
 
-"""----------------------------- MAIN -------------------------------------------------"""
-
-parser = argparse.ArgumentParser(
-    description="Apply corrections from Discreet oxygen or salinity samples"
-)
-parser.add_argument(
-    "DataPath", metavar="DataPath", type=str, help="full path to directory for cruise"
-)
-parser.add_argument(
-    "--primary_oxygen",
-    nargs="+",
-    type=float,
-    help="apply linear correction to primary oxygen",
-)
-parser.add_argument(
-    "--secondary_oxygen",
-    nargs="+",
-    type=float,
-    help="apply linear correction to secondary oxygen",
-)
-parser.add_argument(
-    "--primary_salinity", type=float, help="apply offset correction to primary salinity"
-)
-parser.add_argument(
-    "--secondary_salinity",
-    type=float,
-    help="apply offset correction to secondary salinity",
-)
-parser.add_argument(
-    "--fluorometer",
-    type=float,
-    help="apply offset correction to fluorometer (0.0 - deep noise)",
-)
-
-args = parser.parse_args()
-
-# get all .nc files from chosen directory
-full_path = [args.DataPath +
-             x for x in os.listdir(args.DataPath) if x.endswith(".nc")]
-
-if args.primary_oxygen:  # O_65
-    for ifile, ncfile in enumerate(full_path):
-        print(f"Working on file {ncfile} \n")
-        # nc readin
+"""--------------------------------Corrections-----------------------------------------"""
+
+
+def add_cmnt(nchandle, edit_cmnt):
+    """Look for existing program and edit comments / scoot down one level and add new"""
+    global_atts = get_global_atts(nchandle)
+
+    for i in range(1, 10):
+        if ("PROG_CMNT0" + str(i)) in global_atts.keys():
+            nchandle.setncattr(
+                "PROG_CMNT0" + str(i + 1), global_atts["PROG_CMNT0" + str(i)]
+            )
+        else:
+            nchandle.setncattr(
+                "PROG_CMNT01", __file__.split("/")[-1] + " v" + __version__
+            )
+        if ("EDIT_CMNT0" + str(i)) in global_atts.keys():
+            nchandle.setncattr(
+                "EDIT_CMNT0" + str(i + 1), global_atts["EDIT_CMNT0" + str(i)]
+            )
+        else:
+            nchandle.setncattr("EDIT_CMNT01", edit_cmnt)
+
+
+def linear_correction(data, coeffs):
+    """slope/offset correction, missing data (>=1e10) is kept as 1e35"""
+    corr = (data * coeffs[0]) + coeffs[1]
+    corr[0, data[0, :, 0, 0] >= 1e10, 0, 0] = 1e35
+    return corr
+
+
+def offset_correction(data, offset):
+    return data + offset
+
+
+def build_corrections(args):
+    """Translate command line options into an ordered list of corrections
+
+    Each correction is (candidate variables, function, coefficients, edit comment)
+    and the first candidate variable found in a file is corrected.
+    """
+    corrections = []
+    if args.primary_oxygen:
+        corrections.append(
+            (
+                ["O_65"],
+                linear_correction,
+                args.primary_oxygen,
+                "Primary Oxygen Cal Factor of: "
+                + str(args.primary_oxygen[0])
+                + "x + "
+                + str(args.primary_oxygen[1])
+                + " applied",
+            )
+        )
+    if args.secondary_oxygen:
+        corrections.append(
+            (
+                ["CTDOXY_4221"],
+                linear_correction,
+                args.secondary_oxygen,
+                "Secondary Oxygen Cal Factor of: "
+                + str(args.secondary_oxygen[0])
+                + "x + "
+                + str(args.secondary_oxygen[1])
+                + " applied",
+            )
+        )
+    if args.primary_salinity:
+        corrections.append(
+            (
+                ["S_41"],
+                offset_correction,
+                args.primary_salinity,
+                "Primary Salinity Cal Factor of: "
+                + str(args.primary_salinity)
+                + " applied",
+            )
+        )
+    if args.secondary_salinity:
+        corrections.append(
+            (
+                ["S_42"],
+                offset_correction,
+                args.secondary_salinity,
+                "Secondary Salinity Cal Factor of: "
+                + str(args.secondary_salinity)
+                + " applied",
+            )
+        )
+    if args.fluorometer:
+        corrections.append(
+            (
+                ["fWS_973", "F_903"],
+                offset_correction,
+                args.fluorometer,
+                "Fluorometer offset of: " + str(args.fluorometer) + " applied",
+            )
+        )
+    return corrections
+
+
+def apply_corrections(ncfile, corrections):
+    """Apply every correction to ncfile with a single open/read/write
+
+    Returns a summary dictionary of the variables corrected and skipped.
+    """
+    summary = {"file": ncfile, "corrected": [], "skipped": [], "error": None}
+
+    try:
         nchandle = Dataset(ncfile, "a")
-        global_atts = get_global_atts(nchandle)
+    except (IOError, OSError) as e:
+        summary["error"] = str(e)
+        return summary
+
+    try:
         vars_dic = get_vars(nchandle)
-        data = ncreadfile_dic(nchandle, ["O_65"])
-        O2corr = (data["O_65"] * args.primary_oxygen[0]) + \
-            args.primary_oxygen[1]
-        O2corr[0, data["O_65"][0, :, 0, 0] >= 1e10, 0, 0] = 1e35
-
-        repl_var(nchandle, "O_65", O2corr)
-
-        # Look for existing program and edit comments / scoot down one level and add new
-        for i in range(1, 10):
-            if ("PROG_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "PROG_CMNT0" +
-                    str(i + 1), global_atts["PROG_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "PROG_CMNT01", __file__.split("/")[-1] + " v" + __version__
-                )
-            if ("EDIT_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "EDIT_CMNT0" +
-                    str(i + 1), global_atts["EDIT_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "EDIT_CMNT01",
-                    "Primary Oxygen Cal Factor of: "
-                    + str(args.primary_oxygen[0])
-                    + "x + "
-                    + str(args.primary_oxygen[1])
-                    + " applied",
-                )
+        for var_names, correction, coeffs, edit_cmnt in corrections:
+            var_name = next((v for v in var_names if v in vars_dic.keys()), None)
+            if var_name is None:
+                summary["skipped"].append("/".join(var_names))
+                continue
+
+            data = ncreadfile_dic(nchandle, [var_name])
+            repl_var(nchandle, var_name, correction(data[var_name], coeffs))
+            add_cmnt(nchandle, edit_cmnt)
+            summary["corrected"].append(var_name)
+    except Exception as e:
+        summary["error"] = str(e)
+    finally:
         nchandle.close()
 
-if args.secondary_oxygen:  # CTDOXY_4221
-    for ifile, ncfile in enumerate(full_path):
-        print(f"Working on file {ncfile} \n")
-        # nc readin
-        nchandle = Dataset(ncfile, "a")
-        global_atts = get_global_atts(nchandle)
-        vars_dic = get_vars(nchandle)
-        data = ncreadfile_dic(nchandle, ["CTDOXY_4221"])
-        O2corr = (
-            data["CTDOXY_4221"] * args.secondary_oxygen[0]
-        ) + args.secondary_oxygen[1]
-        O2corr[0, data["CTDOXY_4221"][0, :, 0, 0] >= 1e10, 0, 0] = 1e35
-
-        repl_var(nchandle, "CTDOXY_4221", O2corr)
-
-        # Look for existing program and edit comments / scoot down one level and add new
-        for i in range(1, 10):
-            if ("PROG_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "PROG_CMNT0" +
-                    str(i + 1), global_atts["PROG_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "PROG_CMNT01", __file__.split("/")[-1] + " v" + __version__
-                )
-            if ("EDIT_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "EDIT_CMNT0" +
-                    str(i + 1), global_atts["EDIT_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "EDIT_CMNT01",
-                    "Secondary Oxygen Cal Factor of: "
-                    + str(args.secondary_oxygen[0])
-                    + "x + "
-                    + str(args.secondary_oxygen[1])
-                    + " applied",
-                )
+    return summary
 
-        nchandle.close()
 
-if args.primary_salinity:  # S_41
-    for ifile, ncfile in enumerate(full_path):
-        print(f"Working on file {ncfile} \n")
-        # nc readin
-        nchandle = Dataset(ncfile, "a")
-        global_atts = get_global_atts(nchandle)
-        vars_dic = get_vars(nchandle)
-        data = ncreadfile_dic(nchandle, ["S_41"])
-        repl_var(nchandle, "S_41", data["S_41"] + args.primary_salinity)
-
-        # Look for existing program and edit comments / scoot down one level and add new
-        for i in range(1, 10):
-            if ("PROG_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "PROG_CMNT0" +
-                    str(i + 1), global_atts["PROG_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "PROG_CMNT01", __file__.split("/")[-1] + " v" + __version__
-                )
-            if ("EDIT_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "EDIT_CMNT0" +
-                    str(i + 1), global_atts["EDIT_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "EDIT_CMNT01",
-                    "Primary Salinity Cal Factor of: "
-                    + str(args.primary_salinity)
-                    + " applied",
-                )
+def _apply_corrections_job(job):
+    """process pool entry point for apply_corrections"""
+    return apply_corrections(*job)
 
-        nchandle.close()
 
-if args.secondary_salinity:  # S_42
-    for ifile, ncfile in enumerate(full_path):
-        print(f"Working on file {ncfile} \n")
-        # nc readin
-        nchandle = Dataset(ncfile, "a")
-        global_atts = get_global_atts(nchandle)
-        vars_dic = get_vars(nchandle)
-        data = ncreadfile_dic(nchandle, ["S_42"])
-        repl_var(nchandle, "S_42", data["S_42"] + args.secondary_salinity)
-
-        # Look for existing program and edit comments / scoot down one level and add new
-        for i in range(1, 10):
-            if ("PROG_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "PROG_CMNT0" +
-                    str(i + 1), global_atts["PROG_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "PROG_CMNT01", __file__.split("/")[-1] + " v" + __version__
-                )
-            if ("EDIT_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "EDIT_CMNT0" +
-                    str(i + 1), global_atts["EDIT_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "EDIT_CMNT01",
-                    "Secondary Salinity Cal Factor of: "
-                    + str(args.secondary_salinity)
-                    + " applied",
-                )
+def apply_cruise_corrections(full_path, corrections, max_workers=1):
+    """Apply corrections to every file in full_path, optionally across processes"""
+    jobs = [(ncfile, corrections) for ncfile in full_path]
 
-        nchandle.close()
+    if max_workers is None or max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_apply_corrections_job, jobs))
 
-if args.fluorometer:  # fWS_973, or F_903
-    for ifile, ncfile in enumerate(full_path):
-        print(f"Working on file {ncfile} \n")
-        # nc readin
-        nchandle = Dataset(ncfile, "a")
-        global_atts = get_global_atts(nchandle)
-        vars_dic = get_vars(nchandle)
-        try:
-            data = ncreadfile_dic(nchandle, ["fWS_973"])
-            repl_var(nchandle, "fWS_973", data["fWS_973"] + args.fluorometer)
-        except:
-            try:
-                data = ncreadfile_dic(nchandle, ["F_903"])
-                repl_var(nchandle, "F_903", data["F_903"] + args.fluorometer)
-            except:
-                print("No valid Fluorometer key - F_903 or fWS_973 found")
-
-        # Look for existing program and edit comments / scoot down one level and add new
-        for i in range(1, 10):
-            if ("PROG_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "PROG_CMNT0" +
-                    str(i + 1), global_atts["PROG_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "PROG_CMNT01", __file__.split("/")[-1] + " v" + __version__
-                )
-            if ("EDIT_CMNT0" + str(i)) in global_atts.keys():
-                nchandle.setncattr(
-                    "EDIT_CMNT0" +
-                    str(i + 1), global_atts["EDIT_CMNT0" + str(i)]
-                )
-            else:
-                nchandle.setncattr(
-                    "EDIT_CMNT01",
-                    "Fluorometer offset of: " +
-                    str(args.fluorometer) + " applied",
-                )
+    return [_apply_corrections_job(job) for job in jobs]
 
-        nchandle.close()
+
+"""----------------------------- MAIN -------------------------------------------------"""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Apply corrections from Discreet oxygen or salinity samples"
+    )
+    parser.add_argument(
+        "DataPath",
+        metavar="DataPath",
+        type=str,
+        help="full path to directory for cruise",
+    )
+    parser.add_argument(
+        "--primary_oxygen",
+        nargs="+",
+        type=float,
+        help="apply linear correction to primary oxygen",
+    )
+    parser.add_argument(
+        "--secondary_oxygen",
+        nargs="+",
+        type=float,
+        help="apply linear correction to secondary oxygen",
+    )
+    parser.add_argument(
+        "--primary_salinity",
+        type=float,
+        help="apply offset correction to primary salinity",
+    )
+    parser.add_argument(
+        "--secondary_salinity",
+        type=float,
+        help="apply offset correction to secondary salinity",
+    )
+    parser.add_argument(
+        "--fluorometer",
+        type=float,
+        help="apply offset correction to fluorometer (0.0 - deep noise)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of files to correct in parallel",
+    )
+
+    args = parser.parse_args()
+
+    # get all .nc files from chosen directory
+    full_path = [
+        args.DataPath + x for x in sorted(os.listdir(args.DataPath)) if x.endswith(".nc")
+    ]
+
+    corrections = build_corrections(args)
+    if not corrections:
+        sys.exit("No corrections requested")
+
+    for summary in apply_cruise_corrections(
+        full_path, corrections, max_workers=args.workers
+    ):
+        if summary["error"]:
+            print(f"{summary['file']}: FAILED - {summary['error']}")
+        else:
+            print(
+                f"{summary['file']}: corrected {', '.join(summary['corrected']) or '-'}"
+                f"; skipped {', '.join(summary['skipped']) or '-'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
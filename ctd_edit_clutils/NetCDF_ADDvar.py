@@ -15,6 +15,7 @@
 
  2016-06-10: Update program so that it pulls possible new variables from epic.json file
  2016-12-29: Update to add History attribute
+ 2026-10-17: epickey.json definitions from the cached EPIC key registry
 
 Compatibility:
  ==============
@@ -30,7 +31,7 @@ from netCDF4 import Dataset
 
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 os.sys.path.insert(1, parent_dir)
-import io_utils.ConfigParserLocal as ConfigParserLocal
+from io_utils.EcoFOCI_epickey import get_registry
 
 __author__ = "Shaun Bell"
 __email__ = "shaun.bell@noaa.gov"
@@ -88,9 +89,8 @@ parser.add_argument(
 args = parser.parse_args()
 
 # If these variables are not defined, no data will be archived into the nc file for that parameter.
-EPIC_VARS_dict = ConfigParserLocal.get_config(
-    parent_dir + "/config_files/epickey.json", ftype="json"
-)
+# (epickey.json registry, cached between runs)
+EPIC_VARS_dict = get_registry()
 
 
 ctd_data_files = [x for x in os.listdir(args.sourcedir) if x.endswith(".nc")]
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+
+"""
+ Background:
+ ===========
+ NetCDF_BatchEdit.py
+
+
+ Purpose:
+ ========
+ Apply a list of in place variable edits (blank, add, offset, scale) to every
+    file of a directory or glob in one process, each file opened once.
+    Replaces shell loops relaunching NetCDF_MissingVar.py / NetCDF_ADDvar.py
+    per file and variable.
+
+ Usage:
+ ======
+ python NetCDF_BatchEdit.py /path/to/data/ --blank CTDOST_4220 CTDOXY_4221
+ python NetCDF_BatchEdit.py "/path/to/data/*_ctd.nc" --add CTDOXY_4221 --offset S_41 0.01 --scale O_65 1.02 --workers 4
+
+ Edits are applied in the order given on the command line.  Missing data
+    (>=1e10) is left untouched by offset and scale.
+
+ History:
+ ========
+ 2026-10-17: initial batch editor
+
+ Compatibility:
+ ==============
+ python >=3.8
+ python 2.7 - not supported
+
+"""
+import argparse
+import datetime
+import glob
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# must be python 3.8 or greater
+try:
+    assert sys.version_info >= (3, 8)
+except AssertionError:
+    sys.exit("Must be running python 3.8 or greater")
+
+import numpy as np
+from netCDF4 import Dataset
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(1, parent_dir)
+from io_utils.EcoFOCI_epickey import get_registry
+from io_utils.EcoFOCI_netCDF_read import repl_var
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+__keywords__ = "netCDF", "meta", "header", "QC", "batch", "python3 only"
+
+epic_dims = ("time", "dep", "lat", "lon")
+
+"""--------------------------------Edits-----------------------------------------------"""
+
+
+def blank_var(nchandle, var_name, val=1e35):
+    repl_var(nchandle, var_name, val=val)
+    return f"Removed {var_name} from datastream"
+
+
+def add_var(nchandle, var_name):
+    """new EPIC variable (attributes from epickey.json) filled with 1e35"""
+    epic_var = get_registry().lookup(var_name)
+    # dimensions of the file's record variables
+    dims = next(
+        (v.dimensions for v in nchandle.variables.values() if v.ndim == 4), epic_dims
+    )
+    newvar = nchandle.createVariable(
+        epic_var["EPIC_KEY"], "f4", dims, fill_value=1e35
+    )
+    newvar.setncattr("name", epic_var["NAME"])
+    newvar.long_name = epic_var["LONGNAME"]
+    newvar.generic_name = epic_var["GENERIC_NAME"]
+    newvar.units = epic_var["UNITS"]
+    newvar.FORTRAN_format = epic_var["FORMAT"]
+    newvar.epic_code = int(epic_var["KEY"])
+    return f"{epic_var['EPIC_KEY']} added"
+
+
+def _apply_valid(nchandle, var_name, function):
+    data = np.ma.filled(nchandle.variables[var_name][:], 1e35)
+    valid = data < 1e10
+    data[valid] = function(data[valid])
+    nchandle.variables[var_name][:] = data
+
+
+def offset_var(nchandle, var_name, offset):
+    _apply_valid(nchandle, var_name, lambda x: x + offset)
+    return f"{var_name} offset of: {offset} applied"
+
+
+def scale_var(nchandle, var_name, factor):
+    _apply_valid(nchandle, var_name, lambda x: x * factor)
+    return f"{var_name} scale factor of: {factor} applied"
+
+
+# operation: (function, variable must exist in the file)
+operations = {
+    "blank": (blank_var, True),
+    "add": (add_var, False),
+    "offset": (offset_var, True),
+    "scale": (scale_var, True),
+}
+
+
+def add_history(nchandle, history):
+    histtime = datetime.datetime.utcnow()
+    line = "{histtime:%B %d, %Y %H:%M} UTC - {history}".format(
+        histtime=histtime, history=history
+    )
+    if "History" in nchandle.ncattrs():
+        nchandle.setncattr("History", nchandle.getncattr("History") + "\n" + line)
+    else:
+        nchandle.setncattr("History", line)
+
+
+def edit_file(ncfile, edits):
+    """Apply every edit (operation, variable, *values) to ncfile with a single open
+
+    Returns a summary dictionary of the edits applied and skipped.
+    """
+    summary = {"file": ncfile, "edited": [], "skipped": [], "error": None}
+
+    try:
+        nchandle = Dataset(ncfile, "a")
+    except (IOError, OSError) as e:
+        summary["error"] = str(e)
+        return summary
+
+    try:
+        history = []
+        for op, var_name, *values in edits:
+            function, must_exist = operations[op]
+            if (var_name in nchandle.variables) != must_exist:
+                summary["skipped"].append(f"{op} {var_name}")
+                continue
+            history.append(function(nchandle, var_name, *values))
+            summary["edited"].append(f"{op} {var_name}")
+
+        if history:
+            add_history(nchandle, "; ".join(history))
+    except Exception as e:
+        summary["error"] = str(e)
+    finally:
+        nchandle.close()
+
+    return summary
+
+
+def _edit_file_job(job):
+    """process pool entry point for edit_file"""
+    return edit_file(*job)
+
+
+def edit_files(ncfiles, edits, max_workers=1):
+    """Apply edits to every file, optionally across processes"""
+    jobs = [(ncfile, edits) for ncfile in ncfiles]
+
+    if max_workers is None or max_workers > 1:
+        if "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+        else:
+            mp_context = None
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp_context
+        ) as executor:
+            return list(executor.map(_edit_file_job, jobs))
+
+    return [_edit_file_job(job) for job in jobs]
+
+
+def source_files(sourcepath):
+    """.nc files of a directory, or the files matching a glob"""
+    if os.path.isdir(sourcepath):
+        return sorted(
+            os.path.join(sourcepath, x)
+            for x in os.listdir(sourcepath)
+            if x.endswith(".nc")
+        )
+    return sorted(glob.glob(sourcepath))
+
+
+class EditAction(argparse.Action):
+    """collect edits of every operation in command line order"""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        edits = getattr(namespace, "edits", None) or []
+        op = self.dest
+        if op in ["blank", "add"]:
+            edits += [(op, var_name) for var_name in values]
+        else:
+            try:
+                edits.append((op, values[0], float(values[1])))
+            except ValueError:
+                parser.error(f"--{op} expects a variable and a number")
+        setattr(namespace, "edits", edits)
+
+
+"""----------------------------- MAIN -------------------------------------------------"""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Blank, add, offset or scale variables in many .nc files at once"
+    )
+    parser.add_argument(
+        "sourcepath",
+        metavar="sourcepath",
+        type=str,
+        help="directory of .nc files or a quoted glob",
+    )
+    parser.add_argument(
+        "--blank",
+        nargs="+",
+        action=EditAction,
+        metavar="VariableName",
+        help="replace variables with 1e35 for all depths",
+    )
+    parser.add_argument(
+        "--add",
+        nargs="+",
+        action=EditAction,
+        metavar="EPIC_Key",
+        help="add epic variables (filled with 1e35) defined in epickey.json",
+    )
+    parser.add_argument(
+        "--offset",
+        nargs=2,
+        action=EditAction,
+        metavar=("VariableName", "offset"),
+        help="add offset to a variable",
+    )
+    parser.add_argument(
+        "--scale",
+        nargs=2,
+        action=EditAction,
+        metavar=("VariableName", "factor"),
+        help="multiply a variable by factor",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of files to edit in parallel",
+    )
+
+    args = parser.parse_args()
+
+    edits = getattr(args, "edits", None)
+    if not edits:
+        sys.exit("No edits requested")
+
+    ncfiles = source_files(args.sourcepath)
+    if not ncfiles:
+        sys.exit(f"No .nc files found for {args.sourcepath}")
+
+    for summary in edit_files(ncfiles, edits, max_workers=args.workers):
+        if summary["error"]:
+            print(f"{summary['file']}: FAILED - {summary['error']}")
+        else:
+            print(
+                f"{summary['file']}: {', '.join(summary['edited']) or '-'}"
+                f"; skipped {', '.join(summary['skipped']) or '-'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
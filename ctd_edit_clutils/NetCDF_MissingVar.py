@@ -20,6 +20,7 @@
  History:
  ========
  2019-08-15: Python 3 print statments and f-strings
+ 2026-10-17: shared repl_var (writes 1e35 without reading the variable)
 
  Compatibility:
  ==============
@@ -40,9 +41,12 @@ except AssertionError:
     sys.exit("Must be running python 3.8 or greater")
 
 
-import numpy as np
 from netCDF4 import Dataset
 
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(1, parent_dir)
+from io_utils.EcoFOCI_netCDF_read import repl_var
+
 __author__ = "Shaun Bell"
 __email__ = "shaun.bell@noaa.gov"
 __created__ = datetime.datetime(2014, 1, 29)
@@ -69,13 +73,6 @@ def get_vars(nchandle):
     return nchandle.variables
 
 
-def repl_var(nchandle, var_name, val=1e35):
-    nchandle.variables[var_name][:] = (
-        np.ones_like(nchandle.variables[var_name][:]) * val
-    )
-    return
-
-
 """------------------------------- MAIN--------------------------------------------"""
 
 parser = argparse.ArgumentParser(
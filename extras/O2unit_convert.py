@@ -12,6 +12,9 @@ Used for discreet oxygen samples from Mordy
 History:
 =======
 
+2026-10-17: columnar conversion of every row and sensor at once, results written to
+    a csv (or a new sheet of an .xlsx) instead of printed one sample at a time
+
 202-01-03 S.Bell: AGAIN CORRECTED.  Sigma-T by definition is standard atmos pressure so dens0
 2018-04-25 S.Bell: CORRECTED.  Use dens insted of pden and dens0 for general corrections.
     (should be pretty small correction). (maybe potential density is more appropiate but I
@@ -28,6 +31,7 @@ python 2.7
 """
 import argparse
 import datetime
+import os
 
 import pandas as pd
 import seawater as sw
@@ -51,38 +55,79 @@ def O2_conv(S, T, P, O2conc):
     return O2conc
 
 
+# sensor: (salinity column, temperature column)
+sensor_columns = {"pri": ("Sal00", "T090C"), "sec": ("Sal11", "T190C")}
+pressure_column = "PrDM"
+oxygen_column = "O2 (uM/l)"
+
+
+def convert(df, sensors=("pri", "sec")):
+    """umol/l to umol/kg and sigma-t for all rows of df and each sensor
+
+    Returns a copy of df with 'O2 (uM/kg) {sensor}' and 'sigma-t {sensor}'
+    columns added.
+    """
+    df = df.copy()
+    P = df[pressure_column].to_numpy(dtype=float)
+    O2conc = df[oxygen_column].to_numpy(dtype=float)
+    for sensor in sensors:
+        sal, temp = sensor_columns[sensor]
+        S = df[sal].to_numpy(dtype=float)
+        T = df[temp].to_numpy(dtype=float)
+        df[f"O2 (uM/kg) {sensor}"] = O2_conv(S=S, T=T, P=P, O2conc=O2conc)
+        df[f"sigma-t {sensor}"] = sw.eos80.dens0(s=S, t=T) - 1000.0
+    return df
+
+
 """----------------------------- Main -------------------------------------"""
 parser = argparse.ArgumentParser(description="Discreet Oxygen Unit Conversion")
 parser.add_argument("DataPath", metavar="DataPath", type=str, help="full path to file")
 parser.add_argument(
     "sheetname", metavar="sheetname", type=str, help="sheetname in excel file"
 )
-parser.add_argument("-p", "--primary", action="store_true", help="primary instruments")
 parser.add_argument(
-    "-s", "--secondary", action="store_true", help="secondary instruments"
+    "-p",
+    "--primary",
+    action="store_true",
+    help="primary instruments (without -p or -s both sensors are converted)",
+)
+parser.add_argument(
+    "-s",
+    "--secondary",
+    action="store_true",
+    help="secondary instruments (without -p or -s both sensors are converted)",
+)
+parser.add_argument(
+    "-o",
+    "--outfile",
+    type=str,
+    help="output .csv (default: DataPath_sheetname_O2.csv) or .xlsx (results written to a sheetname_O2 sheet)",
 )
 args = parser.parse_args()
+if args.outfile and args.outfile.endswith(".xls"):
+    parser.error("pandas can't write .xls files, use .xlsx or .csv")
+
+sensors = [
+    sensor
+    for sensor, flag in [("pri", args.primary), ("sec", args.secondary)]
+    if flag
+] or ["pri", "sec"]
 
 df = pd.read_excel(args.DataPath, sheet_name=args.sheetname)
+df = convert(df, sensors)
 
-print("umol/l to umol/kg \n")
-for i in df.index:
-    if args.primary:
-        print(
-            O2_conv(
-                S=df.Sal00[i], T=df.T090C[i], P=df.PrDM[i], O2conc=df["O2 (uM/l)"][i]
-            )
-        )
-    if args.secondary:
-        print(
-            O2_conv(
-                S=df.Sal11[i], T=df.T190C[i], P=df.PrDM[i], O2conc=df["O2 (uM/l)"][i]
-            )
-        )
-
-print("sigma-t")
-for i in df.index:
-    if args.primary:
-        print(sw.eos80.dens0(s=df.Sal00[i], t=df.T090C[i]) - 1000.0)
-    if args.secondary:
-        print(sw.eos80.dens0(s=df.Sal11[i], t=df.T190C[i]) - 1000.0)
+outfile = args.outfile or "{0}_{1}_O2.csv".format(
+    os.path.splitext(args.DataPath)[0], args.sheetname
+)
+if outfile.endswith(".xlsx"):
+    # rerunning replaces the results sheet written last time
+    if os.path.exists(outfile):
+        writer = pd.ExcelWriter(outfile, mode="a", if_sheet_exists="replace")
+    else:
+        writer = pd.ExcelWriter(outfile, mode="w")
+    with writer:
+        df.to_excel(writer, sheet_name=args.sheetname + "_O2", index=False)
+else:
+    df.to_csv(outfile, index=False)
+
+print("umol/l to umol/kg and sigma-t of {0} samples written to {1}".format(len(df), outfile))
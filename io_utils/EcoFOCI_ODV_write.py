@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+"""
+ Background:
+ ===========
+ EcoFOCI_ODV_write.py
+
+ Purpose:
+ ========
+ Streaming writer for ODV (Ocean Data View) generic spreadsheets from EPIC cast
+ files.  Each cast is formatted as a whole (pandas to_csv) and written to a
+ buffered, optionally gzip compressed, file one cast at a time.
+
+ Usage:
+ ======
+ with ODVWriter('dy1707_odv.txt.gz') as odv:
+     for ncfile in ncfiles:
+         header_vals, columns = read_cast_columns(ncfile, variables)
+         odv.write_cast(header_vals, columns)
+
+ History:
+ ========
+ 2026-10-17: replaces the per cell print output of CTD_nc2odv.py and CTD_BTL_nc2odv.py
+
+ Compatibility:
+ ==============
+ python >=3.6
+"""
+
+import datetime
+import gzip
+import io
+import os
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(1, parent_dir)
+from calc.EPIC2Datetime import EPIC2Datetime
+from io_utils.EcoFOCI_netCDF_read import EcoFOCI_netCDF
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+__keywords__ = "netCDF", "CTD", "ODV", "export"
+
+
+standard_header = [
+    "cruise",
+    "cast",
+    "type",
+    "station_number",
+    "station_name",
+    "ctd_type",
+    "yyyy-mm-dd hh:mm",
+    "longitude [degrees east]",
+    "latitude [degrees north]",
+    "Bot. Depth [m]",
+]
+
+# variables that are not on the depth dimension
+station_vars = ["lat", "lon", "time", "time2"]
+
+
+def station_header_values(global_atts, ncdata, bad_date="2020-12-25 00:00"):
+    """ODV station (metadata) column values for a cast"""
+    standard_header_val = ["", "", "1", "", "", "std", "", "", "", ""]
+
+    standard_header_val[0] = global_atts.get("CRUISE", "")
+    standard_header_val[1] = global_atts.get("CAST", "")
+    standard_header_val[3] = global_atts.get("STATION_NUMBER", "no_number")
+    standard_header_val[4] = global_atts.get("STATION_NAME", "no_name")
+    standard_header_val[9] = str(global_atts.get("WATER_DEPTH", ""))
+
+    # from dimensions
+    standard_header_val[7] = str(-1 * np.ravel(ncdata["lon"])[0])
+    standard_header_val[8] = str(np.ravel(ncdata["lat"])[0])
+    try:
+        date_raw = EPIC2Datetime(
+            [np.ravel(ncdata["time"])[0]], [np.ravel(ncdata["time2"])[0]]
+        )[0]
+        standard_header_val[6] = ("{:%Y-%m-%d %H:%M}").format(date_raw)
+    except (ValueError, OverflowError):
+        standard_header_val[6] = bad_date
+
+    return standard_header_val
+
+
+def read_cast_columns(ncfile, variables=None):
+    """Station header values and depth columns (sorted by name) of one EPIC cast file
+
+    Only the requested variables (all if None) are read, each as its
+    [0, :, 0, 0] profile.
+    """
+    df = EcoFOCI_netCDF(ncfile, mode="r")
+    try:
+        global_atts = df.get_global_atts()
+        params = None if variables is None else list(variables) + station_vars
+        ncdata = df.ncreadfile_lazy(params=params, index=(0, slice(None), 0, 0))
+
+        header_vals = station_header_values(global_atts, ncdata)
+        columns = OrderedDict(
+            (var, np.ravel(ncdata[var]))
+            for var in sorted(ncdata.keys())
+            if var not in station_vars
+        )
+    finally:
+        df.close()
+
+    return header_vals, columns
+
+
+class ODVWriter(object):
+    """Buffered ODV spreadsheet writer, one cast at a time.
+
+    A header line is written before the first cast and whenever the set
+    of data columns changes from the previous cast.
+    """
+
+    def __init__(self, outfile=None, compress=None, float_format=None):
+        """
+        Parameters
+        ----------
+        outfile : str
+            output path, stdout if None.
+        compress : bool
+            gzip the output, defaults to True when outfile ends with .gz
+        float_format : str
+            optional format for data columns (eg '%.4f'), default matches str()
+        """
+        if compress is None:
+            compress = outfile is not None and outfile.endswith(".gz")
+
+        if outfile is None:
+            self.fid, self._owns_fid = sys.stdout, False
+        elif compress:
+            self.fid = io.TextIOWrapper(
+                io.BufferedWriter(gzip.open(outfile, "wb"), buffer_size=1 << 20),
+            )
+            self._owns_fid = True
+        else:
+            self.fid = open(outfile, "w", buffering=1 << 20)
+            self._owns_fid = True
+
+        self.float_format = float_format
+        self._columns = None
+
+    def write_cast(self, standard_header_val, columns):
+        """write all depths of a cast
+
+        standard_header_val : list of the ODV station column values
+        columns : ordered mapping of column name -> 1D data array
+        """
+        names = list(columns.keys())
+        nrows = max([len(v) for v in columns.values()] + [0])
+        if nrows == 0:
+            return
+
+        frame = pd.DataFrame(
+            OrderedDict(
+                [(h, [v] * nrows) for h, v in zip(standard_header, standard_header_val)]
+                + [(name, _column(columns[name], nrows)) for name in names]
+            )
+        )
+        # duplicate names are allowed in ODV spreadsheets
+        frame.columns = standard_header + names
+
+        frame.to_csv(
+            self.fid,
+            sep="\t",
+            header=names != self._columns,
+            index=False,
+            float_format=self.float_format,
+        )
+        self._columns = names
+
+    def close(self):
+        if self._owns_fid:
+            self.fid.close()
+        else:
+            self.fid.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _column(values, nrows):
+    """pad a column to nrows with empty cells (eg. bottles without a ctd depth)"""
+    values = np.ma.filled(np.ma.asarray(values), np.nan)
+    if len(values) == nrows:
+        return values
+    out = np.empty(nrows, dtype=object)
+    out[:] = ""
+    out[: len(values)] = values
+    return out
@@ -0,0 +1,491 @@
+#!/usr/bin/env python
+
+"""
+ Background:
+ ===========
+ EcoFOCI_btl_report.py
+
+ Purpose:
+ ========
+ Shared ingestion of the cruise bottle report (.report_btl, the concatenated
+ seabird .btl files) and of the discrete lab files (nutrient, oxygen) that are
+ matched to it by cast and niskin bottle.
+
+ Usage:
+ ======
+ reportdf = read_report_btl('dy1707l1.report_btl')       # cached after the first read
+ merged = merge_on_cast_niskin(labdf, reportdf)
+
+ Notes:
+ ======
+ Casts in the report are named ctdxxx, keys are the integer (cast, niskin)
+ pairs (CastNum, nb).  Lab files carry the cast number and niskin in the
+ 'cast' and 'niskin' columns.
+
+ History:
+ ========
+ 2026-10-17: vectorized cast/niskin keys and join (from BTL_ncgen, Nut_ncgen,
+    BTLoxy_ncgen)
+ 2026-10-17: report parsed with fixed dtypes/date format and cached in a sidecar
+ 2026-10-17: per cast archive products for all datasets in one pass (ncgen.py)
+ 2026-10-17: lab files read with the C parser (sniffed delimiter), normalized labels
+
+ Compatibility:
+ ==============
+ python >=3.6
+"""
+
+import datetime
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(1, parent_dir)
+from calc.EPIC2Datetime import Datetime642EPIC
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+__keywords__ = "bottle", "discreet", "report_btl", "niskin"
+
+
+key_names = ["CastNum", "nb"]
+
+# report columns that are not floats
+report_dtypes = {"cast": str, "date": str, "time": str, "nb": "int64"}
+report_date_format = "%Y%m%d %H:%M:%S"
+
+cache_formats = ["pickle", "parquet", "feather"]
+
+# lab file key columns (after normalize_label, any case)
+lab_key_dtypes = {"cast": str, "niskin": str}
+
+
+def parse_report_btl(btlpath):
+    """Bottle report (whitespace delimited, date and time columns) as a dataframe
+
+    Text columns and the bottle number have fixed dtypes, every other column is
+    read as float.  date and time are combined into a date_time column with the
+    report format (yyyymmdd hh:mm:ss), other formats fall back to inference.
+    """
+    columns = pd.read_csv(btlpath, sep=r"\s+", nrows=0).columns
+    dtypes = dict((name, "f8") for name in columns)
+    dtypes.update(dict((k, v) for k, v in report_dtypes.items() if k in columns))
+    try:
+        reportdf = pd.read_csv(btlpath, sep=r"\s+", dtype=dtypes)
+    except ValueError:
+        # unexpected text column, let pandas infer the others
+        reportdf = pd.read_csv(
+            btlpath,
+            sep=r"\s+",
+            dtype=dict((k, v) for k, v in report_dtypes.items() if k in columns),
+        )
+
+    date_time = reportdf.pop("date") + " " + reportdf.pop("time")
+    try:
+        date_time = pd.to_datetime(date_time, format=report_date_format)
+    except ValueError:
+        date_time = pd.to_datetime(date_time)
+    reportdf.insert(0, "date_time", date_time)
+
+    return reportdf
+
+
+def _file_sha1(path, blocksize=1 << 20):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as fid:
+        for block in iter(lambda: fid.read(blocksize), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def _write_cache(reportdf, cache_file, cache_format):
+    if cache_format == "parquet":
+        reportdf.to_parquet(cache_file)
+    elif cache_format == "feather":
+        reportdf.reset_index(drop=True).to_feather(cache_file)
+    else:
+        reportdf.to_pickle(cache_file)
+
+
+def _read_cache(cache_file, cache_format):
+    if cache_format == "parquet":
+        return pd.read_parquet(cache_file)
+    elif cache_format == "feather":
+        return pd.read_feather(cache_file)
+    return pd.read_pickle(cache_file)
+
+
+def _write_meta(meta_file, key):
+    with open(meta_file, "w") as fid:
+        json.dump(key, fid)
+
+
+def read_report_btl(btlpath, cache_format="pickle", verbose=False):
+    """Bottle report as a dataframe, parsed once and cached in a sidecar file
+
+    The parsed report is stored next to the report (<report>.<cache_format>)
+    with a small json file holding the report mtime, size and sha1.  The cache
+    is used as is when mtime and size are unchanged, or when the content hash
+    still matches (eg. the report was copied or touched).
+
+    Parameters
+    ----------
+    btlpath : str
+        full path to .report_btl
+    cache_format : str
+        'pickle' (default), 'parquet' or 'feather' (parquet and feather need
+        pyarrow, pickle is used without it), None to always parse
+    """
+    if cache_format is None:
+        return parse_report_btl(btlpath)
+    if cache_format not in cache_formats:
+        raise ValueError(
+            "cache_format must be one of {}".format(", ".join(cache_formats))
+        )
+    if cache_format in ["parquet", "feather"]:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("pyarrow not available, caching {} as pickle".format(btlpath))
+            cache_format = "pickle"
+
+    cache_file = "{0}.{1}".format(btlpath, cache_format)
+    meta_file = btlpath + ".cache.json"
+    stat = os.stat(btlpath)
+    key = {
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "format": cache_format,
+        "version": __version__,
+    }
+
+    try:
+        with open(meta_file) as fid:
+            meta = json.load(fid)
+    except (IOError, OSError, ValueError):
+        meta = {}
+
+    if os.path.exists(cache_file) and all(
+        meta.get(k) == key[k] for k in ["size", "format", "version"]
+    ):
+        if meta.get("mtime") == key["mtime"]:
+            if verbose:
+                print("Reading cached report {}".format(cache_file))
+            return _read_cache(cache_file, cache_format)
+        key["sha1"] = _file_sha1(btlpath)
+        if meta.get("sha1") == key["sha1"]:
+            if verbose:
+                print("Reading cached report {}".format(cache_file))
+            reportdf = _read_cache(cache_file, cache_format)
+            _write_meta(meta_file, key)
+            return reportdf
+
+    reportdf = parse_report_btl(btlpath)
+    key.setdefault("sha1", _file_sha1(btlpath))
+    try:
+        _write_cache(reportdf, cache_file, cache_format)
+        _write_meta(meta_file, key)
+    except (IOError, OSError) as e:
+        print("Report cache not written: {}".format(e))
+
+    return reportdf
+
+
+def cast_numbers(casts):
+    """Integer cast numbers from cast names (ctd001, CTD001 -> 1)
+
+    Raises ValueError if a name doesn't end with a number after 'ctd'
+    """
+    number = pd.Series(casts).astype(str).str.lower().str.split("ctd").str[-1]
+    return pd.to_numeric(number, errors="raise").astype(int)
+
+
+def add_cast_keys(reportdf):
+    """Add the integer CastNum column to a bottle report and sort by (cast, niskin)"""
+    reportdf["CastNum"] = cast_numbers(reportdf["cast"]).values
+    reportdf.sort_values(key_names, inplace=True, kind="mergesort")
+    return reportdf
+
+
+def merge_on_cast_niskin(
+    labdf, reportdf, cast="cast", niskin="niskin", verbose=True, indicator=False
+):
+    """Outer join of lab samples and bottle report rows on the (cast, niskin) pair
+
+    The join is on an integer (CastNum, nb) MultiIndex.  Columns found in both
+    inputs get the _x (lab) and _y (report) suffixes, eg. cast_x and cast_y.
+    Lab rows without a usable cast/niskin number are dropped, they and the lab
+    samples without a bottle report row are printed as one table.
+
+    Returns
+    -------
+    merged dataframe sorted by cast and niskin, CastNum and nb as columns.
+    With indicator, a _merge column ('left_only' lab, 'right_only' report,
+    'both') as in pandas.merge
+    """
+    if "CastNum" not in reportdf.columns:
+        reportdf = add_cast_keys(reportdf.copy())
+
+    lab_keys = pd.DataFrame(
+        {
+            "CastNum": pd.to_numeric(labdf[cast], errors="coerce").values,
+            "nb": pd.to_numeric(labdf[niskin], errors="coerce").values,
+        }
+    )
+    bad_keys = lab_keys.isnull().any(axis=1).values
+    if verbose and bad_keys.any():
+        print("Lab rows without a cast/niskin number (skipped):")
+        print(labdf.loc[bad_keys].to_string())
+
+    lab = labdf.loc[~bad_keys].copy()
+    lab.index = pd.MultiIndex.from_arrays(
+        [
+            lab_keys["CastNum"].values[~bad_keys].astype(int),
+            lab_keys["nb"].values[~bad_keys].astype(int),
+        ],
+        names=key_names,
+    )
+    report = reportdf.set_index(key_names)
+
+    if verbose:
+        lab_only = ~lab.index.isin(report.index)
+        if lab_only.any():
+            print(
+                "Lab samples without a bottle report row: {}".format(lab_only.sum())
+            )
+            print(lab.loc[lab_only].to_string())
+        report_only = ~report.index.isin(lab.index)
+        if report_only.any():
+            print(
+                "Bottles without lab samples: {0} in {1} casts".format(
+                    report_only.sum(),
+                    np.unique(report.index.get_level_values("CastNum")[report_only]).size,
+                )
+            )
+
+    merged = lab.join(report, how="outer", lsuffix="_x", rsuffix="_y")
+    merged.sort_index(inplace=True, kind="mergesort")
+    if indicator:
+        in_lab = merged.index.isin(lab.index)
+        in_report = merged.index.isin(report.index)
+        merged["_merge"] = np.where(
+            in_lab & in_report, "both", np.where(in_lab, "left_only", "right_only")
+        )
+
+    return merged.reset_index()
+
+
+"""------------------------------- Archive products ---------------------------------"""
+
+# per cast products of the bottle report and the discrete lab files
+#   suffix : output file ending
+#   columns : default EPIC key -> column label, a 'lab_label' (or 'sbe_label' for
+#       report columns) in the EPIC config takes precedence
+#   bottles : 'report' every bottle of the cast, 'matched' only sampled bottles
+archive_products = {
+    "btl": {
+        "suffix": "_btl.nc",
+        "history": "File created by archiving bottle report files",
+        "columns": {},
+        "bottles": "report",
+    },
+    "nut": {
+        "suffix": "_nut.nc",
+        "history": "File created by merging nutrient analysis and bottle report files",
+        "columns": {
+            "NH4_189": "NH4 (uM)",
+            "NO3_182": "NO3 (uM)",
+            "SI_188": "Sil (uM)",
+            "PO4_186": "PO4 (uM)",
+            "NO2_184": "NO2 (uM)",
+            "BTL_103": "nb",
+        },
+        "bottles": "report",
+    },
+    "oxy": {
+        "suffix": "_oxy.nc",
+        "history": "File created by merging oxygen analysis and bottle report files",
+        "columns": {"BO_61": "O2 uM/l", "BTL_103": "nb"},
+        "bottles": "matched",
+    },
+}
+
+
+def sniff_delimiter(labpath):
+    """tab or comma, whichever is more frequent on the header line"""
+    with open(labpath, "r", errors="replace") as fid:
+        header = fid.readline()
+    return "\t" if header.count("\t") > header.count(",") else ","
+
+
+def normalize_label(label):
+    """column label without surrounding white space, quotes or byte order mark
+    ('"O2 uM/l" ' -> 'O2 uM/l')"""
+    label = str(label).replace("\ufeff", "").strip()
+    while len(label) > 1 and label[0] == label[-1] and label[0] in "\"'":
+        label = label[1:-1].strip()
+    return label
+
+
+def read_lab_csv(labpath, dtype=None):
+    """Discrete lab file (tab or comma delimited) with cast/niskin columns
+
+    The delimiter is detected on the header line and the file is read with the
+    C parser.  Cast and niskin are kept as text (blank or named bucket samples
+    are allowed), other known columns take the dtype passed (label -> dtype,
+    after normalize_label).  Column labels are normalized and Cast/Niskin
+    renamed to cast/niskin.
+    """
+    sep = sniff_delimiter(labpath)
+    names = {}
+    for col in pd.read_csv(labpath, sep=sep, nrows=0).columns:
+        label = normalize_label(col)
+        names[col] = label.lower() if label.lower() in lab_key_dtypes else label
+    lab_dtypes = dict(lab_key_dtypes, **(dtype or {}))
+
+    labdf = pd.read_csv(
+        labpath,
+        sep=sep,
+        dtype=dict(
+            (col, lab_dtypes[name]) for col, name in names.items() if name in lab_dtypes
+        ),
+        engine="c",
+    )
+    labdf.rename(columns=names, inplace=True)
+    return labdf
+
+
+def column_labels(product, EPIC_VARS_dict, columns, verbose=True):
+    """EPIC key -> column label for the EPIC variables available in columns
+
+    Missing labels are reported once for the whole dataset.
+    """
+    defaults = archive_products.get(product, {}).get("columns", {})
+    labels = {}
+    for key in EPIC_VARS_dict.keys():
+        label = (
+            EPIC_VARS_dict[key].get("lab_label")
+            or EPIC_VARS_dict[key].get("sbe_label")
+            or defaults.get(key)
+        )
+        if not label:
+            if verbose:
+                print("{0}: {1} as defined not in config file".format(product, key))
+        elif label in columns:
+            labels[key] = label
+        elif verbose:
+            print("{0}: {1} as defined not in data file".format(product, label))
+
+    return labels
+
+
+def cast_profile(product, tdata, labels, cruise, raw_data_file, output):
+    """write_profile keywords (see NetCDF_Create_Profile_Batch) for one cast
+
+    tdata are the rows of one cast from the bottle report (or a lab file merged
+    with it), labels the EPIC key -> column mapping from column_labels
+    """
+    cast_col = "cast_y" if "cast_y" in tdata.columns else "cast"
+    cast = str(tdata[cast_col].dropna().iloc[0])
+    depth_col = "PrDM" if "PrDM" in tdata.columns else "PrSM"
+
+    data_dic = {"dep": tdata[depth_col].values}
+    for key, label in labels.items():
+        data_dic[key] = tdata[label].values
+
+    time1, time2 = np.array(
+        Datetime642EPIC(tdata["date_time"].values.astype("datetime64[ms]")),
+        dtype="f8",
+    )
+
+    return {
+        "savefile": os.path.join(
+            output,
+            cruise.lower()
+            + cast.lower().replace("ctd", "c")
+            + archive_products.get(product, {}).get("suffix", "_" + product + ".nc"),
+        ),
+        "data_dic": data_dic,
+        "depth": data_dic["dep"],
+        "latitude": 1e35,
+        "longitude": 1e35,
+        "time1": time1[0],
+        "time2": time2[0],
+        "global_atts": {
+            "raw_data_file": raw_data_file,
+            "CruiseID": cruise.lower(),
+            "Cast": cast,
+        },
+        "history": archive_products.get(product, {}).get(
+            "history", "File created by merging {} and bottle report files".format(product)
+        ),
+    }
+
+
+def archive_profiles(reportdf, datasets, cruise, output, verbose=True):
+    """write_profile keywords for every cast of every product in one pass
+
+    Parameters
+    ----------
+    reportdf : dataframe
+        bottle report (read_report_btl), with or without CastNum
+    datasets : list of dictionaries
+        {'product': 'nut', 'data': labdf or None (the report itself),
+         'EPIC_VARS_dict': ..., 'raw_data_file': ...}
+
+    Returns
+    -------
+    list of (dataset, profile) in cast order
+    """
+    if "CastNum" not in reportdf.columns:
+        reportdf = add_cast_keys(reportdf.copy())
+
+    # one cast grouping shared by every product
+    frames = []
+    for dataset in datasets:
+        product = dataset["product"]
+        if dataset.get("data") is None:
+            frame = reportdf
+        else:
+            if verbose:
+                print("{}: matching on Cast/Niskin pair.".format(product))
+            frame = merge_on_cast_niskin(
+                dataset["data"], reportdf, verbose=verbose, indicator=True
+            )
+            keep = frame["_merge"] != "left_only"
+            if archive_products.get(product, {}).get("bottles") == "matched":
+                keep &= frame["_merge"] == "both"
+            frame = frame[keep]
+        labels = column_labels(
+            product, dataset["EPIC_VARS_dict"], frame.columns, verbose=verbose
+        )
+        frames.append((dataset, frame, labels, frame.groupby("CastNum").indices))
+
+    profiles = []
+    for castnum in np.unique(reportdf["CastNum"].values):
+        for dataset, frame, labels, casts in frames:
+            if castnum not in casts:
+                continue
+            profiles.append(
+                (
+                    dataset,
+                    cast_profile(
+                        dataset["product"],
+                        frame.iloc[casts[castnum]],
+                        labels,
+                        cruise,
+                        dataset["raw_data_file"],
+                        output,
+                    ),
+                )
+            )
+
+    return profiles
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+
+"""
+ Background:
+ ===========
+ EcoFOCI_cruise_catalog.py
+
+ Purpose:
+ ========
+ Persistent per cruise directory index of cast files so tools can find casts by
+ position, time, depth or variable without reopening every netcdf file.
+
+ The catalog is a small sqlite file kept next to the data (.ecofoci_catalog.sqlite).
+ Each entry records the file mtime and size, entries are only re-read when
+ either changes and are dropped when the file is gone.
+
+ Usage:
+ ======
+ catalog = CruiseCatalog('/path/to/cruise/ctd/')
+ catalog.update()
+ casts = catalog.query(variables=['O_65'], min_depth=100, lat_range=[54, 60])
+
+ python EcoFOCI_cruise_catalog.py /path/to/cruise/ctd/ -v O_65 -md 100 -lat 54 60
+
+ Notes:
+ ======
+ Longitudes are stored as found in the file (EPIC files are positive west).
+
+ History:
+ ========
+ 2026-10-17: initial catalog
+
+ Compatibility:
+ ==============
+ python >=3.6
+"""
+
+import argparse
+import datetime
+import os
+import sqlite3
+
+import numpy as np
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(1, parent_dir)
+from calc.EPIC2Datetime import EPIC2Datetime64, UDUNITS2Datetime64
+from io_utils.EcoFOCI_netCDF_read import EcoFOCI_netCDF
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+__keywords__ = "netCDF", "CTD", "Cruise", "catalog", "index"
+
+
+CATALOG_NAME = ".ecofoci_catalog.sqlite"
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS casts (
+    file TEXT PRIMARY KEY,
+    mtime REAL,
+    size INTEGER,
+    cruise TEXT,
+    cast TEXT,
+    station TEXT,
+    time TEXT,
+    latitude REAL,
+    longitude REAL,
+    depth_min REAL,
+    depth_max REAL
+);
+CREATE TABLE IF NOT EXISTS cast_vars (
+    file TEXT,
+    variable TEXT,
+    PRIMARY KEY (file, variable)
+);
+CREATE INDEX IF NOT EXISTS cast_vars_variable ON cast_vars (variable);
+"""
+
+depth_keys = ["dep", "depth", "pressure", "P_1"]
+lat_keys = ["lat", "latitude"]
+lon_keys = ["lon", "longitude"]
+
+
+def _first(ncdata, keys):
+    """first non fill value of the first key found in ncdata"""
+    for key in keys:
+        if key in ncdata:
+            value = np.ma.masked_greater_equal(np.ravel(ncdata[key]), 1e30)
+            return None if value.count() == 0 else float(value.compressed()[0])
+    return None
+
+
+def read_cast_entry(ncfile):
+    """Read the catalog entry (globals, position, time, depth range, variables) of one file"""
+    nc = EcoFOCI_netCDF(ncfile, mode="r")
+    try:
+        g_atts = nc.get_global_atts()
+        variables = list(nc.get_vars().keys())
+        ncdata = nc.ncreadfile_lazy(
+            params=depth_keys + lat_keys + lon_keys + ["time", "time2"]
+        )
+
+        depth = None
+        for key in depth_keys:
+            if key in ncdata:
+                depth = np.ma.masked_greater_equal(np.ravel(ncdata[key]), 1e30)
+                break
+
+        cast_time = None
+        if "time" in ncdata and "time2" in ncdata:
+            cast_time = EPIC2Datetime64(ncdata["time"], ncdata["time2"])[0]
+        elif "time" in ncdata:
+            try:
+                units = nc.get_vars_attributes("time").units
+                cast_time = UDUNITS2Datetime64(ncdata["time"], units)[0]
+            except (AttributeError, ValueError):
+                cast_time = None
+
+        entry = {
+            "file": os.path.abspath(ncfile),
+            "mtime": os.path.getmtime(ncfile),
+            "size": os.path.getsize(ncfile),
+            "cruise": str(g_atts.get("CRUISE", "")),
+            "cast": str(g_atts.get("CAST", "")),
+            "station": str(g_atts.get("STATION_NAME", g_atts.get("MOORING", ""))),
+            "time": None if cast_time is None else str(cast_time),
+            "latitude": _first(ncdata, lat_keys),
+            "longitude": _first(ncdata, lon_keys),
+            "depth_min": None
+            if depth is None or depth.count() == 0
+            else float(depth.min()),
+            "depth_max": None
+            if depth is None or depth.count() == 0
+            else float(depth.max()),
+            "variables": variables,
+        }
+    finally:
+        nc.close()
+
+    return entry
+
+
+class CruiseCatalog(object):
+    """sqlite backed index of the cast files in one cruise directory"""
+
+    def __init__(self, data_dir, catalog_file=None, suffix=".nc"):
+        self.data_dir = data_dir
+        self.suffix = suffix
+        self.catalog_file = catalog_file or os.path.join(data_dir, CATALOG_NAME)
+        self.conn = sqlite3.connect(self.catalog_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(CATALOG_SCHEMA)
+
+    def update(self, verbose=False):
+        """Re-read new or changed files and drop removed ones
+
+        Returns the list of files that were (re)read.
+        """
+        on_disk = {}
+        for fi in sorted(os.listdir(self.data_dir)):
+            if fi.endswith(self.suffix):
+                path = os.path.abspath(os.path.join(self.data_dir, fi))
+                stat = os.stat(path)
+                on_disk[path] = (stat.st_mtime, stat.st_size)
+
+        cataloged = {
+            row["file"]: (row["mtime"], row["size"])
+            for row in self.conn.execute("SELECT file, mtime, size FROM casts")
+        }
+
+        removed = [(f,) for f in cataloged if f not in on_disk]
+        stale = [f for f, stamp in on_disk.items() if cataloged.get(f) != stamp]
+
+        with self.conn:
+            self.conn.executemany("DELETE FROM casts WHERE file = ?", removed)
+            self.conn.executemany("DELETE FROM cast_vars WHERE file = ?", removed)
+
+            for ncfile in stale:
+                if verbose:
+                    print("Cataloging {}".format(ncfile))
+                try:
+                    entry = read_cast_entry(ncfile)
+                except (IOError, OSError, RuntimeError) as e:
+                    print("{} - not cataloged: {}".format(ncfile, e))
+                    continue
+
+                variables = entry.pop("variables")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO casts ({}) VALUES ({})".format(
+                        ", ".join(entry.keys()), ", ".join("?" * len(entry))
+                    ),
+                    list(entry.values()),
+                )
+                self.conn.execute("DELETE FROM cast_vars WHERE file = ?", (ncfile,))
+                self.conn.executemany(
+                    "INSERT INTO cast_vars (file, variable) VALUES (?, ?)",
+                    [(ncfile, v) for v in variables],
+                )
+
+        return stale
+
+    def query(
+        self,
+        variables=None,
+        min_depth=None,
+        lat_range=None,
+        lon_range=None,
+        time_range=None,
+        station=None,
+    ):
+        """Casts matching every criteria passed
+
+        Parameters
+        ----------
+        variables : list
+            variables that must all be in the file
+        min_depth : float
+            casts whose deepest value is at least min_depth
+        lat_range, lon_range : [min, max]
+            position bounds (longitude as stored in the file)
+        time_range : [start, end]
+            iso strings or datetimes
+        station : str
+            station name
+
+        Returns
+        -------
+        list of dictionaries, one per cast, ordered by time
+        """
+        where, values = [], []
+        for var in variables or []:
+            where.append(
+                "file IN (SELECT file FROM cast_vars WHERE variable = ?)"
+            )
+            values.append(var)
+        if min_depth is not None:
+            where.append("depth_max >= ?")
+            values.append(min_depth)
+        if lat_range is not None:
+            where.append("latitude BETWEEN ? AND ?")
+            values.extend(lat_range)
+        if lon_range is not None:
+            where.append("longitude BETWEEN ? AND ?")
+            values.extend(lon_range)
+        if time_range is not None:
+            where.append("time BETWEEN ? AND ?")
+            values.extend([str(np.datetime64(t, "ms")) for t in time_range])
+        if station is not None:
+            where.append("station = ?")
+            values.append(station)
+
+        sql = "SELECT * FROM casts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY time, file"
+
+        return [dict(row) for row in self.conn.execute(sql, values)]
+
+    def files(self, **kwargs):
+        """file paths of query(**kwargs)"""
+        return [row["file"] for row in self.query(**kwargs)]
+
+    def variables(self, ncfile):
+        """variables cataloged for ncfile"""
+        return [
+            row["variable"]
+            for row in self.conn.execute(
+                "SELECT variable FROM cast_vars WHERE file = ?",
+                (os.path.abspath(ncfile),),
+            )
+        ]
+
+    def close(self):
+        self.conn.close()
+
+
+def cruise_files(data_dir, **kwargs):
+    """Update the catalog for data_dir and return the files matching query(**kwargs)"""
+    catalog = CruiseCatalog(data_dir)
+    try:
+        catalog.update()
+        return catalog.files(**kwargs)
+    finally:
+        catalog.close()
+
+
+"""------------------------------- MAIN--------------------------------------------"""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build/refresh and query the cast catalog of a cruise directory"
+    )
+    parser.add_argument(
+        "DataPath", metavar="DataPath", type=str, help="full path to cruise nc files"
+    )
+    parser.add_argument(
+        "-v", "--variables", nargs="+", type=str, help="required variables"
+    )
+    parser.add_argument(
+        "-md", "--min_depth", type=float, help="casts reaching at least this depth"
+    )
+    parser.add_argument(
+        "-lat", "--lat_range", nargs=2, type=float, help="latitude bounds (min max)"
+    )
+    parser.add_argument(
+        "-lon", "--lon_range", nargs=2, type=float, help="longitude bounds (min max)"
+    )
+    parser.add_argument(
+        "-t", "--time_range", nargs=2, type=str, help="time bounds (yyyy-mm-dd)"
+    )
+    parser.add_argument("-st", "--station", type=str, help="station name")
+
+    args = parser.parse_args()
+
+    catalog = CruiseCatalog(args.DataPath)
+    catalog.update(verbose=True)
+    for row in catalog.query(
+        variables=args.variables,
+        min_depth=args.min_depth,
+        lat_range=args.lat_range,
+        lon_range=args.lon_range,
+        time_range=args.time_range,
+        station=args.station,
+    ):
+        print(
+            "{file}\t{cast}\t{station}\t{time}\t{latitude}\t{longitude}\t{depth_max}".format(
+                **row
+            )
+        )
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
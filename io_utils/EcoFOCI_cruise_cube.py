@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+
+"""
+ Background:
+ ===========
+ EcoFOCI_cruise_cube.py
+
+ Purpose:
+ ========
+ Stack every cast of a cruise onto a common pressure grid and keep the result as a
+ single compressed netcdf4 file (cast x depth for each variable) so plotting and
+ export tools can slice the cruise without re-reading each cast file.
+
+ Usage:
+ ======
+ cube = build_cruise_cube(ncfiles, depth_grid=np.arange(0, 301, 1))
+ write_cruise_cube('dy1707_cube.nc', cube)
+ cube = read_cruise_cube('dy1707_cube.nc', variables=['T_28', 'S_41'])
+
+ python EcoFOCI_cruise_cube.py /path/to/cruise/ctd/ dy1707_cube.nc -dz 1 -max 300
+
+ Notes:
+ ======
+ Values are linearly interpolated between the bracketing observations, grid depths
+ outside a cast or next to missing data (>=1e30) are NaN.
+
+ History:
+ ========
+ 2026-10-17: initial cube builder
+
+ Compatibility:
+ ==============
+ python >=3.6
+"""
+
+import argparse
+import datetime
+import os
+
+import numpy as np
+from netCDF4 import Dataset
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(1, parent_dir)
+from calc.EPIC2Datetime import (
+    Datetime642UDUNITS,
+    EPIC2Datetime64,
+    UDUNITS2Datetime64,
+)
+from io_utils.EcoFOCI_netCDF_read import EcoFOCI_netCDF
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+__keywords__ = "netCDF", "CTD", "Cruise", "grid", "cube"
+
+
+coord_keys = [
+    "time",
+    "time2",
+    "dep",
+    "depth",
+    "pressure",
+    "P_1",
+    "lat",
+    "latitude",
+    "lon",
+    "longitude",
+]
+time_units = "days since 1900-1-1"
+
+
+def interp_profile(pressure, values, depth_grid):
+    """Interpolate all variables of one cast onto depth_grid at once
+
+    Parameters
+    ----------
+    pressure : array_like (n,)
+        cast pressure/depth
+    values : array_like (nvar, n)
+        variable data, >= 1e30 is treated as missing
+    depth_grid : array_like (m,)
+
+    Returns
+    -------
+    ndarray (nvar, m), NaN outside the cast or next to missing data
+    """
+    pressure = np.ma.filled(np.ma.asarray(pressure, dtype="f8"), np.nan)
+    values = np.ma.filled(np.ma.asarray(values, dtype="f8"), np.nan)
+    values[values >= 1e30] = np.nan
+    depth_grid = np.asarray(depth_grid, dtype="f8")
+
+    good = np.isfinite(pressure)
+    order = np.argsort(pressure[good], kind="mergesort")
+    pressure = pressure[good][order]
+    values = values[:, good][:, order]
+
+    out = np.full((values.shape[0], depth_grid.size), np.nan)
+    if pressure.size == 0:
+        return out
+    if pressure.size == 1:
+        out[:, depth_grid == pressure[0]] = values[:, :1]
+        return out
+
+    inside = (depth_grid >= pressure[0]) & (depth_grid <= pressure[-1])
+    grid = depth_grid[inside]
+    upper = np.clip(np.searchsorted(pressure, grid, side="left"), 1, pressure.size - 1)
+    lower = upper - 1
+    span = pressure[upper] - pressure[lower]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(span > 0, (grid - pressure[lower]) / span, 0.0)
+    # grid levels that land on an observation take it as is, even next to missing data
+    out[:, inside] = np.where(
+        weight == 1.0,
+        values[:, upper],
+        np.where(
+            weight == 0.0,
+            values[:, lower],
+            values[:, lower] * (1.0 - weight) + values[:, upper] * weight,
+        ),
+    )
+
+    return out
+
+
+def _first_key(keys, ncdata):
+    for key in keys:
+        if key in ncdata:
+            return key
+    return None
+
+
+def build_cruise_cube(ncfiles, depth_grid, variables=None, verbose=False):
+    """Read every cast once and grid it
+
+    Parameters
+    ----------
+    ncfiles : list
+        cast files (EPIC profile files)
+    depth_grid : array_like
+        common pressure/depth grid
+    variables : list, optional
+        variables to grid, default is the union of all non coordinate variables
+
+    Returns
+    -------
+    dictionary with 'depth', 'time' (datetime64[ms]), 'latitude', 'longitude',
+    'cast', 'file' (one per cast) and 'data' {variable: (ncast, ndepth) array}
+    """
+    depth_grid = np.asarray(depth_grid, dtype="f8")
+    casts = []
+    for ncfile in ncfiles:
+        if verbose:
+            print("Reading {}".format(ncfile))
+        nc = EcoFOCI_netCDF(ncfile, mode="r")
+        try:
+            g_atts = nc.get_global_atts()
+            ncdata = nc.ncreadfile_lazy(index=(0, slice(None), 0, 0))
+            names = [
+                v
+                for v in (variables or ncdata.keys())
+                if v in ncdata and v not in coord_keys
+            ]
+            pkey = _first_key(["dep", "depth", "pressure", "P_1"], ncdata)
+            if pkey is None:
+                print("{} - no depth variable, skipped".format(ncfile))
+                continue
+
+            cast = {
+                "file": ncfile,
+                "cast": str(g_atts.get("CAST", "")),
+                "pressure": np.ravel(ncdata[pkey]),
+                "data": {v: np.ravel(ncdata[v]) for v in names},
+                "latitude": np.nan,
+                "longitude": np.nan,
+                "time": np.datetime64("NaT", "ms"),
+            }
+            for key, name in [("lat", "latitude"), ("lon", "longitude")]:
+                key = _first_key([key, name], ncdata)
+                if key is not None:
+                    cast[name] = float(np.ravel(ncdata[key])[0])
+                    if cast[name] >= 1e30:
+                        cast[name] = np.nan
+            if "time" in ncdata and "time2" in ncdata:
+                cast["time"] = EPIC2Datetime64(ncdata["time"], ncdata["time2"])[0]
+            elif "time" in ncdata:
+                try:
+                    cast["time"] = UDUNITS2Datetime64(
+                        ncdata["time"], nc.get_vars_attributes("time").units
+                    )[0]
+                except (AttributeError, ValueError):
+                    pass
+        finally:
+            nc.close()
+        casts.append(cast)
+
+    if variables is None:
+        variables = []
+        for cast in casts:
+            variables += [v for v in cast["data"] if v not in variables]
+
+    data = {v: np.full((len(casts), depth_grid.size), np.nan) for v in variables}
+    for i, cast in enumerate(casts):
+        names = [v for v in variables if v in cast["data"]]
+        if not names:
+            continue
+        gridded = interp_profile(
+            cast["pressure"], np.vstack([cast["data"][v] for v in names]), depth_grid
+        )
+        for v, row in zip(names, gridded):
+            data[v][i, :] = row
+
+    return {
+        "depth": depth_grid,
+        "time": np.array([c["time"] for c in casts], dtype="datetime64[ms]"),
+        "latitude": np.array([c["latitude"] for c in casts], dtype="f8"),
+        "longitude": np.array([c["longitude"] for c in casts], dtype="f8"),
+        "cast": [c["cast"] for c in casts],
+        "file": [os.path.basename(c["file"]) for c in casts],
+        "data": data,
+    }
+
+
+def write_cruise_cube(savefile, cube, complevel=4, history=""):
+    """Write a cube to a compressed, chunked netcdf4 file (one row chunk per cast)"""
+    ncast, ndepth = len(cube["cast"]), cube["depth"].size
+    rootgrpID = Dataset(savefile, "w", format="NETCDF4")
+    try:
+        rootgrpID.CREATION_DATE = datetime.datetime.utcnow().strftime(
+            "%B %d, %Y %H:%M UTC"
+        )
+        rootgrpID.EPIC_FILE_GENERATOR = __file__.split("/")[-1] + " " + __version__
+        rootgrpID.History = history
+
+        rootgrpID.createDimension("cast", ncast)
+        rootgrpID.createDimension("depth", ndepth)
+
+        depth = rootgrpID.createVariable("depth", "f4", ("depth",))
+        depth.units = "dbar"
+        depth[:] = cube["depth"]
+
+        time = rootgrpID.createVariable("time", "f8", ("cast",), fill_value=np.nan)
+        time.units = time_units
+        time[:] = np.where(
+            np.isnat(cube["time"]), np.nan, Datetime642UDUNITS(cube["time"], time_units)
+        )
+        for name, units in [("latitude", "degree_north"), ("longitude", "degree_west")]:
+            var = rootgrpID.createVariable(name, "f8", ("cast",), fill_value=np.nan)
+            var.units = units
+            var[:] = cube[name]
+        for name in ["cast", "file"]:
+            var = rootgrpID.createVariable(name, str, ("cast",))
+            var[:] = np.array(cube[name], dtype=object)
+
+        for name, values in cube["data"].items():
+            var = rootgrpID.createVariable(
+                name,
+                "f4",
+                ("cast", "depth"),
+                zlib=True,
+                complevel=complevel,
+                chunksizes=(1, ndepth),
+                fill_value=np.float32(np.nan),
+            )
+            var[:] = values
+    finally:
+        rootgrpID.close()
+
+    return savefile
+
+
+def read_cruise_cube(cubefile, variables=None, casts=slice(None), depths=slice(None)):
+    """Read (a hyperslab of) a cube written by write_cruise_cube
+
+    Only the requested variables and cast/depth ranges are read from disk.
+    """
+    nc = EcoFOCI_netCDF(cubefile, mode="r")
+    try:
+        ncvars = nc.get_vars()
+        names = [
+            v
+            for v in (variables or ncvars.keys())
+            if v in ncvars and ncvars[v].dimensions == ("cast", "depth")
+        ]
+        cube = {
+            "depth": ncvars["depth"][depths].filled(np.nan),
+            "time": UDUNITS2Datetime64(
+                ncvars["time"][casts].filled(np.nan), ncvars["time"].units
+            ),
+            "latitude": ncvars["latitude"][casts].filled(np.nan),
+            "longitude": ncvars["longitude"][casts].filled(np.nan),
+            "cast": list(ncvars["cast"][casts]),
+            "file": list(ncvars["file"][casts]),
+            "data": {v: ncvars[v][casts, depths].filled(np.nan) for v in names},
+        }
+    finally:
+        nc.close()
+
+    return cube
+
+
+"""------------------------------- MAIN--------------------------------------------"""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Grid all casts of a cruise onto a common depth grid"
+    )
+    parser.add_argument(
+        "DataPath", metavar="DataPath", type=str, help="full path to cruise nc files"
+    )
+    parser.add_argument(
+        "output", metavar="output", type=str, help="full path to output cube file"
+    )
+    parser.add_argument(
+        "-dz", "--depth_interval", type=float, default=1.0, help="grid spacing (dbar)"
+    )
+    parser.add_argument(
+        "-max", "--max_depth", type=float, default=1000.0, help="deepest grid level"
+    )
+    parser.add_argument(
+        "-v", "--variables", nargs="+", type=str, help="variables to grid (default all)"
+    )
+
+    args = parser.parse_args()
+
+    ncfiles = [
+        os.path.join(args.DataPath, fi)
+        for fi in sorted(os.listdir(args.DataPath))
+        if fi.endswith(".nc") and not fi.endswith("_cf_ctd.nc")
+    ]
+    depth_grid = np.arange(0, args.max_depth + args.depth_interval, args.depth_interval)
+
+    cube = build_cruise_cube(
+        ncfiles, depth_grid, variables=args.variables, verbose=True
+    )
+    write_cruise_cube(
+        args.output,
+        cube,
+        history="gridded from {} casts in {}".format(len(cube["cast"]), args.DataPath),
+    )
+
+
+if __name__ == "__main__":
+    main()
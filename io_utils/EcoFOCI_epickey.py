@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+"""
+ Background:
+ ===========
+ EcoFOCI_epickey.py
+
+ Purpose:
+ ========
+ Registry of the EPIC variable definitions in config_files/epickey.json with
+ constant time lookup by EPIC code (20), EPIC key (T_20) and generic name (temp).
+
+ The parsed records (a plain dictionary) are pickled next to the json file
+ (epickey.json.pickle) and reused until the json file changes (mtime or size),
+ so tools only pay for the json parse once.
+
+ Usage:
+ ======
+ registry = get_registry()
+ registry.by_code(20)['LONGNAME']
+ registry.by_key('T_20')['UNITS']
+ [r['EPIC_KEY'] for r in registry.by_generic('temp')]
+ registry.lookup('T_20') / registry.lookup('20') / registry.lookup(20)
+
+ History:
+ ========
+ 2026-10-17: initial registry (replaces json.load of epickey.json in NetCDF_ADDvar)
+
+ Compatibility:
+ ==============
+ python >=3.6
+"""
+
+import datetime
+import json
+import os
+import pickle
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+__keywords__ = "EPIC", "epickey", "registry"
+
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EPICKEY_JSON = os.path.join(parent_dir, "config_files", "epickey.json")
+
+
+class EPICKeyRegistry(object):
+    """EPIC variable definitions indexed by code, EPIC key and generic name
+
+    Records are the epickey.json entries (COMMENTS, EPIC_KEY, FORMAT,
+    GENERIC_NAME, KEY, LONGNAME, NAME, UNITS).
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.codes = {}
+        self.keys = {}
+        self.generic_names = {}
+        for code, record in records.items():
+            self.codes[int(code)] = record
+            self.keys[record["EPIC_KEY"].strip()] = record
+            generic_name = record["GENERIC_NAME"].strip().lower()
+            if generic_name:
+                self.generic_names.setdefault(generic_name, []).append(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        try:
+            self.lookup(name)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, name):
+        return self.lookup(name)
+
+    def by_code(self, code):
+        """record of an EPIC code (int or digit string)"""
+        try:
+            return self.codes[int(code)]
+        except ValueError:
+            raise KeyError(code)
+
+    def by_key(self, key):
+        """record of an EPIC key (eg. T_20)"""
+        return self.keys[key.strip()]
+
+    def by_generic(self, generic_name):
+        """all records of a generic name (eg. temp), empty list if none"""
+        return self.generic_names.get(generic_name.strip().lower(), [])
+
+    def lookup(self, name):
+        """record of an EPIC key (T_20), a code (20, '20') or the code of a
+        suffixed name (T_20 not being a defined key, its code 20)"""
+        if isinstance(name, int):
+            return self.by_code(name)
+        name = str(name).strip()
+        if name in self.keys:
+            return self.keys[name]
+        if name.isdigit():
+            return self.by_code(name)
+        return self.by_code(name.split("_")[-1])
+
+    @classmethod
+    def load(cls, json_file=EPICKEY_JSON, cache_file=None):
+        """registry for json_file, from the pickled cache when it is current
+
+        The cache holds the plain records dictionary, not the registry, so it
+        does not depend on this class.  It is rewritten after a parse, failure
+        to write it (eg. read only install) is ignored.
+        """
+        cache_file = cache_file or json_file + ".pickle"
+        stat = os.stat(json_file)
+        stamp = (stat.st_mtime, stat.st_size, __version__)
+
+        try:
+            with open(cache_file, "rb") as fid:
+                cached_stamp, records = pickle.load(fid)
+            if cached_stamp == stamp and isinstance(records, dict):
+                return cls(records)
+        except (
+            IOError,
+            OSError,
+            EOFError,
+            ValueError,
+            ImportError,
+            AttributeError,
+            pickle.UnpicklingError,
+        ):
+            pass
+
+        with open(json_file) as fid:
+            records = json.load(fid)
+
+        try:
+            tmpfile = "{0}.{1}.tmp".format(cache_file, os.getpid())
+            with open(tmpfile, "wb") as fid:
+                pickle.dump((stamp, records), fid, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfile, cache_file)
+        except (IOError, OSError):
+            pass
+
+        return cls(records)
+
+
+_registries = {}
+
+
+def get_registry(json_file=EPICKEY_JSON):
+    """process wide registry for json_file, loaded on first use"""
+    if json_file not in _registries:
+        _registries[json_file] = EPICKeyRegistry.load(json_file)
+    return _registries[json_file]
@@ -4,26 +4,86 @@
 
 class definitions for netcdf4 wrappers
 
+ History:
+ --------
+ 2026-10-17: read only mode and lazy, variable selective reads (ncreadfile_lazy)
+ 2026-10-17: shared repl_var, constant fills written without reading the variable
+
 """
 
+import datetime
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # python 2.7
+    from collections import Mapping
 
 import numpy as np
 # science stack
 from netCDF4 import Dataset, MFDataset
 
 
+def fill_value(var, default=1e35):
+    """_FillValue (or missing_value) of a netcdf variable, EPIC 1e35 if neither is set"""
+    for att in ["_FillValue", "missing_value"]:
+        if att in var.ncattrs():
+            return var.getncattr(att)
+    return default
+
+
+def repl_var(nchandle, var_name, val=1e35, depth=None):
+    """Overwrite a variable in place without reading it first.
+
+    Parameters
+    ----------
+    nchandle : netCDF4.Dataset
+        file opened in append mode
+    var_name : str
+        variable to overwrite
+    val : scalar or array_like
+        a scalar (or one element array) is written as a constant hyperslab,
+        np.ma.masked or None writes the variable's fill value.  Masked
+        elements of an array are written as the fill value.
+    depth : int, slice or sequence of int, optional
+        only rewrite these depth levels (second dimension of 4D EPIC
+        variables, first otherwise).  All depths if not passed.
+
+    """
+    var = nchandle.variables[var_name]
+    fill = fill_value(var)
+
+    index = [slice(None)] * var.ndim
+    if depth is not None and var.ndim:
+        index[1 if var.ndim == 4 else 0] = depth
+    index = tuple(index)
+
+    if val is None or val is np.ma.masked:
+        val = fill
+    if np.size(val) == 1:
+        # shape of the hyperslab from a zero memory view, nothing is read
+        shape = np.broadcast_to(np.empty((), dtype=bool), var.shape)[index].shape
+        val = np.full(shape, np.ma.filled(np.ravel(val), fill)[0], dtype=var.dtype)
+    else:
+        val = np.ma.filled(val, fill)
+
+    var[index] = val
+    return
+
+
 class EcoFOCI_netCDF(object):
-    def __init__(self, file_name=None):
+    def __init__(self, file_name=None, mode="a"):
         """Initialize opening of netcdf file.
 
         Parameters
         ----------
         file_name : str
             full path to file on disk
+        mode : str
+            netCDF4 access mode, use "r" for read only consumers
 
         """
 
-        self.nchandle = Dataset(file_name, "a")
+        self.nchandle = Dataset(file_name, mode)
         self.file_name = file_name
 
     def _getnchandle_(self):
@@ -51,14 +111,9 @@ class EcoFOCI_netCDF(object):
         """get variable attributes for specified variable"""
         return self.nchandle.variables[var_name]
 
-    def repl_var(self, var_name, val=1e35):
-        if len(val) == 1:
-            self.nchandle.variables[var_name][:] = (
-                np.ones_like(self.nchandle.variables[var_name][:]) * val
-            )
-        else:
-            self.nchandle.variables[var_name][:] = val
-        return
+    def repl_var(self, var_name, val=1e35, depth=None):
+        """see module level repl_var"""
+        repl_var(self.nchandle, var_name, val=val, depth=depth)
 
     def ncreadfile_dic(self, output="array"):
 
@@ -81,6 +136,25 @@ class EcoFOCI_netCDF(object):
                     data[v] = None
         return data
 
+    def ncreadfile_lazy(self, params=None, index=None):
+        """Mapping of variable name to data that only reads a variable
+        the first time it is accessed.
+
+        Parameters
+        ----------
+        params : list, optional
+            variable whitelist, names not in the file are dropped.
+            All variables in the file if not passed.
+        index : tuple, optional
+            hyperslab to read for each variable, eg (0, slice(None), 0, 0)
+            for the depth profile of an EPIC variable.  Variables with a
+            different number of dimensions are read whole.
+
+        The file must remain open while values are accessed, call
+        .load() before close() to keep everything in memory.
+        """
+        return LazyVarDict(self.nchandle, params=params, index=index)
+
     def add_history(self, prev_history, new_history):
         """Adds timestamp (UTC time) and history to existing information"""
         self.nchandle.setncattr(
@@ -96,6 +170,40 @@ class EcoFOCI_netCDF(object):
         self.nchandle.close()
 
 
+class LazyVarDict(Mapping):
+    """Read only dictionary of netcdf variables, see EcoFOCI_netCDF.ncreadfile_lazy"""
+
+    def __init__(self, nchandle, params=None, index=None):
+        self.nchandle = nchandle
+        if params is None:
+            self.params = list(nchandle.variables.keys())
+        else:
+            self.params = [v for v in params if v in nchandle.variables.keys()]
+        self.index = index
+        self._data = {}
+
+    def __getitem__(self, var_name):
+        if var_name not in self._data:
+            if var_name not in self.params:
+                raise KeyError(var_name)
+            var = self.nchandle.variables[var_name]
+            if self.index is None or var.ndim != len(self.index):
+                self._data[var_name] = var[:]
+            else:
+                self._data[var_name] = var[self.index]
+        return self._data[var_name]
+
+    def __iter__(self):
+        return iter(self.params)
+
+    def __len__(self):
+        return len(self.params)
+
+    def load(self):
+        """read any remaining variables and return a plain dictionary"""
+        return {v: self[v] for v in self.params}
+
+
 class EcoFOCI_mfnetCDF(object):
     def __init__(self, file_name=None, aggdim=None):
         """Initialize opening of multiple netcdf files along
@@ -8,6 +8,8 @@
  
   History:
  --------
+ 2026-10-17: Compiled, immutable EPIC schema shared by the EPIC writers
+ 2026-10-17: Add a batch class for writing many profiles from one compiled EPIC variable list
  2018-03-22: TODO: EVEN/UNEVEN is important for Ferret like tools. and should be accounted for
  2016-12-19: Add a class for ragged arrays (1D and 2D) - 1D is continuous file
  2016-12-16: Add a class for CF time conventions (1D and 2D) TODO: merge into other classes
@@ -22,7 +24,9 @@
 
 # Standard library.
 import datetime
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 # Scientific stack.
 import numpy as np
@@ -36,6 +40,171 @@ __version__ = "0.4.0"
 __status__ = "Development"
 
 
+"""-------------------------------EPIC Schema------------------------------------------"""
+
+# EPIC coordinate variables: (name, type, dimension, units, epic_code)
+epic_coord_vars = (
+    ("time", "i4", ("time",), "True Julian Day", 624),
+    ("time2", "i4", ("time",), "msec since 0:00 GMT", 624),
+    ("depth", "f4", ("depth",), "dbar", 1),
+    ("lat", "f4", ("lat",), "degree_north", 500),
+    ("lon", "f4", ("lon",), "degree_west", 501),
+)
+epic_dim_vars = ("time", "depth", "lat", "lon")
+
+
+class EPICVariable(object):
+    """Immutable definition of one record variable (name, type, dimensions and
+    attributes in the order they are written)"""
+
+    __slots__ = ("key", "nctype", "dims", "attributes")
+
+    def __init__(self, key, nctype, dims, attributes):
+        object.__setattr__(self, "key", key)
+        object.__setattr__(self, "nctype", nctype)
+        object.__setattr__(self, "dims", tuple(dims))
+        object.__setattr__(self, "attributes", tuple(attributes))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EPICVariable is read only")
+
+    def __reduce__(self):
+        return (EPICVariable, (self.key, self.nctype, self.dims, self.attributes))
+
+    def __repr__(self):
+        return "EPICVariable({0}, {1}, {2})".format(self.key, self.nctype, self.dims)
+
+
+class EPICSchema(object):
+    """Immutable compiled EPIC variable list (coordinates followed by the
+    EPIC dictionary keys) with an O(1) name -> position lookup.
+
+    Build it once per config with compile_schema and share it between
+    writers and casts.
+
+    Usage
+    -----
+        schema = compile_schema(EPIC_VARS_dict)
+        var_class = schema.create_variables(rootgrpID)
+        schema.fill(var_class, data_dic)
+    """
+
+    __slots__ = ("variables", "index", "epic_keys")
+
+    def __init__(self, variables):
+        variables = tuple(variables)
+        object.__setattr__(self, "variables", variables)
+        object.__setattr__(
+            self, "index", dict((v.key, i) for i, v in enumerate(variables))
+        )
+        object.__setattr__(
+            self, "epic_keys", tuple(v.key for v in variables[len(epic_coord_vars) :])
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EPICSchema is read only")
+
+    def __reduce__(self):
+        return (EPICSchema, (self.variables,))
+
+    def __len__(self):
+        return len(self.variables)
+
+    @property
+    def names(self):
+        return [v.key for v in self.variables]
+
+    def keys(self):
+        """EPIC variable names, so a schema can stand in for its EPIC dictionary"""
+        return self.epic_keys
+
+    @classmethod
+    def from_dict(cls, EPIC_VARS_dict, fortran=False):
+        """compile an EPIC dictionary (keys are the variable names), fortran
+        adds the FORTRAN_format attribute (timeseries files)"""
+        # exit if the variable dictionary is not passed
+        if not bool(EPIC_VARS_dict):
+            raise RuntimeError("Empty EPIC Dictionary is passed to EPICSchema.")
+
+        variables = []
+        for key, nctype, dims, units, epic_code in epic_coord_vars:
+            attributes = [("name", ""), ("long_name", ""), ("generic_name", "")]
+            if fortran:
+                attributes.append(("FORTRAN_format", ""))
+            attributes += [("units", units), ("type", "EVEN"), ("epic_code", epic_code)]
+            variables.append(EPICVariable(key, nctype, dims, attributes))
+
+        for key, evar in EPIC_VARS_dict.items():
+            attributes = [
+                ("name", evar["name"]),
+                ("long_name", evar["longname"]),
+                ("generic_name", evar["generic_name"]),
+            ]
+            if fortran:
+                attributes.append(("FORTRAN_format", evar["fortran"]))
+            attributes += [
+                ("units", evar["units"]),
+                ("type", ""),
+                ("epic_code", evar["EPIC_KEY"]),
+            ]
+            variables.append(EPICVariable(key, "f4", epic_dim_vars, attributes))
+
+        return cls(variables)
+
+    def create_variables(self, rootgrpID, verbose=False):
+        """define every variable in an open Dataset, returns them in schema order"""
+        var_class = []
+        for var in self.variables:
+            v = rootgrpID.createVariable(var.key, var.nctype, var.dims)
+            for name, value in var.attributes:
+                v.setncattr(name, value)
+            if verbose:
+                print("Adding Variable {0}".format(v))
+            var_class.append(v)
+        return var_class
+
+    def fill(self, var_class, data_dic=None, missing_values=1e35, keys=None):
+        """populate EPIC variables (all, or those in keys), variables not in
+        data_dic are left as missing data"""
+        if data_dic is None:
+            data_dic = {}
+
+        for key in self.epic_keys if keys is None else keys:
+            try:
+                var_class[self.index[key]][:] = data_dic[key]
+            except KeyError:
+                var_class[self.index[key]][:] = missing_values
+
+
+_schema_cache = {}
+
+
+def _freeze(value):
+    """hashable copy of a config value, dictionaries keep their key order"""
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def compile_schema(EPIC_VARS_dict, fortran=False):
+    """EPICSchema for an EPIC dictionary, compiled once per distinct dictionary
+
+    Dictionaries with the same variables in a different order are different
+    schemas (variables are defined in dictionary order).  An EPICSchema passed
+    in is returned as is, callers writing many files should compile once and
+    pass the schema.
+    """
+    if isinstance(EPIC_VARS_dict, EPICSchema):
+        return EPIC_VARS_dict
+
+    key = (_freeze(EPIC_VARS_dict), fortran)
+    if key not in _schema_cache:
+        _schema_cache[key] = EPICSchema.from_dict(EPIC_VARS_dict, fortran=fortran)
+    return _schema_cache[key]
+
+
 """-------------------------------NCFile Creation--------------------------------------"""
 
 
@@ -146,96 +315,13 @@ class NetCDF_Create_Timeseries(object):
         EPIC keys:
             passed in as a dictionary (similar syntax as json data file)
             The dictionary keys are what defines the variable names.
+            A compiled EPICSchema may be passed instead.
         """
-        # exit if the variable dictionary is not passed
-        if not bool(EPIC_VARS_dict):
-            raise RuntimeError("Empty EPIC Dictionary is passed to variable_init.")
-
-        # build record variable attributes
-        rec_vars, rec_var_name, rec_var_longname = [], [], []
-        rec_var_generic_name, rec_var_FORTRAN, rec_var_units, rec_var_epic = (
-            [],
-            [],
-            [],
-            [],
-        )
-
-        # cycle through epic dictionary and create nc parameters
-        for evar in EPIC_VARS_dict.keys():
-            rec_vars.append(evar)
-            rec_var_name.append(EPIC_VARS_dict[evar]["name"])
-            rec_var_longname.append(EPIC_VARS_dict[evar]["longname"])
-            rec_var_generic_name.append(EPIC_VARS_dict[evar]["generic_name"])
-            rec_var_units.append(EPIC_VARS_dict[evar]["units"])
-            rec_var_FORTRAN.append(EPIC_VARS_dict[evar]["fortran"])
-            rec_var_epic.append(EPIC_VARS_dict[evar]["EPIC_KEY"])
-
-        rec_vars = ["time", "time2", "depth", "lat", "lon"] + rec_vars
-
-        rec_var_name = ["", "", "", "", ""] + rec_var_name
-        rec_var_longname = ["", "", "", "", ""] + rec_var_longname
-        rec_var_generic_name = ["", "", "", "", ""] + rec_var_generic_name
-        rec_var_FORTRAN = ["", "", "", "", ""] + rec_var_FORTRAN
-        rec_var_units = [
-            "True Julian Day",
-            "msec since 0:00 GMT",
-            "dbar",
-            "degree_north",
-            "degree_west",
-        ] + rec_var_units
-        rec_var_type = ["i4", "i4"] + ["f4" for spot in rec_vars[2:]]
-        rec_var_strtype = ["EVEN", "EVEN", "EVEN", "EVEN", "EVEN"] + [
-            "" for spot in rec_vars[5:]
-        ]
-        rec_epic_code = [624, 624, 1, 500, 501] + rec_var_epic
-
-        var_class = []
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[0], rec_var_type[0], self.dim_vars[0]
-            )
-        )  # time1
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[1], rec_var_type[1], self.dim_vars[0]
-            )
-        )  # time2
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[2], rec_var_type[2], self.dim_vars[1]
-            )
-        )  # depth
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[3], rec_var_type[3], self.dim_vars[2]
-            )
-        )  # lat
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[4], rec_var_type[4], self.dim_vars[3]
-            )
-        )  # lon
-
-        for i, v in enumerate(rec_vars[5:]):  # 1D coordinate variables
-            var_class.append(
-                self.rootgrpID.createVariable(
-                    rec_vars[i + 5], rec_var_type[i + 5], self.dim_vars
-                )
-            )
-
-        ### add variable attributes
-        for i, v in enumerate(var_class):  # 4dimensional for all vars
-            print("Adding Variable {0}".format(v))  #
-            v.setncattr("name", rec_var_name[i])
-            v.long_name = rec_var_longname[i]
-            v.generic_name = rec_var_generic_name[i]
-            v.FORTRAN_format = rec_var_FORTRAN[i]
-            v.units = rec_var_units[i]
-            v.type = rec_var_strtype[i]
-            v.epic_code = rec_epic_code[i]
+        # compiled once per EPIC dictionary (raises RuntimeError if empty)
+        self.schema = compile_schema(EPIC_VARS_dict, fortran=True)
 
-        self.var_class = var_class
-        self.rec_vars = rec_vars
+        self.var_class = self.schema.create_variables(self.rootgrpID, verbose=True)
+        self.rec_vars = self.schema.names
 
     def add_coord_data(
         self,
@@ -269,12 +355,12 @@ class NetCDF_Create_Timeseries(object):
         # if no data is passed but an epic dictionary is, complete routine leaving variables
         #  with missing data if not found
 
-        for EPICdic_key in EPIC_VARS_dict.keys():
-            di = self.rec_vars.index(EPICdic_key)
-            try:
-                self.var_class[di][:] = data_dic[EPICdic_key]
-            except KeyError:
-                self.var_class[di][:] = missing_values
+        self.schema.fill(
+            self.var_class,
+            data_dic=data_dic,
+            missing_values=missing_values,
+            keys=EPIC_VARS_dict.keys(),
+        )
 
     def add_history(self, new_history):
         """Adds timestamp (UTC time) and history to existing information"""
@@ -402,88 +488,13 @@ class NetCDF_Create_Profile(object):
         EPIC keys:
             passed in as a dictionary (similar syntax as json data file)
             The dictionary keys are what defines the variable names.
+            A compiled EPICSchema may be passed instead.
         """
-        # exit if the variable dictionary is not passed
-        if not bool(EPIC_VARS_dict):
-            raise RuntimeError("Empty EPIC Dictionary is passed to variable_init.")
-
-        # build record variable attributes
-        rec_vars, rec_var_name, rec_var_longname = [], [], []
-        rec_var_generic_name, rec_var_units, rec_var_epic = [], [], []
-
-        # cycle through epic dictionary and create nc parameters
-        for evar in EPIC_VARS_dict.keys():
-            rec_vars.append(evar)
-            rec_var_name.append(EPIC_VARS_dict[evar]["name"])
-            rec_var_longname.append(EPIC_VARS_dict[evar]["longname"])
-            rec_var_generic_name.append(EPIC_VARS_dict[evar]["generic_name"])
-            rec_var_units.append(EPIC_VARS_dict[evar]["units"])
-            rec_var_epic.append(EPIC_VARS_dict[evar]["EPIC_KEY"])
-
-        rec_vars = ["time", "time2", "depth", "lat", "lon"] + rec_vars
-
-        rec_var_name = ["", "", "", "", ""] + rec_var_name
-        rec_var_longname = ["", "", "", "", ""] + rec_var_longname
-        rec_var_generic_name = ["", "", "", "", ""] + rec_var_generic_name
-        rec_var_units = [
-            "True Julian Day",
-            "msec since 0:00 GMT",
-            "dbar",
-            "degree_north",
-            "degree_west",
-        ] + rec_var_units
-        rec_var_type = ["i4", "i4"] + ["f4" for spot in rec_vars[2:]]
-        rec_var_strtype = ["EVEN", "EVEN", "EVEN", "EVEN", "EVEN"] + [
-            "" for spot in rec_vars[5:]
-        ]
-        rec_epic_code = [624, 624, 1, 500, 501] + rec_var_epic
+        # compiled once per EPIC dictionary (raises RuntimeError if empty)
+        self.schema = compile_schema(EPIC_VARS_dict, fortran=False)
 
-        var_class = []
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[0], rec_var_type[0], self.dim_vars[0]
-            )
-        )  # time1
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[1], rec_var_type[1], self.dim_vars[0]
-            )
-        )  # time2
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[2], rec_var_type[2], self.dim_vars[1]
-            )
-        )  # depth
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[3], rec_var_type[3], self.dim_vars[2]
-            )
-        )  # lat
-        var_class.append(
-            self.rootgrpID.createVariable(
-                rec_vars[4], rec_var_type[4], self.dim_vars[3]
-            )
-        )  # lon
-
-        for i, v in enumerate(rec_vars[5:]):  # 1D coordinate variables
-            var_class.append(
-                self.rootgrpID.createVariable(
-                    rec_vars[i + 5], rec_var_type[i + 5], self.dim_vars
-                )
-            )
-
-        ### add variable attributes
-        for i, v in enumerate(var_class):  # 4dimensional for all vars
-            print("Adding Variable {0}".format(v))  #
-            v.setncattr("name", rec_var_name[i])
-            v.long_name = rec_var_longname[i]
-            v.generic_name = rec_var_generic_name[i]
-            v.units = rec_var_units[i]
-            v.type = rec_var_strtype[i]
-            v.epic_code = rec_epic_code[i]
-
-        self.var_class = var_class
-        self.rec_vars = rec_vars
+        self.var_class = self.schema.create_variables(self.rootgrpID, verbose=True)
+        self.rec_vars = self.schema.names
 
     def add_coord_data(
         self,
@@ -517,12 +528,12 @@ class NetCDF_Create_Profile(object):
         # if no data is passed but an epic dictionary is, complete routine leaving variables
         #  with missing data if not found
 
-        for EPICdic_key in EPIC_VARS_dict.keys():
-            di = self.rec_vars.index(EPICdic_key)
-            try:
-                self.var_class[di][:] = data_dic[EPICdic_key]
-            except KeyError:
-                self.var_class[di][:] = missing_values
+        self.schema.fill(
+            self.var_class,
+            data_dic=data_dic,
+            missing_values=missing_values,
+            keys=EPIC_VARS_dict.keys(),
+        )
 
     def add_history(self, new_history):
         """Adds timestamp (UTC time) and history to existing information"""
@@ -538,6 +549,128 @@ class NetCDF_Create_Profile(object):
         self.rootgrpID.close()
 
 
+class NetCDF_Create_Profile_Batch(object):
+    """ Class instance to generate many EPIC profile files (one per cast)
+    that share the same variable definitions.
+
+    The EPIC variable dictionary is walked once when the instance is built,
+    each file then only pays for the netcdf calls and the data itself.  Global
+    attributes, dimensions and coordinates are written through NetCDF_Create_Profile
+    so files are identical to the ones made with the step by step routines.
+
+    Standards
+    ---------
+    EPICNetCDF (PMEL) Standards  
+
+
+    Usage
+    -----
+
+    Use this to create one nc file per cast
+        ncbatch = NetCDF_Create_Profile_Batch(EPIC_VARS_dict)
+        ncbatch.write_profile(savefile, data_dic=data_dic, depth=..., time1=..., time2=...)
+
+    or stream a list of casts (each a dictionary of write_profile keywords)
+        ncbatch.write_profiles(profiles, max_workers=4)
+    """
+
+    def __init__(self, EPIC_VARS_dict, verbose=False):
+        """compile record variable attributes from the EPIC dictionary (or
+        use the EPICSchema passed)"""
+        self.verbose = verbose
+        self.schema = compile_schema(EPIC_VARS_dict)
+        self.epic_keys = list(self.schema.epic_keys)
+        self.rec_vars = self.schema.names
+
+    def variable_init(self, ncinstance):
+        """create the compiled record variables in an open NetCDF_Create_Profile"""
+        ncinstance.var_class = self.schema.create_variables(
+            ncinstance.rootgrpID, verbose=self.verbose
+        )
+        ncinstance.rec_vars = self.rec_vars
+        ncinstance.schema = self.schema
+
+    def add_data(self, ncinstance, data_dic=None, missing_values=1e35):
+        """populate EPIC variables, those not in data_dic are left as missing data"""
+        self.schema.fill(
+            ncinstance.var_class, data_dic=data_dic, missing_values=missing_values
+        )
+
+    def write_profile(
+        self,
+        savefile,
+        data_dic=None,
+        depth=None,
+        latitude=1e35,
+        longitude=1e35,
+        time1=None,
+        time2=None,
+        global_atts=None,
+        history=None,
+        missing_values=1e35,
+    ):
+        """write a single cast to savefile
+
+        global_atts are passed as keywords to NetCDF_Create_Profile.sbeglobal_atts
+        """
+        ncinstance = NetCDF_Create_Profile(savefile=savefile)
+        ncinstance.file_create()
+        try:
+            ncinstance.sbeglobal_atts(**(global_atts or {}))
+            ncinstance.dimension_init(depth_len=len(depth))
+            self.variable_init(ncinstance)
+            ncinstance.add_coord_data(
+                depth=depth,
+                latitude=latitude,
+                longitude=longitude,
+                time1=time1,
+                time2=time2,
+            )
+            self.add_data(ncinstance, data_dic=data_dic, missing_values=missing_values)
+            if history:
+                ncinstance.add_history(history)
+        finally:
+            ncinstance.close()
+
+        return savefile
+
+    def write_profiles(self, profiles, max_workers=1):
+        """write many casts, each item of profiles is a dictionary of
+        write_profile keywords (savefile is required)
+
+        max_workers > 1 spreads the casts over a process pool.  Files are
+        returned in the order of profiles.
+        """
+        return write_profile_jobs([(self, p) for p in profiles], max_workers)
+
+
+def write_profile_jobs(jobs, max_workers=1):
+    """write (NetCDF_Create_Profile_Batch, write_profile keywords) pairs,
+    casts of different products can share one process pool
+
+    Files are returned in the order of jobs.
+    """
+    if max_workers is None or max_workers > 1:
+        # the ncgen scripts run at module level, fork (where available) keeps
+        # workers from re-running the calling script on import
+        if "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+        else:
+            mp_context = None
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp_context
+        ) as executor:
+            return list(executor.map(_write_profile_job, jobs))
+
+    return [_write_profile_job(job) for job in jobs]
+
+
+def _write_profile_job(job):
+    """process pool entry point for write_profile_jobs"""
+    ncbatch, profile = job
+    return ncbatch.write_profile(**profile)
+
+
 class NetCDF_Trimmed(object):
     """ Class instance to generate a NetCDF file.  
     Takes variable information from preexisting netcdf file via nchandle pass in variable_init.
@@ -0,0 +1,173 @@
+"""
+ Background:
+ ===========
+ ncgen.py
+
+
+ Purpose:
+ ========
+ Creates EPIC flavored .nc files for bottle (sbe upcast discrete) data and any
+ number of discrete lab datasets (nutrient, oxygen, ...) matched to it, in a
+ single pass over the bottle report.  Replaces running BTL_ncgen.py,
+ Nut_ncgen.py and BTLoxy_ncgen.py one after the other.
+
+ File Format:
+ ============
+ - S.Bell - combined seabird btl report output
+ - E.Wisegarver - nutrient / oxygen csv output
+ - Pavlof DB for cruise/cast metadata
+
+ (Very Long) Example Usage:
+ ==========================
+
+ 'python ncgen.py DY1707 /Users/bell/ecoraid/2017/CTDcasts/dy1707l1/working/dy1707l1.report_btl
+ /Users/bell/ecoraid/2017/CTDcasts/dy1707l1/working/
+ --btl config_files/bottle_epickeys.yaml
+ --discrete nut /Users/bell/ecoraid/2017/CTDcasts/dy1707l1/working/DiscreteNutrients/DY1707\ Nutrient\ Data.csv config_files/nut_uml_epickeys.yaml
+ --discrete oxy /Users/bell/ecoraid/2017/CTDcasts/dy1707l1/working/DiscreteOxygen/DY1707\ Oxygen\ Data.csv config_files/btloxy_uml_epickeys.yaml
+ --workers 4'
+
+ Products nut and oxy know their lab column names, other products (eg. sal)
+ need a 'lab_label' entry per variable in their EPIC config file.
+
+ History:
+ ========
+ 2026-10-17: combine BTL_ncgen, Nut_ncgen and BTLoxy_ncgen
+
+ Compatibility:
+ ==============
+ python >=3.6
+
+"""
+
+import argparse
+import datetime
+import sys
+
+import io_utils.ConfigParserLocal as ConfigParserLocal
+import io_utils.EcoFOCI_netCDF_write as EcF_write
+from io_utils.EcoFOCI_btl_report import (
+    add_cast_keys,
+    archive_profiles,
+    read_lab_csv,
+    read_report_btl,
+)
+
+__author__ = "Shaun Bell"
+__email__ = "shaun.bell@noaa.gov"
+__created__ = datetime.datetime(2026, 10, 17)
+__modified__ = datetime.datetime(2026, 10, 17)
+__version__ = "0.1.0"
+__status__ = "Development"
+__keywords__ = "netCDF", "meta", "header", "QC", "bottle", "discreet", "nutrient", "oxygen"
+
+
+def get_config(config_file_name):
+    if config_file_name.split(".")[-1] in ["json", "pyini"]:
+        return ConfigParserLocal.get_config(config_file_name, "json")
+    elif config_file_name.split(".")[-1] in ["yaml"]:
+        return ConfigParserLocal.get_config(config_file_name, "yaml")
+    sys.exit("Exiting: config files must have .pyini, .json, or .yaml endings")
+
+
+"""------------------------------- MAIN--------------------------------------------"""
+
+parser = argparse.ArgumentParser(
+    description="Archive bottle data and discrete lab data (nutrient, oxygen, ...) in one pass"
+)
+parser.add_argument(
+    "CruiseID", metavar="CruiseID", type=str, help="provide the cruiseid"
+)
+parser.add_argument(
+    "btlpath", metavar="btlpath", type=str, help="full path to .report_btl"
+)
+parser.add_argument(
+    "output",
+    metavar="output",
+    type=str,
+    help="full path to output folder (files will be generated there",
+)
+parser.add_argument(
+    "--btl",
+    type=str,
+    metavar="config_file_name",
+    help="write bottle files with this config file - bottle_epickeys.yaml",
+)
+parser.add_argument(
+    "--discrete",
+    nargs=3,
+    action="append",
+    default=[],
+    metavar=("product", "labpath", "config_file_name"),
+    help="discrete dataset to merge with the bottle report, eg. nut nut.csv nut_uml_epickeys.yaml",
+)
+parser.add_argument(
+    "--report_cache",
+    type=str,
+    default="pickle",
+    choices=["pickle", "parquet", "feather", "none"],
+    help="sidecar format the parsed .report_btl is cached in (none to always parse)",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="number of processes used to write the cast files",
+)
+
+args = parser.parse_args()
+
+if not args.btl and not args.discrete:
+    sys.exit("Exiting: nothing to archive, pass --btl and/or --discrete")
+
+### Read BTL Report file once for all products
+reportdf = read_report_btl(
+    args.btlpath,
+    cache_format=None if args.report_cache == "none" else args.report_cache,
+)
+
+print("Btl Report Header Summary:")
+print(reportdf.info())
+
+# strip ctd from cast name and make integer, sorted by cast/niskin
+try:
+    add_cast_keys(reportdf)
+except ValueError:
+    sys.exit("Exiting: Report file doesn't have casts named as expected... ctdxxx")
+
+datasets = []
+if args.btl:
+    datasets.append(
+        {
+            "product": "btl",
+            "data": None,
+            "EPIC_VARS_dict": get_config(args.btl),
+            "raw_data_file": args.btlpath.split("/")[-1],
+        }
+    )
+for product, labpath, config_file_name in args.discrete:
+    labdf = read_lab_csv(labpath)
+    print("{} Header Summary:".format(product))
+    print(labdf.info())
+    datasets.append(
+        {
+            "product": product,
+            "data": labdf,
+            "EPIC_VARS_dict": get_config(config_file_name),
+            "raw_data_file": labpath.split("/")[-1],
+        }
+    )
+
+# variable definitions are compiled once per product and shared by every cast file
+for dataset in datasets:
+    dataset["ncbatch"] = EcF_write.NetCDF_Create_Profile_Batch(
+        dataset["EPIC_VARS_dict"]
+    )
+
+profiles = archive_profiles(reportdf, datasets, args.CruiseID, args.output)
+
+files = EcF_write.write_profile_jobs(
+    [(dataset["ncbatch"], profile) for dataset, profile in profiles],
+    max_workers=args.workers,
+)
+print("{} files written to {}".format(len(files), args.output))